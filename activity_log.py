@@ -1,125 +1,850 @@
+import gzip
+import heapq
+import itertools
+import json
+import logging
+import shutil
 import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
 from datetime import datetime
+from operator import itemgetter
 import os
 
+# Wartezeit in Millisekunden, falls ein anderer Prozess (z.B. categorize_activities) gerade schreibt
+BUSY_TIMEOUT_MS = 5000
+
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -8000",
+    "PRAGMA mmap_size = 67108864",
+    "PRAGMA temp_store = MEMORY",
+    f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}",
+)
+
+# Anzahl der Zeilen, die beim Streamen von Logs pro fetchmany geholt werden
+FETCH_CHUNK_SIZE = 500
+
+LOG_COLUMNS = "id, window, start, end, duration, type, video, category_id"
+
+
+def _migration_1(conn):
+    """
+    Ersetzt die von add_log geschriebenen 'None'-Strings durch NULL und legt die Indizes an.
+    """
+    conn.execute("UPDATE activity_log SET end = NULL WHERE end = 'None'")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_activity_log_start ON activity_log (start)")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_activity_log_category ON activity_log (category_id)")
+    # Partieller Index: enthält nur die wenigen offenen Segmente statt der ganzen Historie
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_activity_log_open
+        ON activity_log (window) WHERE end IS NULL
+        """)
+
+
+def _migration_2(conn):
+    """
+    Legt die meta-Tabelle und das kompakte Speicherformat an: Zeitstempel als Epoch-Integer,
+    jeder Fenstertitel nur einmal in windows und der Typ als kleine Zahl.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )
+        """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS windows (
+            id INTEGER PRIMARY KEY,
+            title TEXT NOT NULL UNIQUE
+        )
+        """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS activity_log_compact (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            window_id INTEGER REFERENCES windows(id),
+            start INTEGER,
+            end INTEGER,
+            duration REAL,
+            type INTEGER,
+            video INTEGER,
+            category_id INTEGER
+        )
+        """)
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_activity_log_compact_start ON activity_log_compact (start)")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_activity_log_compact_category ON activity_log_compact (category_id)")
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_activity_log_compact_open
+        ON activity_log_compact (window_id) WHERE end IS NULL
+        """)
+    # Lesesicht mit den gleichen Spalten wie activity_log (Zeitstempel bleiben Epoch-Integer)
+    conn.execute("""
+        CREATE VIEW IF NOT EXISTS activity_log_compact_view AS
+        SELECT l.id AS id, w.title AS window, l.start AS start, l.end AS end,
+               l.duration AS duration,
+               CASE l.type WHEN 0 THEN 'activity' WHEN 1 THEN 'pause' END AS type,
+               l.video AS video, l.category_id AS category_id, l.window_id AS window_id
+        FROM activity_log_compact l
+        LEFT JOIN windows w ON w.id = l.window_id
+        """)
+
+
+def _migration_3(conn):
+    """
+    Legt die Tagessummen je Fenster und je Kategorie an. Enthält die Datei schon Logs,
+    werden die Summen nach dem Öffnen einmalig neu aufgebaut.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS daily_window_totals (
+            day TEXT NOT NULL,
+            window TEXT NOT NULL,
+            duration REAL NOT NULL,
+            segments INTEGER NOT NULL,
+            PRIMARY KEY (day, window)
+        ) WITHOUT ROWID
+        """)
+    # category_id 0 steht für "ohne Kategorie"
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS daily_category_totals (
+            day TEXT NOT NULL,
+            category_id INTEGER NOT NULL,
+            duration REAL NOT NULL,
+            segments INTEGER NOT NULL,
+            PRIMARY KEY (day, category_id)
+        ) WITHOUT ROWID
+        """)
+    has_logs = conn.execute("""
+        SELECT EXISTS (SELECT 1 FROM activity_log) OR EXISTS (SELECT 1 FROM activity_log_compact)
+        """).fetchone()[0]
+    if has_logs:
+        conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('rollups_stale', '1')")
+
+
+def _migration_4(conn):
+    """
+    Legt den Katalog der Monatspartitionen an (abgeschlossene Monate in eigenen Dateien).
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS partitions (
+            month TEXT PRIMARY KEY,
+            path TEXT NOT NULL,
+            min_id INTEGER,
+            max_id INTEGER,
+            rows INTEGER NOT NULL DEFAULT 0,
+            compressed INTEGER NOT NULL DEFAULT 0
+        )
+        """)
+
+
+# Migrationen in Reihenfolge; die Position + 1 ist die erreichte Schema-Version (PRAGMA user_version)
+MIGRATIONS = [
+    _migration_1,
+    _migration_2,
+    _migration_3,
+    _migration_4,
+]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+STORAGE_TEXT = "text"
+STORAGE_COMPACT = "compact"
+
+# Kodierung der Spalte type im kompakten Format
+TYPE_CODES = {"activity": 0, "pause": 1}
+
+
+def format_time(value):
+    """
+    Wandelt einen Zeitpunkt in den gespeicherten Text um (None bleibt NULL).
+    """
+    return str(value) if value is not None else None
+
+
+def to_epoch(value):
+    """
+    Wandelt einen Zeitpunkt (datetime oder ISO-Text, lokale Zeit) in Epoch-Sekunden um.
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return round(value.timestamp())
+
+
+def month_of(value):
+    """
+    Gibt den Monat ('YYYY-MM') eines Zeitpunkts (datetime, date oder ISO-Text) zurück.
+    """
+    if isinstance(value, str):
+        return value[:7]
+    return value.strftime("%Y-%m")
+
+
+def add_months(month, count):
+    """
+    Verschiebt einen Monat ('YYYY-MM') um count Monate.
+    """
+    year, number = int(month[:4]), int(month[5:7])
+    index = year * 12 + number - 1 + count
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def _upsert_totals_sql(table, key, source):
+    """
+    Gibt das UPSERT-Statement zurück, das source (SELECT oder VALUES) zu einer Tagessummen-Tabelle addiert.
+    """
+    return f"""
+        INSERT INTO {table} (day, {key}, duration, segments)
+        {source}
+        ON CONFLICT (day, {key}) DO UPDATE SET
+            duration = {table}.duration + excluded.duration,
+            segments = {table}.segments + excluded.segments
+        """
+
+
+def parse_time(value):
+    """
+    Wandelt einen gespeicherten Zeitpunkt (ISO-Text oder Epoch-Integer) in datetime um.
+    """
+    if value is None:
+        return None
+    if isinstance(value, int):
+        return datetime.fromtimestamp(value)
+    return datetime.fromisoformat(value)
+
 
 class ActivityLog:
-    def __init__(self, db_path="activity.db"):
+    def __init__(self, db_path="activity.db", storage=None):
         self.db_path = db_path
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._window_ids = {}
+        # Monat -> [ActivityLog, Anzahl Benutzer]; unbenutzte Partitionen werden geschlossen
+        self._partitions = {}
+        self._partitions_lock = threading.Lock()
         self._create_database()
+        self._init_storage(storage)
+
+    def _open_connection(self):
+        """
+        Öffnet eine neue Verbindung mit WAL-Journal und den Performance-Pragmas.
+        """
+        conn = sqlite3.connect(
+            self.db_path, timeout=BUSY_TIMEOUT_MS / 1000,
+            isolation_level=None, check_same_thread=False)
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        with self._connections_lock:
+            self._connections.append(conn)
+        return conn
+
+    @property
+    def connection(self):
+        """
+        Gibt die langlebige Verbindung des aktuellen Threads zurück.
+        Einzelne Statements außerhalb von transaction() werden sofort committet.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._open_connection()
+            self._local.conn = conn
+            self._local.depth = 0
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        """
+        Führt den Block in einer Transaktion aus (COMMIT, bzw. ROLLBACK bei einem Fehler).
+        Verschachtelte Aufrufe laufen in der äußeren Transaktion mit.
+        """
+        conn = self.connection
+        if self._local.depth:
+            self._local.depth += 1
+            try:
+                yield conn
+            finally:
+                self._local.depth -= 1
+            return
+
+        conn.execute("BEGIN IMMEDIATE")
+        self._local.depth = 1
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            # In der Transaktion angelegte Fenster-ids existieren nach dem Rollback nicht mehr
+            self._window_ids = {}
+            raise
+        else:
+            conn.execute("COMMIT")
+        finally:
+            self._local.depth = 0
+
+    def close(self):
+        """
+        Schließt die Verbindungen aller Threads zur Datenbank.
+        """
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        self._local = threading.local()
+        with self._partitions_lock:
+            partitions, self._partitions = self._partitions, {}
+        for partition, _ in partitions.values():
+            partition.close()
 
     def _create_database(self):
         """
             Erstellt die SQLite Datenbank und die Tabellen.
             """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("""
-                CREATE TABLE IF NOT EXISTS activity_log (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    window TEXT,
-                    start TEXT,
-                    end TEXT,
-                    duration REAL,
-                    type TEXT,
-                    video INTEGER,
-                    category_id INTEGER
-                )
-            """)
-        cursor.execute("""
-                CREATE TABLE IF NOT EXISTS categories (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    level INTEGER,
-                    name TEXT,
-                    parent_id INTEGER,
-                    FOREIGN KEY (parent_id) REFERENCES categories(id)
-                )
-            """)
-        conn.commit()
-        conn.close()
+        with self.transaction() as conn:
+            conn.execute("""
+                    CREATE TABLE IF NOT EXISTS activity_log (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        window TEXT,
+                        start TEXT,
+                        end TEXT,
+                        duration REAL,
+                        type TEXT,
+                        video INTEGER,
+                        category_id INTEGER
+                    )
+                """)
+            conn.execute("""
+                    CREATE TABLE IF NOT EXISTS categories (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        level INTEGER,
+                        name TEXT,
+                        parent_id INTEGER,
+                        FOREIGN KEY (parent_id) REFERENCES categories(id)
+                    )
+                """)
+        self._migrate()
+
+    def _init_storage(self, requested):
+        """
+        Bestimmt das Speicherformat der Datei. Ein bereits festgelegtes Format hat Vorrang;
+        eine neue (leere) Datenbank übernimmt das gewünschte Format.
+        """
+        row = self.connection.execute(
+            "SELECT value FROM meta WHERE key = 'storage_format'").fetchone()
+        if row:
+            storage = row[0]
+            if requested and requested != storage:
+                logging.warning(
+                    f"Database {self.db_path} uses storage format '{storage}', ignoring '{requested}'.")
+        else:
+            storage = requested or STORAGE_TEXT
+            has_text_rows = self.connection.execute(
+                "SELECT 1 FROM activity_log LIMIT 1").fetchone()
+            if storage == STORAGE_COMPACT and has_text_rows:
+                logging.warning(
+                    f"Database {self.db_path} contains text logs, run the converter to switch to '{storage}'.")
+                storage = STORAGE_TEXT
+            self.connection.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('storage_format', ?)", (storage,))
+        self._set_storage(storage)
+
+        if self.connection.execute(
+                "SELECT 1 FROM meta WHERE key = 'rollups_stale'").fetchone():
+            self.rebuild_rollups()
+
+    def _set_storage(self, storage):
+        """
+        Setzt Tabellen, Spalten und Kodierung passend zum Speicherformat.
+        """
+        self.storage = storage
+        if storage == STORAGE_COMPACT:
+            self.log_table = "activity_log_compact"
+            self.log_source = "activity_log_compact_view"
+            self.window_column = "window_id"
+            self.window_match = "window_id = (SELECT id FROM windows WHERE title = ?)"
+            self.day_expression = "date(start, 'unixepoch', 'localtime')"
+            self.month_expression = "strftime('%Y-%m', start, 'unixepoch', 'localtime')"
+            self.encode_time = to_epoch
+        else:
+            self.log_table = "activity_log"
+            self.log_source = "activity_log"
+            self.window_column = "window"
+            self.window_match = "window = ?"
+            self.day_expression = "date(start)"
+            self.month_expression = "substr(start, 1, 7)"
+            self.encode_time = format_time
+
+    def _encode_window(self, window):
+        """
+        Gibt den gespeicherten Wert für einen Fenstertitel zurück (im kompakten Format dessen id).
+        """
+        if self.storage != STORAGE_COMPACT:
+            return window
+        window_id = self._window_ids.get(window)
+        if window_id is None:
+            conn = self.connection
+            conn.execute(
+                "INSERT OR IGNORE INTO windows (title) VALUES (?)", (window,))
+            window_id = conn.execute(
+                "SELECT id FROM windows WHERE title = ?", (window,)).fetchone()[0]
+            self._window_ids[window] = window_id
+        return window_id
+
+    def _encode_type(self, type):
+        """
+        Gibt den gespeicherten Wert für den Typ zurück (im kompakten Format 0/1).
+        """
+        if self.storage != STORAGE_COMPACT:
+            return type
+        return TYPE_CODES.get(type)
+
+    def _encode_log(self, window, start, end, duration, type, video=False, category_id=None):
+        """
+        Baut die Parameter einer INSERT-Zeile im aktuellen Speicherformat.
+        """
+        return (self._encode_window(window), self.encode_time(start), self.encode_time(end),
+                duration, self._encode_type(type), int(video), category_id)
+
+    def _insert_sql(self):
+        """
+        Gibt das INSERT-Statement für die Log-Tabelle des aktuellen Formats zurück.
+        """
+        return f"""
+            INSERT INTO {self.log_table} ({self.window_column}, start, end, duration, type, video, category_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """
+
+    def convert_to_compact(self):
+        """
+        Wandelt eine Datenbank im Textformat in das kompakte Format um (ids bleiben erhalten)
+        und gibt die Anzahl der übernommenen Logs zurück.
+        """
+        if self.storage == STORAGE_COMPACT:
+            return 0
+        with self.transaction() as conn:
+            conn.execute("""
+                INSERT OR IGNORE INTO windows (title)
+                SELECT DISTINCT window FROM activity_log WHERE window IS NOT NULL
+                """)
+            # 'utc' interpretiert den gespeicherten Text als lokale Zeit, wie datetime.timestamp()
+            cursor = conn.execute("""
+                INSERT INTO activity_log_compact (id, window_id, start, end, duration, type, video, category_id)
+                SELECT l.id, w.id,
+                       CAST(strftime('%s', l.start, 'utc') AS INTEGER),
+                       CAST(strftime('%s', l.end, 'utc') AS INTEGER),
+                       l.duration,
+                       CASE l.type WHEN 'activity' THEN 0 WHEN 'pause' THEN 1 END,
+                       l.video, l.category_id
+                FROM activity_log l
+                LEFT JOIN windows w ON w.title = l.window
+                ORDER BY l.id
+                """)
+            converted = cursor.rowcount
+            conn.execute("DELETE FROM activity_log")
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('storage_format', ?)", (STORAGE_COMPACT,))
+        self.connection.execute("VACUUM")
+        self._window_ids = {}
+        self._set_storage(STORAGE_COMPACT)
+        return converted
+
+    def get_schema_version(self):
+        """
+        Gibt die Schema-Version der Datenbankdatei zurück.
+        """
+        return self.connection.execute("PRAGMA user_version").fetchone()[0]
+
+    def _migrate(self):
+        """
+        Bringt eine bestehende Datenbankdatei schrittweise auf die aktuelle Schema-Version.
+        """
+        with self.transaction() as conn:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+                migration(conn)
+                conn.execute(f"PRAGMA user_version = {number}")
 
     def add_log(self, window, start, end, duration, type, video=False, category_id=None):
         """
         Fügt einen neuen Log in die SQLite Datenbank hinzu.
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO activity_log (window, start, end, duration, type, video, category_id)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (window, str(start), str(end), duration, type, int(video), category_id))
-        conn.commit()
-        conn.close()
+        with self.transaction() as conn:
+            cursor = conn.execute(self._insert_sql(), self._encode_log(
+                window, start, end, duration, type, video, category_id))
+            self._update_rollups(conn, "id = ?", (cursor.lastrowid,))
 
-    def get_logs(self):
+    def open_log(self, window, start, type, video=False):
         """
-        Gibt alle Logs aus der SQLite Datenbank als Liste von Dictionaries zurück.
+        Legt ein offenes Segment (end = NULL) an und gibt seine rowid zurück.
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT window, start, end, duration, type, video, category_id FROM activity_log")
-        rows = cursor.fetchall()
-        conn.close()
+        cursor = self.connection.execute(self._insert_sql(), self._encode_log(
+            window, start, None, 0, type, video))
+        return cursor.lastrowid
 
-        logs = []
-        for row in rows:
-            logs.append({
-                'window': row[0],
-                'start': datetime.fromisoformat(row[1]),
-                'end': datetime.fromisoformat(row[2]) if row[2] and row[2] != 'None' else None,
-                'duration': row[3],
-                'type': row[4],
-                'video': bool(row[5]),
-                'category_id': row[6]
-            })
-        return logs
+    def checkpoint_logs(self, logs):
+        """
+        Schreibt die aktuelle Dauer offener Segmente über ihre rowid zurück.
+        """
+        rows = [(log['duration'], log['id']) for log in logs if log.get('id')]
+        if not rows:
+            return 0
+        with self.transaction() as conn:
+            conn.executemany(
+                f"UPDATE {self.log_table} SET duration = ? WHERE id = ?", rows)
+        return len(rows)
+
+    def close_logs(self, logs):
+        """
+        Schließt Segmente in einer Transaktion ab: Segmente mit rowid werden an Ort und Stelle
+        finalisiert, Segmente ohne rowid (z.B. fehlgeschlagenes open_log) neu eingefügt.
+        """
+        finalize = [(self.encode_time(log['end']), log['duration'], int(bool(log.get('video'))), log['id'])
+                    for log in logs if log.get('id')]
+        insert = [log for log in logs if not log.get('id')]
+        with self.transaction() as conn:
+            if finalize:
+                # Nur noch offene Zeilen abschließen, damit jedes Segment genau einmal in die Tagessummen eingeht
+                open_ids = [row[0] for row in conn.execute(
+                    f"SELECT id FROM {self.log_table} WHERE end IS NULL AND id IN (SELECT value FROM json_each(?))",
+                    (json.dumps([row[3] for row in finalize]),))]
+                # MAX: ein von classify_video schon gesetztes Flag bleibt stehen
+                conn.executemany(
+                    f"UPDATE {self.log_table} SET end = ?, duration = ?, video = MAX(video, ?) "
+                    "WHERE id = ? AND end IS NULL",
+                    finalize)
+                self._update_rollups(
+                    conn, "id IN (SELECT value FROM json_each(?))", (json.dumps(open_ids),))
+            self.add_logs(insert)
+        return len(finalize) + len(insert)
+
+    def close_open_logs(self):
+        """
+        Schließt Segmente, die nach einem Absturz offen geblieben sind, mit ihrer zuletzt
+        gespeicherten Dauer ab.
+        """
+        if self.storage == STORAGE_COMPACT:
+            end_expression = "start + CAST(ROUND(duration) AS INTEGER)"
+        else:
+            end_expression = "strftime('%Y-%m-%d %H:%M:%f', start, '+' || duration || ' seconds')"
+        with self.transaction() as conn:
+            ids = [row[0] for row in conn.execute(
+                f"SELECT id FROM {self.log_table} WHERE end IS NULL")]
+            if not ids:
+                return 0
+            conn.execute(f"""
+                UPDATE {self.log_table}
+                SET end = {end_expression}
+                WHERE end IS NULL
+                """)
+            self._update_rollups(
+                conn, "id IN (SELECT value FROM json_each(?))", (json.dumps(ids),))
+        return len(ids)
+
+    def add_logs(self, logs):
+        """
+        Fügt mehrere abgeschlossene Logs mit einem executemany in einer Transaktion hinzu.
+        """
+        if not logs:
+            return 0
+        with self.transaction() as conn:
+            last_id = conn.execute(
+                f"SELECT COALESCE(MAX(id), 0) FROM {self.log_table}").fetchone()[0]
+            rows = [self._encode_log(log['window'], log['start'], log['end'], log['duration'],
+                                     log['type'], log.get('video', False), log.get('category_id'))
+                    for log in logs]
+            conn.executemany(self._insert_sql(), rows)
+            self._update_rollups(conn, "id > ?", (last_id,))
+        return len(rows)
+
+    def _update_rollups(self, conn, condition, params):
+        """
+        Addiert die abgeschlossenen Logs, die condition erfüllen, zu den Tagessummen.
+        Muss innerhalb der Transaktion laufen, die die Logs schreibt.
+        """
+        for table, key, select in self._rollup_queries(condition):
+            conn.execute(_upsert_totals_sql(table, key, select), params)
+
+    def _rollup_queries(self, condition):
+        """
+        Gibt je Tagessummen-Tabelle (Tabelle, Schlüssel, SELECT der Summen) zurück.
+        """
+        return [
+            ("daily_window_totals", "window", f"""
+                SELECT {self.day_expression}, window, SUM(duration), COUNT(*)
+                FROM {self.log_source}
+                WHERE end IS NOT NULL AND window IS NOT NULL AND {condition}
+                GROUP BY 1, 2
+                """),
+            ("daily_category_totals", "category_id", f"""
+                SELECT {self.day_expression}, COALESCE(category_id, 0), SUM(duration), COUNT(*)
+                FROM {self.log_source}
+                WHERE end IS NOT NULL AND {condition}
+                GROUP BY 1, 2
+                """),
+        ]
+
+    def rebuild_rollups(self):
+        """
+        Baut die Tagessummen aus allen abgeschlossenen Logs neu auf (inkl. Monatspartitionen).
+        Komprimierte oder gelöschte Partitionen fehlen danach in den Summen.
+        """
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM daily_window_totals")
+            conn.execute("DELETE FROM daily_category_totals")
+            self._update_rollups(conn, "1 = 1", ())
+            with self._query_partitions() as partitions:
+                for partition in partitions:
+                    for table, key, select in partition._rollup_queries("1 = 1"):
+                        rows = partition.connection.execute(select).fetchall()
+                        conn.executemany(_upsert_totals_sql(
+                            table, key, "VALUES (?, ?, ?, ?)"), rows)
+            conn.execute("DELETE FROM meta WHERE key = 'rollups_stale'")
+        return self.connection.execute(
+            "SELECT COUNT(*) FROM daily_window_totals").fetchone()[0]
+
+    def get_window_totals(self, start=None, end=None):
+        """
+        Gibt die Gesamtdauer je Fenster aus den Tagessummen zurück, absteigend sortiert.
+        start/end sind Tage (date/datetime), end ist exklusiv.
+        """
+        return self._get_totals("daily_window_totals", "window", start, end)
+
+    def get_category_totals(self, start=None, end=None):
+        """
+        Gibt die Gesamtdauer je Kategorie aus den Tagessummen zurück (category_id None = ohne Kategorie).
+        """
+        totals = self._get_totals(
+            "daily_category_totals", "category_id", start, end)
+        for total in totals:
+            total['category_id'] = total['category_id'] or None
+        return totals
+
+    def _get_totals(self, table, key, start, end):
+        """
+        Summiert eine Tagessummen-Tabelle über den Zeitraum [start, end).
+        """
+        conditions = []
+        params = []
+        if start is not None:
+            conditions.append("day >= ?")
+            params.append(start.strftime("%Y-%m-%d"))
+        if end is not None:
+            conditions.append("day < ?")
+            params.append(end.strftime("%Y-%m-%d"))
+        where = " WHERE " + " AND ".join(conditions) if conditions else ""
+        cursor = self.connection.execute(f"""
+            SELECT {key}, SUM(duration), SUM(segments)
+            FROM {table}{where}
+            GROUP BY {key}
+            ORDER BY 2 DESC
+            """, params)
+        return [{key: row[0], 'duration': row[1], 'segments': row[2]} for row in cursor]
+
+    def get_logs(self, start=None, end=None, window=None, category_id=None, limit=None, after_id=None):
+        """
+        Gibt die Logs als Generator von Dictionaries zurück, aufsteigend nach id.
+        Die Filter werden in SQL ausgewertet: start/end grenzen den Beginn des Segments ein
+        (start <= Beginn < end), limit und after_id erlauben Keyset-Pagination.
+        Die Zeilen werden blockweise gelesen, der Speicherbedarf bleibt konstant.
+        """
+        conditions, params = self._log_filters(start, end, window, category_id)
+        return self._iter_logs(conditions, params, limit, after_id, start, end)
+
+    def get_logs_frame(self, start=None, end=None, window=None, category_id=None):
+        """
+        Gibt die Logs als pandas DataFrame mit festen dtypes zurück (gleiche Filter wie get_logs).
+        Die Zeitstempel werden spaltenweise statt pro Zeile in Python umgewandelt.
+        """
+        import pandas as pd
+
+        conditions, params = self._log_filters(start, end, window, category_id)
+        with self._query_partitions(start, end) as partitions:
+            frames = [partition._read_frame(conditions, params) for partition in partitions]
+        if not frames:
+            return self._read_frame(conditions, params)
+        frames.append(self._read_frame(conditions, params))
+        df = pd.concat(frames, ignore_index=True).sort_values('id', ignore_index=True)
+        df['window'] = df['window'].astype('category')
+        df['type'] = df['type'].astype('category')
+        return df
+
+    def _read_frame(self, conditions, params):
+        """
+        Liest die Logs dieser Datei als DataFrame (siehe get_logs_frame).
+        """
+        import pandas as pd
+
+        if self.storage == STORAGE_COMPACT:
+            # Lokale Uhrzeit als Epoch-Sekunden, damit pandas numerisch umwandeln kann
+            start_column = "CAST(strftime('%s', start, 'unixepoch', 'localtime') AS INTEGER) AS start"
+            end_column = "CAST(strftime('%s', end, 'unixepoch', 'localtime') AS INTEGER) AS end"
+        else:
+            start_column, end_column = "start", "end"
+        sql = f"""
+            SELECT id, window, {start_column}, {end_column}, duration, type, video, category_id
+            FROM {self.log_source}
+            """
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY id"
+
+        df = pd.read_sql_query(sql, self.connection, params=params, dtype={
+            'id': 'int64',
+            'duration': 'float64',
+            'video': 'Int8',
+            'category_id': 'Int64',
+        })
+        if self.storage == STORAGE_COMPACT:
+            df['start'] = pd.to_datetime(df['start'], unit='s')
+            df['end'] = pd.to_datetime(df['end'], unit='s')
+        else:
+            df['start'] = pd.to_datetime(df['start'], format='ISO8601')
+            df['end'] = pd.to_datetime(df['end'], format='ISO8601')
+        df['window'] = df['window'].astype('category')
+        df['type'] = df['type'].astype('category')
+        df['video'] = df['video'].fillna(0).astype(bool)
+        return df
+
+    def _log_filters(self, start=None, end=None, window=None, category_id=None):
+        """
+        Baut die WHERE-Bedingungen und Parameter für die Log-Abfragen.
+        """
+        conditions = []
+        params = []
+        if start is not None:
+            conditions.append("start >= ?")
+            params.append(self.encode_time(start))
+        if end is not None:
+            conditions.append("start < ?")
+            params.append(self.encode_time(end))
+        if window is not None:
+            conditions.append(self.window_match)
+            params.append(window)
+        if category_id is not None:
+            conditions.append("category_id = ?")
+            params.append(category_id)
+        return conditions, params
+
+    def has_logs(self):
+        """
+        Gibt zurück, ob mindestens ein Log gespeichert ist.
+        """
+        return next(self.get_logs(limit=1), None) is not None
+
+    def _iter_logs(self, conditions, params, limit=None, after_id=None, start=None, end=None):
+        """
+        Liefert die Logs der Hauptdatei und der betroffenen Monatspartitionen, nach id zusammengeführt.
+        start/end schränken die zu lesenden Partitionen ein.
+        """
+        months = self._partition_months(start, end, after_id)
+        if not months:
+            return self._iter_local(conditions, params, limit, after_id)
+        return self._iter_merged(months, conditions, params, limit, after_id)
+
+    def _iter_merged(self, months, conditions, params, limit, after_id):
+        """
+        Führt die Logs der Hauptdatei und der Partitionen nach id zusammen.
+        Die Partitionen bleiben nur geöffnet, solange der Generator läuft.
+        """
+        with self._open_partitions(months) as partitions:
+            sources = [partition._iter_local(list(conditions), list(params), limit, after_id)
+                       for partition in partitions]
+            sources.append(self._iter_local(conditions, params, limit, after_id))
+            merged = heapq.merge(*sources, key=itemgetter('id'))
+            try:
+                yield from (itertools.islice(merged, limit) if limit is not None else merged)
+            finally:
+                # Die Cursor vor den Verbindungen schließen
+                for source in sources:
+                    source.close()
+
+    def _iter_local(self, conditions, params, limit=None, after_id=None):
+        """
+        Führt die Log-Abfrage auf dieser Datei aus und liefert die Zeilen blockweise als Dictionaries.
+        """
+        if after_id is not None:
+            conditions.append("id > ?")
+            params.append(after_id)
+        sql = f"SELECT {LOG_COLUMNS} FROM {self.log_source}"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        cursor = self.connection.execute(sql, params)
+        try:
+            while True:
+                rows = cursor.fetchmany(FETCH_CHUNK_SIZE)
+                if not rows:
+                    break
+                for row in rows:
+                    yield {
+                        'id': row[0],
+                        'window': row[1],
+                        'start': parse_time(row[2]),
+                        'end': parse_time(row[3]) if row[3] else None,
+                        'duration': row[4],
+                        'type': row[5],
+                        'video': bool(row[6]),
+                        'category_id': row[7]
+                    }
+        finally:
+            cursor.close()
 
     def update_log_duration(self, window, duration):
         """
         Updated die Dauer eines Logs in der Datenbank.
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("""
-            UPDATE activity_log
+        self.connection.execute(f"""
+            UPDATE {self.log_table}
             SET duration = ?
-            WHERE window = ? AND end IS NULL
+            WHERE {self.window_match} AND end IS NULL
             """, (duration, window))
-        conn.commit()
-        conn.close()
 
     def delete_database(self):
         """
          Löscht die SQLite-Datenbankdatei.
          """
         if os.path.exists(self.db_path):
-            os.remove(self.db_path)
+            months = [row[0] for row in self.connection.execute(
+                "SELECT month FROM partitions")]
+            # Offene Verbindungen halten die Datei (unter Windows) gesperrt
+            self.close()
+            for month in months:
+                self._remove_partition_files(month)
+            self._remove_files(self.db_path)
+            self._window_ids = {}
             self._create_database()
+            self._init_storage(self.storage)
 
     def add_category(self, level, name, parent_id=None):
         """
-            Fügt eine neue Kategorie in die SQLite Datenbank hinzu.
+            Fügt eine neue Kategorie in die SQLite Datenbank hinzu und gibt ihre id zurück.
             """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("""
+        cursor = self.connection.execute("""
             INSERT INTO categories (level, name, parent_id)
             VALUES (?, ?, ?)
         """, (level, name, parent_id))
-        conn.commit()
-        conn.close()
+        return cursor.lastrowid
 
     def get_categories(self):
         """
             Gibt alle Kategorien aus der SQLite Datenbank als Liste von Dictionaries zurück.
             """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute(
+        cursor = self.connection.execute(
             "SELECT id, level, name, parent_id FROM categories")
         rows = cursor.fetchall()
-        conn.close()
 
         categories = []
         for row in rows:
@@ -135,64 +860,465 @@ class ActivityLog:
         """
             Updated eine Kategorie in der Datenbank.
             """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("""
+        self.connection.execute("""
             UPDATE categories
             SET name = ?, parent_id = ?
             WHERE id = ?
             """, (name, parent_id, category_id))
-        conn.commit()
-        conn.close()
 
     def delete_category(self, category_id):
         """
             Löscht eine Kategorie aus der Datenbank.
             """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("""
+        self.connection.execute("""
             DELETE FROM categories
             WHERE id = ?
             """, (category_id,))
-        conn.commit()
-        conn.close()
 
     def set_log_category(self, log_id, category_id):
         """
             Setzt die Kategorie für einen Logeintrag.
             """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("""
-            UPDATE activity_log
-            SET category_id = ?
-            WHERE id = ?
-            """, (category_id, log_id))
-        conn.commit()
-        conn.close()
+        self.set_log_categories([(log_id, category_id)])
 
-    def get_logs_without_category(self):
+    def set_log_categories(self, assignments):
+        """
+        Setzt die Kategorien mehrerer Logs ([(log_id, category_id)]) in einer Transaktion
+        und verschiebt die Tagessummen mit. Gibt die Anzahl der gefundenen Logs zurück.
         """
-            Gibt alle Logs ohne Kategorie aus der Datenbank zurück.
+        categories = dict(assignments)
+        if not categories:
+            return 0
+        remaining = dict(categories)
+        with self.transaction() as conn:
+            rows = self._update_categories_local(remaining)
+            for log_id, *_ in rows:
+                del remaining[log_id]
+            if remaining:
+                # Nicht in der Hauptdatei: die Logs liegen in Monatspartitionen.
+                # Die Partition wird zuerst committet; die Transaktionen sind nicht dateiübergreifend atomar.
+                with self._query_partitions(after_id=min(remaining) - 1) as partitions:
+                    for partition in partitions:
+                        with partition.transaction():
+                            found = partition._update_categories_local(remaining)
+                        for log_id, *_ in found:
+                            del remaining[log_id]
+                        rows.extend(found)
+                        if not remaining:
+                            break
+            # Abgeschlossene Logs sind schon in den Tagessummen: Dauer zur neuen Kategorie verschieben
+            deltas = {}
+            for log_id, day, duration, old_category, end in rows:
+                new_category = categories[log_id]
+                if end is None or old_category == (new_category or 0):
+                    continue
+                for key, sign in (((day, old_category), -1), ((day, new_category or 0), 1)):
+                    total = deltas.setdefault(key, [0.0, 0])
+                    total[0] += sign * duration
+                    total[1] += sign
+            if deltas:
+                conn.executemany(_upsert_totals_sql(
+                    "daily_category_totals", "category_id", "VALUES (?, ?, ?, ?)"),
+                    [(day, category, duration, segments)
+                     for (day, category), (duration, segments) in deltas.items()])
+        return len(rows)
+
+    def _update_categories_local(self, assignments):
+        """
+        Setzt die Kategorien der Logs aus assignments ({log_id: category_id}), die in dieser Datei
+        liegen, und gibt für sie (id, Tag, Dauer, alte Kategorie, Ende) zurück.
+        """
+        conn = self.connection
+        ids = list(assignments)
+        rows = []
+        # Unter SQLITE_MAX_VARIABLE_NUMBER älterer SQLite-Versionen (999) bleiben
+        for offset in range(0, len(ids), 500):
+            chunk = ids[offset:offset + 500]
+            rows.extend(conn.execute(f"""
+                SELECT id, {self.day_expression}, duration, COALESCE(category_id, 0), end
+                FROM {self.log_source}
+                WHERE id IN ({", ".join("?" * len(chunk))})
+                """, chunk).fetchall())
+        if rows:
+            conn.executemany(f"""
+                UPDATE {self.log_table}
+                SET category_id = ?
+                WHERE id = ?
+                """, [(assignments[row[0]], row[0]) for row in rows])
+        return rows
+
+    def get_logs_without_category(self, limit=None, after_id=None):
+        """
+            Gibt die Logs ohne Kategorie als Generator zurück (siehe get_logs).
             """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT id, window, start, end, duration, type, video FROM activity_log WHERE category_id IS NULL"
-        )
-        rows = cursor.fetchall()
-        conn.close()
+        return self._iter_logs(["category_id IS NULL"], [], limit, after_id)
 
-        logs = []
-        for row in rows:
-            logs.append({
-                'id': row[0],
-                'window': row[1],
-                'start': datetime.fromisoformat(row[2]),
-                'end': datetime.fromisoformat(row[3]) if row[3] and row[3] != 'None' else None,
-                'duration': row[4],
-                'type': row[5],
-                'video': bool(row[6])
-            })
-        return logs
+    def get_meta(self, key, default=None):
+        """
+        Gibt einen Wert aus der meta-Tabelle zurück.
+        """
+        row = self.connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key, value):
+        self.connection.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def classify_video(self, classify, chunk_size=5000, progress=None, full=False):
+        """
+        Setzt das video-Flag der gespeicherten Logs, deren Titel classify(titel) erkennt.
+        Bereits gesetzte Flags bleiben stehen (siehe _classify_video_local).
+        Die Wasserstandsmarke 'video_classified_id' in meta sorgt dafür, dass ein erneuter Lauf
+        nur neue Logs liest (full=True beginnt von vorn). Gelesen wird blockweise nach id,
+        geschrieben per executemany in einer Transaktion je Block, und nur geänderte Zeilen.
+        progress(rows) wird nach jedem Block aufgerufen. Gibt (gelesen, geändert) zurück.
+        """
+        watermark = 0 if full else int(self.get_meta('video_classified_id', 0))
+        total_rows = total_updated = 0
+        with self._query_partitions(after_id=watermark) as partitions:
+            for partition in partitions:
+                rows, updated, last_id = partition._classify_video_local(
+                    classify, watermark, chunk_size, lambda rows: progress and progress(total_rows + rows))
+                total_rows += rows
+                total_updated += updated
+                # Die Partition ist schon committet; bricht der Lauf danach ab, wird sie erneut (idempotent) gelesen
+                self.set_meta('video_classified_id', max(watermark, last_id))
+        rows, updated, _ = self._classify_video_local(
+            classify, watermark, chunk_size, lambda rows: progress and progress(total_rows + rows),
+            watermark_key='video_classified_id')
+        return total_rows + rows, total_updated + updated
+
+    def _classify_video_local(self, classify, after_id, chunk_size, progress=None, watermark_key=None):
+        """
+        Klassifiziert die Logs dieser Datei nach after_id (siehe classify_video).
+        Gibt (gelesen, geändert, letzte id) zurück.
+        """
+        last_id = after_id
+        rows = updated = 0
+        while True:
+            chunk = self.connection.execute(f"""
+                SELECT id, window, video FROM {self.log_source}
+                WHERE id > ?
+                ORDER BY id
+                LIMIT ?
+                """, (last_id, chunk_size)).fetchall()
+            if not chunk:
+                break
+            # Nur setzen, nie löschen: der Tracker kennt auch Prozess und Tonausgabe, der Titel allein nicht
+            changes = [(log_id,) for log_id, window, video in chunk
+                       if not video and window and classify(window)]
+            last_id = chunk[-1][0]
+            with self.transaction() as conn:
+                if changes:
+                    conn.executemany(f"UPDATE {self.log_table} SET video = 1 WHERE id = ?", changes)
+                if watermark_key:
+                    self.set_meta(watermark_key, last_id)
+            rows += len(chunk)
+            updated += len(changes)
+            if progress:
+                progress(rows)
+        return rows, updated, last_id
+
+    def _partition_path(self, month):
+        """
+        Gibt den Pfad der Partitionsdatei eines Monats zurück (neben der Hauptdatei).
+        """
+        base, ext = os.path.splitext(self.db_path)
+        return f"{base}-{month}{ext or '.db'}"
+
+    @contextmanager
+    def _open_partitions(self, months):
+        """
+        Öffnet die Partitionen der Monate für die Dauer des Blocks. Eine Partition, die danach
+        niemand mehr benutzt, wird geschlossen: offene Verbindungen anderer Instanzen würden
+        sonst das Komprimieren oder Löschen der Datei blockieren.
+        """
+        partitions = []
+        try:
+            for month in months:
+                partitions.append(self._get_partition(month))
+            yield partitions
+        finally:
+            for month, partition in zip(months, partitions):
+                self._put_partition(month, partition)
+
+    def _get_partition(self, month):
+        """
+        Gibt die ActivityLog-Instanz einer Monatspartition zurück und zählt den Benutzer mit
+        (freigeben mit _put_partition).
+        """
+        with self._partitions_lock:
+            entry = self._partitions.get(month)
+            if entry is None:
+                entry = self._partitions[month] = [
+                    ActivityLog(db_path=self._partition_path(month), storage=self.storage), 0]
+            entry[1] += 1
+            return entry[0]
+
+    def _put_partition(self, month, partition):
+        with self._partitions_lock:
+            entry = self._partitions.get(month)
+            # Bereits durch _release_partition geschlossen
+            if entry is None or entry[0] is not partition:
+                return
+            entry[1] -= 1
+            if entry[1] > 0:
+                return
+            del self._partitions[month]
+        partition.close()
+
+    def _release_partition(self, month):
+        with self._partitions_lock:
+            entry = self._partitions.pop(month, None)
+        if entry is not None:
+            entry[0].close()
+
+    def _query_partitions(self, start=None, end=None, after_id=None, containing_id=None):
+        """
+        Öffnet die lesbaren (nicht komprimierten) Partitionen, die zu den Filtern passen,
+        für die Dauer eines with-Blocks (siehe _open_partitions).
+        """
+        return self._open_partitions(self._partition_months(start, end, after_id, containing_id))
+
+    def _partition_months(self, start=None, end=None, after_id=None, containing_id=None):
+        """
+        Gibt die Monate der lesbaren Partitionen zurück, die zu den Filtern passen.
+        """
+        rows = self.connection.execute("""
+            SELECT month, min_id, max_id FROM partitions
+            WHERE compressed = 0 AND rows > 0
+            ORDER BY month
+            """).fetchall()
+        months = []
+        for month, min_id, max_id in rows:
+            if start is not None and month < month_of(start):
+                continue
+            if end is not None and month > month_of(end):
+                continue
+            if after_id is not None and max_id <= after_id:
+                continue
+            if containing_id is not None and not min_id <= containing_id <= max_id:
+                continue
+            months.append(month)
+        return months
+
+    def get_partitions(self):
+        """
+        Gibt den Katalog der Monatspartitionen als Liste von Dictionaries zurück.
+        """
+        cursor = self.connection.execute(
+            "SELECT month, path, min_id, max_id, rows, compressed FROM partitions ORDER BY month")
+        return [{'month': row[0], 'path': row[1], 'min_id': row[2], 'max_id': row[3],
+                 'rows': row[4], 'compressed': bool(row[5])} for row in cursor]
+
+    def seal_closed_months(self, current_month=None):
+        """
+        Verschiebt die abgeschlossenen Logs vergangener Monate in je eine Partitionsdatei
+        und verdichtet beide Dateien. Gibt die versiegelten Monate zurück.
+        """
+        current_month = current_month or month_of(datetime.now())
+        months = [row[0] for row in self.connection.execute(f"""
+            SELECT DISTINCT {self.month_expression} FROM {self.log_table}
+            WHERE end IS NOT NULL AND start < ?
+            """, (self.encode_time(datetime.strptime(current_month, "%Y-%m")),))]
+        columns = f"id, {self.window_column}, start, end, duration, type, video, category_id"
+        condition = f"end IS NOT NULL AND {self.month_expression} = ?"
+        conn = self.connection
+        for month in months:
+            # Ein bereits archivierter Monat wird vor dem Anhängen wieder entpackt
+            self.restore_partition(month)
+            path = self._partition_path(month)
+            # Das Öffnen legt die Datei mit dem Schema an
+            with self._open_partitions([month]) as (partition,):
+                conn.execute("ATTACH DATABASE ? AS partition", (path,))
+                try:
+                    with self.transaction():
+                        if self.storage == STORAGE_COMPACT:
+                            conn.execute(f"""
+                                INSERT OR IGNORE INTO partition.windows (id, title)
+                                SELECT id, title FROM main.windows
+                                WHERE id IN (SELECT window_id FROM main.{self.log_table} WHERE {condition})
+                                """, (month,))
+                        conn.execute(f"""
+                            INSERT OR IGNORE INTO partition.{self.log_table} ({columns})
+                            SELECT {columns} FROM main.{self.log_table} WHERE {condition}
+                            """, (month,))
+                        conn.execute(
+                            f"DELETE FROM main.{self.log_table} WHERE {condition}", (month,))
+                        min_id, max_id, rows = conn.execute(
+                            f"SELECT MIN(id), MAX(id), COUNT(*) FROM partition.{self.log_table}").fetchone()
+                        conn.execute("""
+                            INSERT OR REPLACE INTO main.partitions (month, path, min_id, max_id, rows, compressed)
+                            VALUES (?, ?, ?, ?, ?, 0)
+                            """, (month, os.path.basename(path), min_id, max_id, rows))
+                finally:
+                    conn.execute("DETACH DATABASE partition")
+                partition.connection.execute("VACUUM")
+            logging.info(f"Sealed month {month} into {path}.")
+        if months:
+            conn.execute("VACUUM")
+        return months
+
+    def compress_partition(self, month):
+        """
+        Komprimiert eine Partition als kaltes Archiv (.gz); sie wird danach nicht mehr abgefragt.
+        Ist die Datei noch in einem anderen Prozess geöffnet, wird sie übersprungen (False)
+        und beim nächsten Lauf erneut versucht.
+        """
+        self._release_partition(month)
+        path = self._partition_path(month)
+        if not os.path.exists(path):
+            return False
+        # Der Wechsel aus dem WAL-Modus braucht die Datei für sich allein
+        try:
+            conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+            try:
+                busy = conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()[0]
+                journal_mode = None if busy else conn.execute("PRAGMA journal_mode = DELETE").fetchone()[0]
+            finally:
+                conn.close()
+        except sqlite3.OperationalError as e:
+            logging.warning(f"Partition {month} is in use, skipping compression: {e}")
+            return False
+        if journal_mode != "delete":
+            logging.warning(f"Partition {month} is in use, skipping compression.")
+            return False
+        with open(path, "rb") as source, gzip.open(path + ".gz", "wb") as target:
+            shutil.copyfileobj(source, target)
+        try:
+            self._remove_files(path)
+        except OSError as e:
+            # Unter Windows lässt sich eine geöffnete Datei nicht löschen
+            logging.warning(f"Partition {month} is in use, skipping compression: {e}")
+            os.remove(path + ".gz")
+            return False
+        self.connection.execute(
+            "UPDATE partitions SET compressed = 1 WHERE month = ?", (month,))
+        return True
+
+    def restore_partition(self, month):
+        """
+        Entpackt ein komprimiertes Archiv, damit es wieder abgefragt wird.
+        """
+        path = self._partition_path(month)
+        if not os.path.exists(path + ".gz"):
+            return False
+        with gzip.open(path + ".gz", "rb") as source, open(path, "wb") as target:
+            shutil.copyfileobj(source, target)
+        os.remove(path + ".gz")
+        self.connection.execute(
+            "UPDATE partitions SET compressed = 0 WHERE month = ?", (month,))
+        return True
+
+    def drop_partition(self, month):
+        """
+        Löscht eine Partition samt Datei. Die Tagessummen für die Berichte bleiben erhalten.
+        Ist die Datei noch in einem anderen Prozess geöffnet, bleibt sie stehen (False).
+        """
+        try:
+            self._remove_partition_files(month)
+        except OSError as e:
+            logging.warning(f"Partition {month} is in use, skipping drop: {e}")
+            return False
+        self.connection.execute(
+            "DELETE FROM partitions WHERE month = ?", (month,))
+        return True
+
+    def _remove_partition_files(self, month):
+        self._release_partition(month)
+        path = self._partition_path(month)
+        self._remove_files(path)
+        if os.path.exists(path + ".gz"):
+            os.remove(path + ".gz")
+
+    @staticmethod
+    def _remove_files(path):
+        for file_path in (path, path + "-wal", path + "-shm"):
+            if os.path.exists(file_path):
+                os.remove(file_path)
+
+    def apply_retention(self, retention_months, action="archive", current_month=None):
+        """
+        Archiviert (komprimiert) bzw. löscht Partitionen, die älter als retention_months Monate sind.
+        0 bedeutet unbegrenzte Aufbewahrung. Noch geöffnete Partitionen werden übersprungen.
+        Gibt die betroffenen Monate zurück.
+        """
+        if retention_months <= 0:
+            return []
+        cutoff = add_months(current_month or month_of(datetime.now()), -retention_months)
+        affected = []
+        for partition in self.get_partitions():
+            if partition['month'] >= cutoff:
+                continue
+            if action == "drop":
+                if not self.drop_partition(partition['month']):
+                    continue
+            elif partition['compressed'] or not self.compress_partition(partition['month']):
+                continue
+            affected.append(partition['month'])
+            logging.info(f"Retention: {action} partition {partition['month']}.")
+        return affected
+
+    def maintain_partitions(self, retention_months=0, retention_action="archive"):
+        """
+        Versiegelt abgeschlossene Monate und wendet die Aufbewahrungsrichtlinie an.
+        """
+        sealed = self.seal_closed_months()
+        affected = self.apply_retention(retention_months, retention_action)
+        return sealed, affected
+
+
+class LogWriteBuffer:
+    """
+    Write-Behind-Puffer für abgeschlossene Logs. Die Logs werden gesammelt und
+    erst beim Erreichen der Größen- oder Altersgrenze in einem Commit abgeschlossen.
+    Mit einem SegmentJournal werden sie bis dahin absturzsicher im Journal gehalten.
+    """
+
+    def __init__(self, activity_log, max_size=50, max_age=60, journal=None):
+        self.activity_log = activity_log
+        self.max_size = max_size
+        self.max_age = max_age
+        self.journal = journal
+        self.pending = deque()
+        self.oldest = None
+
+    def __len__(self):
+        return len(self.pending)
+
+    def add(self, log):
+        """
+        Nimmt einen abgeschlossenen Log auf.
+        """
+        if not self.pending:
+            self.oldest = time.monotonic()
+        self.pending.append(log)
+        if self.journal is not None:
+            self.journal.append("close", log)
+
+    def is_due(self):
+        """
+        Gibt zurück, ob die Größen- oder Altersgrenze erreicht ist.
+        """
+        if not self.pending:
+            return False
+        if len(self.pending) >= self.max_size:
+            return True
+        return time.monotonic() - self.oldest >= self.max_age
+
+    def flush(self):
+        """
+        Schreibt alle gesammelten Logs in einer Transaktion in die Datenbank.
+        Bei einem Fehler bleiben die Logs im Puffer und werden später erneut geschrieben.
+        """
+        if not self.pending:
+            return 0
+        batch = list(self.pending)
+        count = self.activity_log.close_logs(batch)
+        for _ in batch:
+            self.pending.popleft()
+        self.oldest = time.monotonic() if self.pending else None
+        if self.journal is not None:
+            # Alles im Journal steht jetzt in der Datenbank (offene Segmente werden sofort eingefügt)
+            self.journal.reset()
+        return count
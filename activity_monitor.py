@@ -1,21 +1,102 @@
-from datetime import datetime
-from pynput import mouse, keyboard
+import time
+from datetime import datetime, timedelta
+from time import monotonic_ns
+
+NS_PER_SECOND = 1_000_000_000
+
+
+class RateRing:
+    """
+    Ereignisse pro Sekunde in einem Ringpuffer fester Größe. Jeder Ring wird nur von einem
+    Listener-Thread beschrieben; Leser bekommen eine Momentaufnahme.
+    """
+
+    def __init__(self, size=300):
+        self.size = size
+        self.counts = [0] * size
+        self.seconds = [-1] * size
+        # Die laufende Sekunde wird nur hochgezählt und erst beim Sekundenwechsel abgelegt
+        self.second = -1
+        self.second_end = 0
+        self.current = 0
+
+    def roll(self, now_ns):
+        if self.second >= 0:
+            slot = self.second % self.size
+            self.counts[slot] = self.current
+            self.seconds[slot] = self.second
+        self.second = now_ns // NS_PER_SECOND
+        self.second_end = (self.second + 1) * NS_PER_SECOND
+        self.current = 0
+
+    def add(self, now_ns):
+        if now_ns >= self.second_end:
+            self.roll(now_ns)
+        self.current += 1
+
+    def series(self, seconds, now_ns=None):
+        """
+        Gibt die Zählungen der letzten seconds Sekunden zurück, älteste zuerst.
+        """
+        current = (now_ns or time.monotonic_ns()) // NS_PER_SECOND
+        result = []
+        for second in range(current - min(seconds, self.size) + 1, current + 1):
+            slot = second % self.size
+            if second == self.second:
+                result.append(self.current)
+            else:
+                result.append(self.counts[slot] if self.seconds[slot] == second else 0)
+        return result
 
 
 class ActivityMonitor:
-    def __init__(self):
-        self.last_activity = datetime.now()
+    # Ab dieser Ruhezeit meldet die nächste Eingabe on_activity
+    WAKE_AFTER_NS = NS_PER_SECOND
+    # Mausbewegungen innerhalb dieses Abstands werden nur gezählt
+    MOVE_THROTTLE_NS = 50_000_000
+    RING_SECONDS = 300
+
+    def __init__(self, on_activity=None):
+        self.last_activity_ns = time.monotonic_ns()
+        self.last_move_ns = 0
+        self.on_activity = on_activity
+        self.keys = RateRing(self.RING_SECONDS)
+        self.clicks = RateRing(self.RING_SECONDS)
+        self.moves = RateRing(self.RING_SECONDS)
+
+    def record_activity(self, now_ns):
+        previous = self.last_activity_ns
+        self.last_activity_ns = now_ns
+        if now_ns - previous >= self.WAKE_AFTER_NS and self.on_activity is not None:
+            self.on_activity()
 
     def on_move(self, x, y):
-        self.last_activity = datetime.now()
+        # Heißer Pfad: bei einer Mausbewegung kommen hunderte Aufrufe pro Sekunde
+        now_ns = monotonic_ns()
+        moves = self.moves
+        if now_ns >= moves.second_end:
+            moves.roll(now_ns)
+        moves.current += 1
+        if now_ns - self.last_move_ns < self.MOVE_THROTTLE_NS:
+            return
+        self.last_move_ns = now_ns
+        self.record_activity(now_ns)
 
     def on_click(self, x, y, button, pressed):
-        self.last_activity = datetime.now()
+        now_ns = monotonic_ns()
+        if pressed:
+            self.clicks.add(now_ns)
+        self.record_activity(now_ns)
 
     def on_press(self, key):
-        self.last_activity = datetime.now()
+        now_ns = monotonic_ns()
+        self.keys.add(now_ns)
+        self.record_activity(now_ns)
 
     def start(self):
+        # Erst hier importieren: pynput braucht eine Desktop-Sitzung
+        from pynput import mouse, keyboard
+
         mouse_listener = mouse.Listener(
             on_move=self.on_move, on_click=self.on_click)
         keyboard_listener = keyboard.Listener(on_press=self.on_press)
@@ -23,5 +104,26 @@ class ActivityMonitor:
         keyboard_listener.start()
         return mouse_listener, keyboard_listener
 
+    def get_idle_seconds(self):
+        return (time.monotonic_ns() - self.last_activity_ns) / NS_PER_SECOND
+
     def get_last_activity_time(self):
-        return self.last_activity
+        return datetime.now() - timedelta(seconds=self.get_idle_seconds())
+
+    def get_rates(self, seconds=60):
+        """
+        Gibt die Anzahl der Tastendrücke, Klicks und Mausbewegungen der letzten seconds Sekunden zurück.
+        """
+        now_ns = time.monotonic_ns()
+        return {'keys': sum(self.keys.series(seconds, now_ns)),
+                'clicks': sum(self.clicks.series(seconds, now_ns)),
+                'moves': sum(self.moves.series(seconds, now_ns))}
+
+    def get_series(self, seconds=60):
+        """
+        Gibt die Zählungen pro Sekunde der letzten seconds Sekunden zurück, älteste zuerst.
+        """
+        now_ns = time.monotonic_ns()
+        return {'keys': self.keys.series(seconds, now_ns),
+                'clicks': self.clicks.series(seconds, now_ns),
+                'moves': self.moves.series(seconds, now_ns)}
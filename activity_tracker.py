@@ -1,17 +1,11 @@
 import logging
 from PyQt5.QtWidgets import QMainWindow, QPushButton, QLabel, QVBoxLayout, QWidget, QHBoxLayout, QMessageBox
 from PyQt5.QtGui import QFont, QIcon, QPixmap
-from PyQt5.QtCore import QTimer, Qt
-from activity_log import ActivityLog
-from activity_monitor import ActivityMonitor
-from video_detection import get_active_window_name
-from report_window import ReportWindow
-from real_time_window import RealTimeWindow
+from PyQt5.QtCore import QTimer, Qt, pyqtSignal
+from tracker_engine import TrackerEngine
 from settings_window import SettingsWindow
 from assign_category_window import AssignCategoryWindow
 import configparser
-import os
-from datetime import datetime
 import json
 
 CONFIG_FILE = "config.ini"
@@ -31,9 +25,14 @@ DEFAULT_CATEGORIES = {
 
 
 class ActivityTracker(QMainWindow):
-
-    
-    def __init__(self):
+    """
+    Hauptfenster. Das Tracking selbst läuft in der TrackerEngine; das Fenster treibt sie
+    über einen QTimer an und aktualisiert die Ansichten bei ihren Ereignissen.
+    """
+    # Ereignisse der Engine können aus einem Hintergrund-Thread kommen
+    engine_event = pyqtSignal(str, object)
+
+    def __init__(self, engine=None):
         super().__init__()
 
         self.config = self.load_config()
@@ -49,38 +48,47 @@ class ActivityTracker(QMainWindow):
         self.setGeometry(100, 100, 600, 400)
         self.setStyleSheet("background-color: #2e3440; color: #eceff4;")
 
-        self.active_window = None
-        self.start_time = None
-
-        # Load Configuration
-
-        self.config = self.load_config()
-
-        self.activity_log = ActivityLog(
-            db_path=self.config["database"]["database_path"])
-
-        self.last_active_window = None  # Added
-        self.last_active_time = None  # Added
-        self.transition_period = 1  # 1 second transition period
-        self.current_logs = []
-        self.pause_duration = int(self.config["pause"]["inactivity_time"])
-        self.is_paused = False
-        self.pause_start_time = None
         self.auto_start = self.config["startup"].getboolean("auto_start")
         self.pause_notification = self.config["notifications"].getboolean(
             "pause_notification")
-        self.database_upload_interval = int(
-            self.config["database"]["upload_interval"])
 
-        self.activity_monitor = ActivityMonitor()
-        self.mouse_listener, self.keyboard_listener = self.activity_monitor.start()
+        self.engine = engine or TrackerEngine(self.config)
+        self.engine_event.connect(self.on_engine_event)
+        self.engine.subscribe(self.engine_event.emit)
+        self.engine.start()
 
         self.initUI()
-        self.track_time()
-        self.start_database_update_timer()  # Timer zum DB updaten
+        # Einzige Taktquelle: ein Single-Shot-Timer, den jeder Tick mit der nächsten Frist neu startet
+        self.update_timer = QTimer(self)
+        self.update_timer.setSingleShot(True)
+        self.update_timer.timeout.connect(self.run_tick)
+        self.update_timer.start(0)
         self.assign_category_window = None
         self.settings_window = None
 
+    @property
+    def activity_log(self):
+        return self.engine.activity_log
+
+    @property
+    def current_logs(self):
+        return self.engine.current_logs
+
+    def run_tick(self):
+        delay = self.engine.tick()
+        self.update_timer.start(int(delay * 1000))
+
+    def on_engine_event(self, event, data):
+        """
+            Reagiert im GUI-Thread auf Ereignisse der Engine.
+            """
+        if event == "wake":
+            # start() auf dem laufenden Timer setzt ihn nur neu, es entsteht kein zweiter Takt
+            self.update_timer.start(0)
+        elif event in ("tick", "window_changed", "flushed"):
+            with self.engine.metrics.measure("gui.update_table"):
+                self.update_activity_log_table()
+
     def load_categories_from_json(self):
         """
             Lädt die Kategorien aus der JSON-Datei.
@@ -168,17 +176,10 @@ class ActivityTracker(QMainWindow):
         with open(CONFIG_FILE, "w") as configfile:
             self.config.write(configfile)
 
-        self.pause_duration = int(self.config["pause"]["inactivity_time"])
         self.auto_start = self.config["startup"].getboolean("auto_start")
         self.pause_notification = self.config["notifications"].getboolean(
             "pause_notification")
-        self.database_upload_interval = int(
-            self.config["database"]["upload_interval"])
-
-        self.activity_log = ActivityLog(
-            db_path=self.config["database"]["database_path"])
-
-        self.start_database_update_timer()
+        self.engine.update_config(self.config)
         logging.info("Configuration updated.")
 
     def show_settings_window(self):
@@ -204,159 +205,22 @@ class ActivityTracker(QMainWindow):
         Löscht die SQLite Datenbank und aktualisiert die Log Tabelle
          """
         try:
-            self.activity_log.delete_database()
-            self.current_logs = []
+            self.engine.delete_database()
             self.update_activity_log_table()
             logging.info("Database deleted and UI updated")
         except Exception as e:
             logging.error(f"Error deleting database: {e}")
 
-    def track_time(self):
-        try:
-            window_info = get_active_window_name()
-            self.active_window = window_info
-            self.start_time = datetime.now()
-            if self.active_window != "Kein aktives Fenster":
-                self.current_logs.append(
-                    {'window': self.active_window, 'start': self.start_time, 'end': None, 'duration': 0, 'type': "activity"})
-            logging.info(f"Started tracking window: {self.active_window}")
-
-            self.update_timer = QTimer(self)
-            self.update_timer.timeout.connect(self.update_time)
-            self.update_timer.start(1000)
-        except Exception as e:
-            logging.error(f"Error during track_time: {e}")
-
-    def update_time(self):
-        try:
-            if self.is_paused:
-                if self.check_for_activity():
-                    self.end_pause()
-                    self.track_time()
-            else:
-                if self.check_for_pause():
-                    self.start_pause()
-                else:
-                    window_info = get_active_window_name()
-                    new_window = window_info
-
-                    if new_window != self.active_window:
-                        # Beende die aktuelle Activity aufgrund eines Fensterwechsels
-                        self.end_activity(reason="window_change")
-                        self.active_window = new_window
-                        self.start_time = datetime.now()
-
-                        # Startet nur ein task, wenn auch ein fenster aktiv ist
-                        if self.active_window != "Kein aktives Fenster":
-                            self.current_logs.append(
-                                {'window': self.active_window, 'start': self.start_time, 'end': None, 'duration': 0, 'type': "activity"})
-                        logging.info(
-                            f"Window changed to: {self.active_window}")
-
-                    if self.active_window != "Kein aktives Fenster" and self.start_time:
-                        duration = (datetime.now() -
-                                    self.start_time).total_seconds()
-                        for log in self.current_logs:
-                            if log['window'] == self.active_window and log['end'] is None:
-                                log['duration'] = duration
-                                self.activity_log.update_log_duration(
-                                    log['window'], log['duration'])  # Hier wird die duration in der datenbank geupdatet
-                                break
-            self.update_activity_log_table()
-        except Exception as e:
-            logging.error(f"Error during update_time: {e}")
-
-    def check_for_pause(self):
-        last_activity_time = self.activity_monitor.get_last_activity_time()
-        if (datetime.now() - last_activity_time).total_seconds() >= self.pause_duration:
-            return True
-        return False
-
-    def start_pause(self):
-        self.end_activity(reason="pause_start")
-        self.is_paused = True
-        self.pause_start_time = datetime.now()
-        logging.info("Pause started.")
-        self.current_logs.append(
-            {'window': 'Pause', 'start': self.pause_start_time, 'end': None, 'duration': 0, 'type': "pause"})
-
-    def check_for_activity(self):
-        last_activity_time = self.activity_monitor.get_last_activity_time()
-        if (datetime.now() - last_activity_time).total_seconds() < self.pause_duration:
-            return True
-        return False
-
-    def end_pause(self):
-        self.is_paused = False
-        pause_end_time = datetime.now()
-        current_pause_log = None
-        for log in reversed(self.current_logs):
-            if log['window'] == "Pause" and log['end'] is None:
-                current_pause_log = log
-                break
-        if current_pause_log:
-            current_pause_log['end'] = pause_end_time
-            current_pause_log['duration'] = (
-                pause_end_time - current_pause_log['start']).total_seconds()
-        logging.info("Pause ended.")
-
-    def start_database_update_timer(self):
-        self.database_timer = QTimer(self)
-        self.database_timer.timeout.connect(self.update_database)
-        self.database_timer.start(
-            self.database_upload_interval * 1000)  # Alle x Sekunden
-        logging.info("Database update timer started.")
-
-    def update_database(self):
-        try:
-            logs_to_add = []
-            for log in self.current_logs:
-                if log['end'] is None:
-                    self.activity_log.update_log_duration(
-                        log['window'], log['duration'])
-                else:
-                    logs_to_add.append(log)
-            for log in logs_to_add:
-                self.activity_log.add_log(
-                    log['window'], log['start'], log['end'], log['duration'], log['type'])
-                self.current_logs.remove(log)
-            logging.info("Database updated.")
-        except Exception as e:
-            logging.error(f"Error during database update: {e}")
-
-    def end_activity(self, reason=""):
-        end_time = datetime.now()
-        try:
-            # Finde den Aktuellen Log
-            current_log = None
-            for log in reversed(self.current_logs):
-                if log['window'] == self.active_window and log['end'] is None:
-                    current_log = log
-                    break
-
-            if current_log:
-                current_log['end'] = end_time
-                current_log['duration'] = (
-                    current_log['end'] - current_log['start']).total_seconds()
-
-            if reason == "window_change" and current_log and current_log["window"] != "Kein aktives Fenster":
-                self.last_active_window = current_log["window"]
-                self.last_active_time = end_time
-            self.active_window = None
-            self.start_time = None
-            logging.info(f"Activity ended. Reason: {reason}")
-
-        except Exception as e:
-            logging.error(f"Error during end_activity: {e}")
-
     def show_report_window(self):
         try:
-            if not self.activity_log.get_logs():
+            if not self.activity_log.has_logs():
                 QMessageBox.warning(self, "Log & Report",
                                     "No activity to report.")
                 return
 
-            report_window = ReportWindow(self.activity_log.get_logs())
+            # Erst hier importieren: pandas und matplotlib kosten beim Start Sekunden
+            from report_window import ReportWindow
+            report_window = ReportWindow(self.activity_log)
             report_window.exec_()
             logging.info("Report window opened.")
         except Exception as e:
@@ -364,6 +228,7 @@ class ActivityTracker(QMainWindow):
 
     def show_realtime_window(self):
         try:
+            from real_time_window import RealTimeWindow
             self.realtime_window = RealTimeWindow(self)
             self.realtime_window.show()
             logging.info("Real-time window opened.")
@@ -379,9 +244,8 @@ class ActivityTracker(QMainWindow):
 
     def closeEvent(self, event):
         try:
-            self.mouse_listener.stop()
-            self.keyboard_listener.stop()
-            self.update_database()  # Speichern wenn das Fenster geschlossen wird
+            self.update_timer.stop()
+            self.engine.stop()
             logging.info("Application closed.")
             event.accept()
         except Exception as e:
@@ -1,8 +1,11 @@
-from PyQt5.QtWidgets import QDialog, QVBoxLayout, QComboBox, QMenu, QAction, QDialogButtonBox, QLabel, QTableWidget, QHeaderView, QTableWidgetItem, QTreeWidget, QTreeWidgetItem
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QComboBox, QMenu, QAction, QDialogButtonBox, QLabel, QTableWidget, QHeaderView, QTableWidgetItem, QTreeWidget, QTreeWidgetItem, QPushButton
 from PyQt5.QtCore import Qt
 from hierarchical_combobox import HierarchicalComboBox
 import logging
 
+# Anzahl der (eindeutigen) Einträge, die pro Seite angezeigt werden
+PAGE_SIZE = 100
+
 
 class AssignCategoryWindow(QDialog):
     def __init__(self, parent, tracker):
@@ -12,6 +15,8 @@ class AssignCategoryWindow(QDialog):
         self.setStyleSheet("background-color: #3b4252; color: #eceff4;")
         self.tracker = tracker
         self.activity_log = tracker.activity_log
+        self.seen_windows = set()
+        self.last_log_id = None
         self.initUI()
 
     def initUI(self):
@@ -31,27 +36,53 @@ class AssignCategoryWindow(QDialog):
         self.activities_table.itemDoubleClicked.connect(self.assign_category)
         layout.addWidget(self.activities_table)
 
+        self.load_more_button = QPushButton("Load More")
+        self.load_more_button.clicked.connect(self.load_more_activities)
+        layout.addWidget(self.load_more_button)
+
         self.load_activities()
         self.setLayout(layout)
 
     def load_activities(self):
-        try:
-            self.activities_table.clearContents()
-            self.activities_table.setRowCount(0)
-
-            filter_text = self.filter_combo.currentText()
+        self.activities_table.clearContents()
+        self.activities_table.setRowCount(0)
+        self.seen_windows = set()
+        self.last_log_id = None
+        self.load_more_activities()
+
+    def fetch_unique_logs(self, filter_text):
+        """
+            Holt per Keyset-Pagination die nächsten Logs mit noch nicht angezeigtem Fenster.
+            """
+        unique_logs = []
+        exhausted = False
+        while len(unique_logs) < PAGE_SIZE and not exhausted:
             if filter_text == "Without Category":
-                logs = self.activity_log.get_logs_without_category()
+                logs = list(self.activity_log.get_logs_without_category(
+                    limit=PAGE_SIZE, after_id=self.last_log_id))
             else:
-                logs = self.activity_log.get_logs()
-
-            unique_logs = {}
+                logs = list(self.activity_log.get_logs(
+                    limit=PAGE_SIZE, after_id=self.last_log_id))
             for log in logs:
-                if log['window'] not in unique_logs:
-                    unique_logs[log['window']] = log
+                self.last_log_id = log['id']
+                if log['window'] not in self.seen_windows:
+                    self.seen_windows.add(log['window'])
+                    unique_logs.append(log)
+                    if len(unique_logs) == PAGE_SIZE:
+                        break
+            # Erschöpft, wenn die letzte Seite unvollständig war und komplett verarbeitet wurde
+            exhausted = len(logs) < PAGE_SIZE and (
+                not logs or self.last_log_id == logs[-1]['id'])
+        return unique_logs, exhausted
+
+    def load_more_activities(self):
+        try:
+            filter_text = self.filter_combo.currentText()
+            unique_logs, exhausted = self.fetch_unique_logs(filter_text)
+            self.load_more_button.setEnabled(not exhausted)
 
-            row_count = 0
-            for log in unique_logs.values():
+            row_count = self.activities_table.rowCount()
+            for log in unique_logs:
                 if filter_text == "Level 1" or filter_text == "Level 2" or filter_text == "Level 3":
                     level = int(filter_text.split(" ")[1])
                     if log.get('category_id'):
@@ -76,7 +107,7 @@ class AssignCategoryWindow(QDialog):
                 row_count += 1
         except Exception as e:
             logging.error(
-                f"Error in AssignCategoryWindow.load_activities: {e}")
+                f"Error in AssignCategoryWindow.load_more_activities: {e}")
 
     def assign_category(self, item):
         if item.column() != 0:
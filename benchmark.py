@@ -0,0 +1,828 @@
+import argparse
+import configparser
+import os
+import random
+import re
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from activity_log import ActivityLog, LogWriteBuffer
+from activity_monitor import ActivityMonitor
+from category_rules import CategoryRule, RuleMatcher
+from metrics import Metrics
+from process_cache import ForegroundSampler, ProcessCache
+from video_matcher import DEFAULT_BROWSER_PATTERNS, DEFAULT_PLAYER_PATTERNS, DEFAULT_URL_PATTERNS, VideoMatcher
+from segment import Segment
+
+
+def print_result(name, calls, seconds):
+    """
+        Gibt das Ergebnis eines Benchmarks einheitlich aus.
+        """
+    per_call_us = seconds / calls * 1_000_000 if calls else 0.0
+    print(f"{name:<40} {calls:>9} calls  {seconds:8.3f} s  {per_call_us:10.1f} µs/call")
+
+
+def legacy_update_log_duration(db_path, window, duration):
+    """
+        Der frühere Ablauf von update_log_duration: connect, UPDATE, commit, close.
+        """
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute("""
+        UPDATE activity_log
+        SET duration = ?
+        WHERE window = ? AND end IS NULL
+        """, (duration, window))
+    conn.commit()
+    conn.close()
+
+
+def benchmark_db(args):
+    """
+        Vergleicht die Latenz pro Aufruf von update_log_duration:
+        neue Verbindung pro Aufruf gegen langlebige WAL-Verbindung.
+        """
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        activity_log = ActivityLog(db_path=db_path)
+        activity_log.connection.execute("""
+            INSERT INTO activity_log (window, start, end, duration, type, video, category_id)
+            VALUES (?, ?, NULL, 0, 'activity', 0, NULL)
+            """, ("Benchmark Window", str(datetime.now())))
+
+        # Vorher: jede Aktualisierung öffnet eine eigene Verbindung (Rollback-Journal, FULL sync)
+        legacy_path = os.path.join(tmp, "legacy.db")
+        conn = sqlite3.connect(legacy_path)
+        conn.execute("""
+            CREATE TABLE activity_log (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, window TEXT, start TEXT, end TEXT,
+                duration REAL, type TEXT, video INTEGER, category_id INTEGER)
+            """)
+        conn.execute(
+            "INSERT INTO activity_log (window, start, end, duration, type) VALUES (?, ?, NULL, 0, 'activity')",
+            ("Benchmark Window", str(datetime.now())))
+        conn.commit()
+        conn.close()
+
+        started = time.perf_counter()
+        for i in range(args.calls):
+            legacy_update_log_duration(legacy_path, "Benchmark Window", i)
+        print_result("update_log_duration (connect per call)",
+                     args.calls, time.perf_counter() - started)
+
+        started = time.perf_counter()
+        for i in range(args.calls):
+            activity_log.update_log_duration("Benchmark Window", i)
+        print_result("update_log_duration (persistent WAL)",
+                     args.calls, time.perf_counter() - started)
+        activity_log.close()
+
+
+def make_segments(count, start=None):
+    """
+        Erzeugt abgeschlossene Segmente wie bei einem schnellen Alt-Tab-Wechsel.
+        """
+    start = start or datetime(2024, 1, 1, 9, 0, 0)
+    segments = []
+    for i in range(count):
+        begin = start + timedelta(seconds=i)
+        segments.append({'window': f"Window {i % 7}", 'start': begin,
+                         'end': begin + timedelta(seconds=1), 'duration': 1.0,
+                         'type': "activity"})
+    return segments
+
+
+def benchmark_flush(args):
+    """
+        Vergleicht das Schreiben abgeschlossener Segmente: ein Commit pro Segment
+        gegen einen gebündelten Flush über den Write-Behind-Puffer.
+        """
+    segments = make_segments(args.segments)
+    with tempfile.TemporaryDirectory() as tmp:
+        activity_log = ActivityLog(db_path=os.path.join(tmp, "single.db"))
+        started = time.perf_counter()
+        for log in segments:
+            activity_log.add_log(
+                log['window'], log['start'], log['end'], log['duration'], log['type'])
+        print_result("add_log (one commit per segment)",
+                     len(segments), time.perf_counter() - started)
+        activity_log.close()
+
+        activity_log = ActivityLog(db_path=os.path.join(tmp, "buffered.db"))
+        write_buffer = LogWriteBuffer(activity_log, max_size=args.batch_size)
+        flushes = 0
+        started = time.perf_counter()
+        for log in segments:
+            write_buffer.add(log)
+            if write_buffer.is_due():
+                write_buffer.flush()
+                flushes += 1
+        if write_buffer.flush():
+            flushes += 1
+        print_result(f"LogWriteBuffer ({flushes} commits)",
+                     len(segments), time.perf_counter() - started)
+        activity_log.close()
+
+
+SAMPLE_TITLES = [
+    "Inbox (3) - jane.doe@example.com - Mail",
+    "activity_log.py - automatic-time-tracker-windows - Visual Studio Code",
+    "Pull requests · jurin1/automatic-time-tracker-windows - Google Chrome",
+    "Quarterly planning.xlsx - Excel",
+    "Daily standup | Microsoft Teams",
+    "Stack Overflow - Where Developers Learn, Share, & Build Careers - Google Chrome",
+    "YouTube - Lo-fi beats to relax/study to - Google Chrome",
+    "Windows PowerShell",
+]
+
+
+def make_month(days=30, seed=1):
+    """
+        Erzeugt einen synthetischen Monat: 8 Stunden pro Tag, Segmente von 5 bis 120 Sekunden
+        über einige hundert verschiedene Fenstertitel.
+        """
+    rng = random.Random(seed)
+    titles = [f"{title} [{i}]" for i in range(40) for title in SAMPLE_TITLES]
+    segments = []
+    for day in range(days):
+        current = datetime(2024, 1, 1, 9, 0, 0) + timedelta(days=day)
+        day_end = current + timedelta(hours=8)
+        while current < day_end:
+            duration = rng.uniform(5, 120)
+            end = current + timedelta(seconds=duration)
+            is_pause = rng.random() < 0.05
+            segments.append({'window': "Pause" if is_pause else rng.choice(titles),
+                             'start': current, 'end': end, 'duration': duration,
+                             'type': "pause" if is_pause else "activity"})
+            current = end
+    return segments
+
+
+def benchmark_storage(args):
+    """
+        Vergleicht Dateigröße und Lesegeschwindigkeit von Text- und kompaktem Format.
+        """
+    segments = make_month(args.days)
+    print(f"{len(segments)} synthetic segments over {args.days} days")
+    with tempfile.TemporaryDirectory() as tmp:
+        for storage in ("text", "compact"):
+            db_path = os.path.join(tmp, f"{storage}.db")
+            activity_log = ActivityLog(db_path=db_path, storage=storage)
+            activity_log.add_logs(segments)
+            activity_log.connection.execute("VACUUM")
+            activity_log.connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            size = os.path.getsize(db_path)
+
+            started = time.perf_counter()
+            count = sum(1 for _ in activity_log.get_logs())
+            seconds = time.perf_counter() - started
+            print_result(f"get_logs ({storage}, {size / 1024:.0f} KiB, "
+                         f"{size / len(segments):.0f} B/row)", count, seconds)
+            activity_log.close()
+
+
+def benchmark_frame(args):
+    """
+        Vergleicht pd.DataFrame(list(get_logs())) mit get_logs_frame() auf synthetischen Zeilen.
+        """
+    import pandas as pd
+
+    days = max(1, args.rows // 460)
+    segments = make_month(days)[:args.rows]
+    with tempfile.TemporaryDirectory() as tmp:
+        activity_log = ActivityLog(db_path=os.path.join(tmp, "frame.db"), storage=args.storage)
+        activity_log.add_logs(segments)
+        print(f"{len(segments)} rows ({args.storage})")
+
+        started = time.perf_counter()
+        df = pd.DataFrame(list(activity_log.get_logs()))
+        print_result("pd.DataFrame(list(get_logs()))", len(df), time.perf_counter() - started)
+        del df
+
+        started = time.perf_counter()
+        df = activity_log.get_logs_frame()
+        print_result("get_logs_frame()", len(df), time.perf_counter() - started)
+        activity_log.close()
+
+
+def measure_memory(factory, count):
+    """
+        Gibt den Speicherbedarf in Bytes für count von factory erzeugte Objekte zurück.
+        """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [factory(i) for i in range(count)]
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del objects
+    return size
+
+
+def benchmark_segments(args):
+    """
+        Vergleicht Speicherbedarf und Kosten pro Tick: Dictionaries mit linearer Suche
+        gegen Segment-Objekte mit direktem Handle auf das offene Segment.
+        """
+    start = datetime(2024, 1, 1, 9, 0, 0)
+    dict_size = measure_memory(lambda i: {'id': i, 'window': "Window", 'start': start, 'end': start,
+                                          'duration': 1.0, 'type': "activity"}, args.pending)
+    slot_size = measure_memory(lambda i: Segment("Window", start, "activity", id=i, end=start,
+                                                 duration=1.0), args.pending)
+    print(f"{args.pending} pending segments: dict {dict_size / args.pending:.0f} B, "
+          f"Segment {slot_size / args.pending:.0f} B per segment")
+
+    for pending in (10, args.pending):
+        logs = [{'window': f"Window {i % 7}", 'start': start, 'end': start, 'duration': 1.0}
+                for i in range(pending)]
+        logs.append({'window': "Current", 'start': start, 'end': None, 'duration': 0})
+        started = time.perf_counter()
+        for tick in range(args.ticks):
+            # Bisher: lineare Suche nach dem offenen Eintrag des aktiven Fensters
+            for log in logs:
+                if log['window'] == "Current" and log['end'] is None:
+                    log['duration'] = tick
+                    break
+        print_result(f"tick, linear scan ({pending} pending)",
+                     args.ticks, time.perf_counter() - started)
+
+        current = Segment("Current", start, "activity")
+        started = time.perf_counter()
+        for tick in range(args.ticks):
+            current.duration = tick
+        print_result(f"tick, segment handle ({pending} pending)",
+                     args.ticks, time.perf_counter() - started)
+
+
+class LegacyActivityMonitor:
+    """
+        Der frühere ActivityMonitor: datetime.now() bei jedem Ereignis.
+        """
+
+    def __init__(self):
+        self.last_activity = datetime.now()
+
+    def on_move(self, x, y):
+        self.last_activity = datetime.now()
+
+    def on_press(self, key):
+        self.last_activity = datetime.now()
+
+
+def benchmark_input(args):
+    """
+        Simuliert eine Flut von Eingabeereignissen und misst die Kosten pro Callback.
+        """
+    for name, monitor in (("legacy", LegacyActivityMonitor()), ("monotonic + throttle", ActivityMonitor())):
+        started = time.perf_counter()
+        for i in range(args.events):
+            monitor.on_move(i, i)
+        print_result(f"on_move ({name})", args.events, time.perf_counter() - started)
+
+        started = time.perf_counter()
+        for i in range(args.events):
+            monitor.on_press(i)
+        print_result(f"on_press ({name})", args.events, time.perf_counter() - started)
+
+
+def benchmark_metrics(args):
+    """
+        Kosten einer gemessenen Phase: ohne Messung, mit abgeschalteter und mit aktiver Messung.
+        """
+    started = time.perf_counter()
+    for i in range(args.calls):
+        pass
+    print_result("bare loop", args.calls, time.perf_counter() - started)
+    for name, metrics in (("disabled", Metrics(enabled=False)), ("enabled", Metrics(enabled=True))):
+        started = time.perf_counter()
+        for i in range(args.calls):
+            with metrics.measure("phase"):
+                pass
+        print_result(f"measure() ({name})", args.calls, time.perf_counter() - started)
+
+
+def spin(microseconds):
+    """
+        Wartet aktiv, um die Kosten eines Systemaufrufs nachzustellen.
+        """
+    until = time.perf_counter() + microseconds / 1e6
+    while time.perf_counter() < until:
+        pass
+
+
+class FakeProcessTable:
+    """
+        Prozesstabelle für den Benchmark: pid -> Startzeit, mit nachgestellten Kosten
+        für name() und exe() und Zählern der Aufrufe.
+        """
+
+    def __init__(self, processes, syscall_us):
+        self.create_times = {pid: 1000.0 + pid for pid in range(processes)}
+        self.syscall_us = syscall_us
+        self.calls = 0
+
+    def reuse_pid(self, pid):
+        self.create_times[pid] += 1_000_000
+
+    def process(self, pid):
+        table = self
+
+        class FakeProcess:
+            def create_time(self):
+                return table.create_times[pid]
+
+            def name(self):
+                table.calls += 1
+                spin(table.syscall_us)
+                return f"app{pid}.exe"
+
+            def exe(self):
+                table.calls += 1
+                spin(table.syscall_us)
+                return f"C:\\Programs\\app{pid}.exe@{table.create_times[pid]:.0f}"
+
+        return FakeProcess()
+
+
+def benchmark_process_cache(args):
+    """
+        Simuliert Ticks über einer festen Fensterfolge: ohne Cache (neue Abfrage je Tick)
+        gegen ForegroundSampler mit ProcessCache. Prüft außerdem die Wiederverwendung einer pid.
+        """
+    rng = random.Random(1)
+    # Wenige Wechsel: meist bleibt das Fenster über mehrere Ticks im Vordergrund
+    windows = []
+    hwnd = 1
+    for tick in range(args.ticks):
+        if rng.random() < args.switch_rate:
+            hwnd = rng.randrange(1, args.windows + 1)
+        windows.append(hwnd)
+    pid_of = {hwnd: hwnd % args.processes for hwnd in range(1, args.windows + 1)}
+
+    table = FakeProcessTable(args.processes, args.syscall_us)
+    started = time.perf_counter()
+    for hwnd in windows:
+        process = table.process(pid_of[hwnd])
+        process.create_time()
+        {'title': f"Window {hwnd}", 'process_name': process.name(), 'executable_path': process.exe()}
+    print_result("tick, uncached", args.ticks, time.perf_counter() - started)
+    print(f"    name()/exe() calls: {table.calls}")
+
+    table = FakeProcessTable(args.processes, args.syscall_us)
+    current = iter(windows)
+    state = {}
+    sampler = ForegroundSampler(
+        lambda: state.setdefault('hwnd', next(current)),
+        lambda hwnd: f"Window {hwnd}",
+        lambda hwnd: pid_of[hwnd],
+        ProcessCache(max_size=args.cache_size, process_factory=table.process))
+    started = time.perf_counter()
+    for tick in range(args.ticks):
+        state.clear()
+        sampler.sample()
+    print_result("tick, sampler + cache", args.ticks, time.perf_counter() - started)
+    print(f"    name()/exe() calls: {table.calls}, {sampler.stats()}")
+
+    # pid-Wiederverwendung: gleiche pid, neue Startzeit -> neuer Eintrag
+    cache = ProcessCache(process_factory=table.process)
+    before = cache.get(0).exe
+    table.reuse_pid(0)
+    after = cache.get(0).exe
+    print(f"pid reuse detected: {before != after} ({before} -> {after})")
+
+
+# (Prozess, Fenstertitel) wie sie im Alltag vorkommen
+TITLE_CORPUS = [
+    ("chrome.exe", "(3) Inbox - someone@example.com - Gmail - Google Chrome"),
+    ("chrome.exe", "Never Gonna Give You Up - YouTube - https://www.youtube.com/watch?v=dQw4w9WgXcQ - Google Chrome"),
+    ("chrome.exe", "Pull requests · octo/project - GitHub - Google Chrome"),
+    ("chrome.exe", "https://www.netflix.com/watch/81091393 - Google Chrome"),
+    ("chrome.exe", "Stack Overflow - Where Developers Learn, Share, & Build Careers - Google Chrome"),
+    ("firefox.exe", "twitch.tv/somechannel - Live - Mozilla Firefox"),
+    ("firefox.exe", "Python 3.12 documentation — Mozilla Firefox"),
+    ("firefox.exe", "player.vimeo.com/video/76979871 — Mozilla Firefox"),
+    ("msedge.exe", "Outlook – Kalender - Microsoft Edge"),
+    ("msedge.exe", "dailymotion.com/video/x8abc12 - Microsoft Edge"),
+    ("brave.exe", "Hacker News - Brave"),
+    ("Code.exe", "● activity_log.py - automatic-time-tracker - Visual Studio Code"),
+    ("Code.exe", "README.md - automatic-time-tracker - Visual Studio Code"),
+    ("WINWORD.EXE", "Bericht_Q3.docx - Word"),
+    ("EXCEL.EXE", "Budget 2024.xlsx - Excel"),
+    ("explorer.exe", "Downloads"),
+    ("vlc.exe", "Urlaub_2023.mp4 - VLC media player"),
+    ("mpv.exe", "lecture-07.mkv - mpv"),
+    ("wmplayer.exe", "Windows Media Player"),
+    ("PotPlayerMini64.exe", "Film.mkv - PotPlayer"),
+    ("Teams.exe", "Chat | Microsoft Teams"),
+    ("slack.exe", "Slack | general | Team"),
+    ("WindowsTerminal.exe", "python benchmark.py"),
+    ("notepad.exe", "*Notizen.txt - Editor"),
+    ("Spotify.exe", "Spotify Premium"),
+]
+
+
+def legacy_is_video_url(url):
+    """
+        Die frühere Prüfung: re.search je Muster bei jedem Aufruf.
+        """
+    if url is None:
+        return False
+    for pattern in DEFAULT_URL_PATTERNS:
+        if re.search(pattern, url, re.IGNORECASE):
+            return True
+    return False
+
+
+def legacy_is_video_process(process_name, hwnd, title):
+    for pattern in DEFAULT_PLAYER_PATTERNS:
+        if re.search(pattern, process_name, re.IGNORECASE):
+            return True
+    for pattern in DEFAULT_BROWSER_PATTERNS:
+        if re.search(pattern, process_name, re.IGNORECASE) and legacy_is_video_url(title):
+            return True
+    return False
+
+
+def benchmark_video_matcher(args):
+    """
+        Vergleicht die Schleife über re.search mit dem vorkompilierten VideoMatcher
+        über einen Korpus echter Fenstertitel (gleiches Ergebnis vorausgesetzt).
+        """
+    corpus = TITLE_CORPUS * max(1, args.calls // len(TITLE_CORPUS))
+    matcher = VideoMatcher()
+    mismatches = [(process, title) for process, title in TITLE_CORPUS
+                  if legacy_is_video_process(process, None, title) != matcher.is_video_process(process, title)
+                  or legacy_is_video_url(title) != matcher.is_video_url(title)
+                  or (legacy_is_video_process(process, None, title) or legacy_is_video_url(title))
+                  != matcher.is_video(process, title)]
+    print(f"{len(TITLE_CORPUS)} titles, "
+          f"{sum(matcher.is_video_process(p, t) for p, t in TITLE_CORPUS)} video, mismatches: {len(mismatches)}")
+
+    started = time.perf_counter()
+    for process, title in corpus:
+        legacy_is_video_process(process, None, title) or legacy_is_video_url(title)
+    print_result("is_video_process + is_video_url (loop)", len(corpus), time.perf_counter() - started)
+
+    started = time.perf_counter()
+    for process, title in corpus:
+        matcher.is_video_process(process, title) or matcher.is_video_url(title)
+    print_result("is_video_process + is_video_url (matcher)", len(corpus), time.perf_counter() - started)
+
+    started = time.perf_counter()
+    for process, title in corpus:
+        matcher.is_video(process, title)
+    print_result("is_video (matcher, single verdict)", len(corpus), time.perf_counter() - started)
+
+
+def make_category_rules(count, categories, rng):
+    """
+        Erzeugt count Regeln: 40 % exact, 10 % process, 40 % contains, 10 % regex,
+        verteilt auf vier Prioritätsstufen.
+        """
+    rules = []
+    for index in range(count):
+        category = categories[index % len(categories)]
+        priority = rng.randrange(4)
+        kind = rng.random()
+        if kind < 0.4:
+            rules.append(CategoryRule("exact", f"Dokument {index}.docx - Word", category, priority, False))
+        elif kind < 0.5:
+            rules.append(CategoryRule("process", f"tool{index}.exe", category, priority, False))
+        elif kind < 0.9:
+            rules.append(CategoryRule("contains", f"projekt-{index:05d}", category, priority, index % 3 == 0))
+        else:
+            # Meist mit wörtlichem Anfang; etwa jede fünfzigste Regel beginnt mit einer Alternation,
+            # geklammert oder auf oberster Ebene
+            if index % 100 == 0:
+                pattern = rf"(?:ticket|issue) #{index}\b"
+            elif index % 100 == 50:
+                pattern = rf"Standup #{index}\b|Teams #{index}\b"
+            else:
+                pattern = rf"PR #{index}\b.*- GitHub"
+            rules.append(CategoryRule("regex", pattern, category, priority, False))
+    return rules
+
+
+def legacy_match(rules, title):
+    """
+        Naiver Vergleich: jede Regel der Reihe nach, höchste Priorität zuerst.
+        """
+    for rule in rules:
+        if rule.type == "exact":
+            if title == rule.pattern:
+                return rule.category
+        elif rule.type == "contains":
+            if (rule.pattern.lower() in title.lower()) if rule.ignore_case else (rule.pattern in title):
+                return rule.category
+        elif rule.type == "regex":
+            if re.search(rule.pattern, title, re.IGNORECASE if rule.ignore_case else 0):
+                return rule.category
+    return None
+
+
+def benchmark_category_rules(args):
+    """
+        Kompiliert args.rules Regeln und ordnet args.titles Titel zu (etwa ein Drittel
+        trifft eine Regel, darunter die Alternationen auf oberster Ebene). Die Schleife über alle Regeln läuft nur über eine Stichprobe.
+        """
+    rng = random.Random(7)
+    categories = [f"Arbeit->Projekt {index}" for index in range(50)] + ["Privat", "Privat->lernen"]
+    category_ids = {path: index + 1 for index, path in enumerate(categories)}
+    rules = make_category_rules(args.rules, categories, rng)
+
+    started = time.perf_counter()
+    matcher = RuleMatcher(rules, category_ids)
+    print(f"{len(rules)} rules compiled in {(time.perf_counter() - started) * 1000:.0f} ms "
+          f"({len(matcher.tiers)} pattern tiers)")
+
+    # Nummern der Regeln "Standup #n|Teams #n"
+    alternations = [re.match(r"Standup #(\d+)", rule.pattern).group(1) for rule in rules
+                    if rule.pattern.startswith("Standup")]
+
+    def title(index):
+        kind = index % 6
+        if kind == 0:
+            return f"Dokument {rng.randrange(args.rules)}.docx - Word"
+        if kind == 1:
+            return f"projekt-{rng.randrange(args.rules):05d}: main.py - Visual Studio Code"
+        if kind == 2 and alternations:
+            return f"{rng.choice(['Standup', 'Teams'])} #{rng.choice(alternations)} | Microsoft Teams"
+        return TITLE_CORPUS[index % len(TITLE_CORPUS)][1]
+
+    distinct = [title(index) for index in range(min(args.titles, 50_000))]
+    corpus = [distinct[index % len(distinct)] for index in range(args.titles)]
+
+    ordered = sorted(rules, key=lambda rule: rule.priority, reverse=True)
+    sample = corpus[:args.legacy_titles]
+    mismatches = sum(1 for title in sample
+                     if category_ids.get(legacy_match(ordered, title)) != matcher.match(title))
+    started = time.perf_counter()
+    for title in sample:
+        legacy_match(ordered, title)
+    print_result("rule loop (sample)", len(sample), time.perf_counter() - started)
+
+    started = time.perf_counter()
+    matched = 0
+    for title in corpus:
+        if matcher.match(title) is not None:
+            matched += 1
+    seconds = time.perf_counter() - started
+    print_result("RuleMatcher", len(corpus), seconds)
+    print(f"{matched} of {len(corpus)} titles matched, {len(corpus) / seconds:.0f} titles/s, "
+          f"mismatches in sample: {mismatches}")
+
+
+HEAVY_MODULES = ("pandas", "matplotlib", "numpy")
+
+FIRST_SAMPLE_HEADLESS = """
+import sys, time
+from tracker_engine import TrackerEngine, load_config
+first = []
+engine = TrackerEngine(load_config())
+engine.subscribe(lambda event, data: event == "tick" and not first and first.append(time.time()))
+engine.start()
+engine.tick()
+print(first[0], *[name for name in {heavy} if name in sys.modules])
+engine.stop()
+"""
+
+FIRST_SAMPLE_GUI = """
+import sys, time
+from PyQt5.QtWidgets import QApplication
+from activity_tracker import ActivityTracker
+first = []
+app = QApplication(sys.argv)
+tracker = ActivityTracker()
+tracker.engine.subscribe(lambda event, data: event == "tick" and not first and first.append(time.time()))
+tracker.show()
+while not first:
+    app.processEvents()
+print(first[0], *[name for name in {heavy} if name in sys.modules])
+tracker.close()
+"""
+
+
+def read_import_times(module):
+    """
+        Importiert module in einem frischen Interpreter mit -X importtime. Gibt die kumulierte
+        Zeit in Mikrosekunden, die direkten Importe als [(Name, eigene, kumulierte Zeit)] und
+        die Namen aller geladenen Module zurück.
+        """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    total, children, direct, loaded = 0, [], [], set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            continue
+        # Unterimporte sind um je zwei Leerzeichen eingerückt und stehen vor ihrem Elternmodul
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        name = name.strip()
+        loaded.add(name)
+        if depth == 1:
+            children.append((name, int(self_us), int(cumulative_us)))
+        elif depth == 0:
+            if name == module:
+                total, direct = int(cumulative_us), children
+            children = []
+    return total, direct, loaded
+
+
+def measure_first_sample(code, cwd):
+    """
+        Startet code in einem frischen Interpreter und gibt die Zeit bis zum ersten Tick
+        sowie die dabei geladenen schweren Module zurück.
+        """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [os.path.dirname(os.path.abspath(__file__))] + [p for p in [env.get("PYTHONPATH")] if p])
+    started = time.time()
+    result = subprocess.run([sys.executable, "-c", code.format(heavy=HEAVY_MODULES)],
+                            capture_output=True, text=True, cwd=cwd, env=env)
+    if result.returncode != 0 or not result.stdout.strip():
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "no output")
+    first_sample, *heavy = result.stdout.split()
+    return float(first_sample) - started, heavy
+
+
+def benchmark_startup(args):
+    """
+        Misst die Importzeit je Modul (-X importtime) und die Zeit vom Prozessstart bis zum
+        ersten Tick, jeweils in einem frischen Interpreter.
+        """
+    for module in args.modules:
+        total, direct, loaded = read_import_times(module)
+        heavy = [name for name in HEAVY_MODULES if name in loaded]
+        print(f"import {module}: {total / 1000:.1f} ms"
+              + (f", loads {', '.join(heavy)}" if heavy else ""))
+        slowest = sorted(direct, key=lambda item: item[2], reverse=True)[:args.top]
+        for name, self_us, cumulative_us in slowest:
+            print(f"    {name:<40} {cumulative_us / 1000:8.1f} ms (self {self_us / 1000:.1f} ms)")
+
+    source_config = configparser.ConfigParser()
+    source_config.read(os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.ini"))
+    with tempfile.TemporaryDirectory() as tmp:
+        # Eigene Datenbank und Kategorien im Temp-Verzeichnis; das Fenster kommt aus einer Skriptquelle
+        source_config["database"]["database_path"] = "activity.db"
+        source_config["categorization"]["categories_path"] = "categories.json"
+        if not source_config.has_section("tracking"):
+            source_config.add_section("tracking")
+        source_config["tracking"]["window_source"] = "scripted"
+        with open(os.path.join(tmp, "config.ini"), "w") as config_file:
+            source_config.write(config_file)
+        for name, code in (("headless", FIRST_SAMPLE_HEADLESS), ("gui", FIRST_SAMPLE_GUI)):
+            try:
+                seconds, heavy = measure_first_sample(code, tmp)
+                print(f"time to first sample ({name}): {seconds * 1000:.0f} ms"
+                      + (f", loaded {', '.join(heavy)}" if heavy else ""))
+            except Exception as e:
+                print(f"time to first sample ({name}): failed ({e})")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Micro-Benchmarks für den Activity Tracker."
+    )
+    subparsers = parser.add_subparsers(
+        title="Benchmarks", dest="command"
+    )
+
+    # Database Subcommand
+    db_parser = subparsers.add_parser(
+        "db", help="Latenz pro Datenbankaufruf (vorher/nachher)")
+    db_parser.add_argument(
+        "--calls", type=int, default=2000, help="Anzahl der Aufrufe pro Variante."
+    )
+    db_parser.set_defaults(func=benchmark_db)
+
+    # Flush Subcommand
+    flush_parser = subparsers.add_parser(
+        "flush", help="Einzel-Commits gegen gebündelten Flush")
+    flush_parser.add_argument(
+        "--segments", type=int, default=5000, help="Anzahl der abgeschlossenen Segmente."
+    )
+    flush_parser.add_argument(
+        "--batch-size", type=int, default=50, help="Größengrenze des Puffers."
+    )
+    flush_parser.set_defaults(func=benchmark_flush)
+
+    # Storage Subcommand
+    storage_parser = subparsers.add_parser(
+        "storage", help="Größe und Lesegeschwindigkeit der Speicherformate")
+    storage_parser.add_argument(
+        "--days", type=int, default=30, help="Anzahl der synthetischen Tage."
+    )
+    storage_parser.set_defaults(func=benchmark_storage)
+
+    # Frame Subcommand
+    frame_parser = subparsers.add_parser(
+        "frame", help="DataFrame aus get_logs gegen get_logs_frame")
+    frame_parser.add_argument(
+        "--rows", type=int, default=1_000_000, help="Anzahl der synthetischen Zeilen."
+    )
+    frame_parser.add_argument(
+        "--storage", type=str, choices=["text", "compact"], default="text", help="Speicherformat."
+    )
+    frame_parser.set_defaults(func=benchmark_frame)
+
+    # Segments Subcommand
+    segments_parser = subparsers.add_parser(
+        "segments", help="Speicher und Tick-Kosten offener Segmente")
+    segments_parser.add_argument(
+        "--pending", type=int, default=10_000, help="Anzahl der noch nicht gespeicherten Segmente."
+    )
+    segments_parser.add_argument(
+        "--ticks", type=int, default=10_000, help="Anzahl der simulierten Ticks."
+    )
+    segments_parser.set_defaults(func=benchmark_segments)
+
+    # Input Subcommand
+    input_parser = subparsers.add_parser(
+        "input", help="Kosten der Eingabe-Callbacks bei einer Ereignisflut")
+    input_parser.add_argument(
+        "--events", type=int, default=1_000_000, help="Anzahl der synthetischen Ereignisse."
+    )
+    input_parser.set_defaults(func=benchmark_input)
+
+    # Process Cache Subcommand
+    process_parser = subparsers.add_parser(
+        "process-cache", help="Vordergrundabfrage mit und ohne Prozess-Cache")
+    process_parser.add_argument(
+        "--ticks", type=int, default=20_000, help="Anzahl der simulierten Ticks."
+    )
+    process_parser.add_argument(
+        "--windows", type=int, default=40, help="Anzahl der verschiedenen Fenster."
+    )
+    process_parser.add_argument(
+        "--processes", type=int, default=25, help="Anzahl der Prozesse in der Tabelle."
+    )
+    process_parser.add_argument(
+        "--switch-rate", type=float, default=0.1, help="Anteil der Ticks mit Fensterwechsel."
+    )
+    process_parser.add_argument(
+        "--cache-size", type=int, default=256, help="Größe des LRU-Caches."
+    )
+    process_parser.add_argument(
+        "--syscall-us", type=float, default=50, help="Nachgestellte Kosten je name()/exe() (Mikrosekunden)."
+    )
+    process_parser.set_defaults(func=benchmark_process_cache)
+
+    # Video Subcommand
+    video_parser = subparsers.add_parser(
+        "video", help="Video-Erkennung: Musterschleife gegen VideoMatcher")
+    video_parser.add_argument(
+        "--calls", type=int, default=200_000, help="Anzahl der Prüfungen."
+    )
+    video_parser.set_defaults(func=benchmark_video_matcher)
+
+    # Category Rules Subcommand
+    rules_parser = subparsers.add_parser(
+        "category-rules", help="Kategorisierung: Regelschleife gegen RuleMatcher")
+    rules_parser.add_argument(
+        "--rules", type=int, default=10_000, help="Anzahl der Regeln."
+    )
+    rules_parser.add_argument(
+        "--titles", type=int, default=1_000_000, help="Anzahl der zugeordneten Titel."
+    )
+    rules_parser.add_argument(
+        "--legacy-titles", type=int, default=1_000, help="Titel für die Regelschleife."
+    )
+    rules_parser.set_defaults(func=benchmark_category_rules)
+
+    # Metrics Subcommand
+    metrics_parser = subparsers.add_parser(
+        "metrics", help="Overhead der Latenzmessung")
+    metrics_parser.add_argument(
+        "--calls", type=int, default=1_000_000, help="Anzahl der gemessenen Blöcke."
+    )
+    metrics_parser.set_defaults(func=benchmark_metrics)
+
+    # Startup Subcommand
+    startup_parser = subparsers.add_parser(
+        "startup", help="Importzeiten und Zeit bis zum ersten Tick")
+    startup_parser.add_argument(
+        "--modules", nargs="+", default=["tracker_engine", "activity_tracker", "config_cli"],
+        help="Module, deren Importzeit gemessen wird."
+    )
+    startup_parser.add_argument(
+        "--top", type=int, default=8, help="Anzahl der langsamsten Importe je Modul."
+    )
+    startup_parser.set_defaults(func=benchmark_startup)
+
+    args = parser.parse_args()
+
+    if hasattr(args, "func"):
+        args.func(args)
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,80 +1,137 @@
 import logging
+import os
 import time
 import configparser
 from datetime import datetime
 from activity_log import ActivityLog
+from category_rules import RULES_FILE, load_matcher
 
 CONFIG_FILE = "config.ini"
 LOG_FILE = "categorize_activities.log"
 
+# Wasserstandsmarke: bis zu dieser id sind alle Logs mit den aktuellen Regeln geprüft
+WATERMARK_KEY = "categorizer_rowid"
+# Regelstand (mtime der Regeldatei und start_time), für den die Marke gilt
+RULES_KEY = "categorizer_rules"
+# Logs pro Transaktion; begrenzt den Speicher beim ersten Lauf über die ganze Historie
+BATCH_SIZE = 10_000
+
 # Logging Konfiguration
 logging.basicConfig(filename=LOG_FILE, level=logging.INFO,
                     format='%(asctime)s - %(levelname)s - %(message)s')
 
 
-def load_config():
+def get_mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class Categorizer:
     """
-        Lädt die Konfiguration aus der Datei.
+    Kategorisiert neue Logs inkrementell. Nur Logs nach der Wasserstandsmarke in meta werden
+    gelesen, die Treffer eines Blocks in einer Transaktion geschrieben; die Kosten eines
+    Durchlaufs hängen so von den neuen Logs ab, nicht von der ganzen Historie.
+    Konfiguration und Regeln werden nur neu geladen, wenn sich ihre Datei geändert hat.
+    Ändern sich die Regeln, wird die Historie einmal neu geprüft.
+    """
+
+    def __init__(self, config_path=CONFIG_FILE):
+        self.config_path = config_path
+        self.config_mtime = None
+        self.rules_mtime = None
+        self.rules_path = None
+        self.start_time = None
+        self.activity_log = None
+        self.matcher = None
+
+    def reload(self):
         """
-    config = configparser.ConfigParser()
-    config.read(CONFIG_FILE)
-    return config
+        Lädt Konfiguration und Regeln neu, falls sich die Dateien geändert haben.
+        """
+        config_mtime = get_mtime(self.config_path)
+        if self.activity_log is None or config_mtime != self.config_mtime:
+            self.config_mtime = config_mtime
+            config = configparser.ConfigParser()
+            config.read(self.config_path)
+            db_path = config["database"]["database_path"]
+            if self.activity_log is None or self.activity_log.db_path != db_path:
+                if self.activity_log is not None:
+                    self.activity_log.close()
+                self.activity_log = ActivityLog(db_path=db_path)
+                self.rules_mtime = None
+            start_time = config.get("categorization", "start_time", fallback=None)
+            self.start_time = datetime.fromisoformat(start_time) if start_time else None
+            rules_path = config.get("categorization", "rules_path", fallback=RULES_FILE)
+            if rules_path != self.rules_path:
+                self.rules_path = rules_path
+                self.rules_mtime = None
+
+        rules_mtime = get_mtime(self.rules_path)
+        if self.matcher is None or rules_mtime != self.rules_mtime:
+            self.matcher = load_matcher(self.activity_log, self.rules_path)
+            # load_matcher legt eine fehlende Regeldatei an
+            self.rules_mtime = get_mtime(self.rules_path)
+            logging.info(f"Category rules loaded from {self.rules_path}")
+
+    def run(self):
+        """
+        Ein Durchlauf: prüft die Logs ohne Kategorie nach der Wasserstandsmarke.
+        Gibt (geprüft, kategorisiert) zurück.
+        """
+        self.reload()
+        activity_log = self.activity_log
+        rules_state = f"{self.rules_mtime}:{self.start_time}"
+        if activity_log.get_meta(RULES_KEY) != rules_state:
+            # Neue Regeln gelten auch für die bisher nicht zugeordneten Logs
+            with activity_log.transaction():
+                activity_log.set_meta(RULES_KEY, rules_state)
+                activity_log.set_meta(WATERMARK_KEY, 0)
+            logging.info("Category rules changed, rechecking all uncategorized logs.")
+
+        watermark = int(activity_log.get_meta(WATERMARK_KEY, 0))
+        checked = categorized = 0
+        while True:
+            logs = list(activity_log.get_logs_without_category(limit=BATCH_SIZE, after_id=watermark))
+            if not logs:
+                break
+            assignments = []
+            for log in logs:
+                if self.start_time and log['start'] < self.start_time:
+                    continue
+                # Regeln aus category_rules.json (siehe category_rules.py)
+                category_id = self.matcher.match(log['window'])
+                if category_id:
+                    assignments.append((log['id'], category_id))
+            watermark = logs[-1]['id']
+            with activity_log.transaction():
+                activity_log.set_log_categories(assignments)
+                activity_log.set_meta(WATERMARK_KEY, watermark)
+            checked += len(logs)
+            categorized += len(assignments)
+            if len(logs) < BATCH_SIZE:
+                break
+        return checked, categorized
 
 
-def categorize_activities():
+def categorize_activities(categorizer=None):
     """
-        Kategorisiert die Aktivitäten in der Datenbank.
+        Kategorisiert die neuen Aktivitäten in der Datenbank.
         """
     try:
-        logging.info("Starting activity categorization process.")
-        config = load_config()
-        activity_log = ActivityLog(
-            db_path=config["database"]["database_path"])
-        categories = activity_log.get_categories()
-        logs_without_category = activity_log.get_logs_without_category()
-        categorization_start_time = config.get(
-            "categorization", "start_time", fallback=None)
-
-        if categorization_start_time:
-            categorization_start_time = datetime.fromisoformat(
-                categorization_start_time)
-
-        for log in logs_without_category:
-            log_start_time = log['start']
-            if categorization_start_time and log_start_time < categorization_start_time:
-                continue
-
-            category_id = None
-            window = log['window']
-
-            # Hier wird die Logik für die Kategorisierung hinzugefügt
-            # Beispiel: Wenn der Fenstertitel "Visual Studio Code" enthält, dann setze Kategorie "Arbeit"
-            if "Visual Studio Code" in window:
-                for category in categories:
-                    if category['level'] == 1 and category['name'] == 'Arbeit':
-                        category_id = category['id']
-                        break
-            elif "Google Chrome" in window:
-                for category in categories:
-                    if category['level'] == 1 and category['name'] == 'Privat':
-                        category_id = category['id']
-                        break
-
-            if category_id:
-                activity_log.set_log_category(log['id'], category_id)
-                logging.info(
-                    f"Categorized log with id {log['id']} to category {category_id}")
-            else:
-                logging.info(
-                    f"No category found for log with id {log['id']}")
-        logging.info("Activity categorization process finished.")
+        categorizer = categorizer or Categorizer()
+        checked, categorized = categorizer.run()
+        if checked:
+            logging.info(f"Categorized {categorized} of {checked} new logs.")
     except Exception as e:
         logging.error(f"Error during activity categorization: {e}")
 
 
 def main():
+    categorizer = Categorizer()
     while True:
-        categorize_activities()
+        categorize_activities(categorizer)
         time.sleep(60)  # Alle 60 Sekunden
 
 
@@ -0,0 +1,311 @@
+import json
+import logging
+import re
+from collections import namedtuple
+
+RULES_FILE = "category_rules.json"
+# Wie in assign_category_window: "Arbeit->Projekte"
+PATH_SEPARATOR = "->"
+RULE_TYPES = ("exact", "process", "contains", "regex")
+
+CategoryRule = namedtuple("CategoryRule", ["type", "pattern", "category", "priority", "ignore_case"])
+
+# Die früher fest eingebauten Regeln; Visual Studio Code wurde zuerst geprüft
+DEFAULT_RULES = [
+    CategoryRule("contains", "Visual Studio Code", "Arbeit", 1, False),
+    CategoryRule("contains", "Google Chrome", "Privat", 0, False),
+]
+
+# Muster mit Rückverweisen, benannten Gruppen oder globalen Flags lassen sich nicht gefahrlos zusammenfassen
+_SEPARATE_PATTERN = re.compile(r"\\[1-9]|\(\?P[<=]|\(\?[aiLmsux]+\)")
+
+
+def rule_to_dict(rule):
+    return {"type": rule.type, "pattern": rule.pattern, "category": rule.category,
+            "priority": rule.priority, "ignore_case": rule.ignore_case}
+
+
+def load_rules(path=RULES_FILE):
+    """
+    Lädt die Regeln aus der JSON-Datei (Liste von {"type", "pattern", "category", "priority",
+    "ignore_case"}). Fehlt die Datei, wird sie mit den Standardregeln angelegt.
+    Ungültige Einträge werden übersprungen.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+    except FileNotFoundError:
+        logging.warning(f"{path} not found, creating default")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump([rule_to_dict(rule) for rule in DEFAULT_RULES], f, indent=4)
+        return list(DEFAULT_RULES)
+    except Exception as e:
+        logging.error(f"Error loading category rules from {path}: {e}")
+        return []
+
+    rules = []
+    for entry in entries:
+        try:
+            rule = CategoryRule(entry["type"], entry["pattern"], entry["category"],
+                                int(entry.get("priority", 0)), bool(entry.get("ignore_case", False)))
+        except (KeyError, TypeError, ValueError) as e:
+            logging.error(f"Invalid category rule {entry!r}: {e}")
+            continue
+        if rule.type not in RULE_TYPES:
+            logging.error(f"Unknown category rule type {rule.type!r}")
+            continue
+        rules.append(rule)
+    return rules
+
+
+def category_paths(categories):
+    """
+    Gibt {Pfad: id} für die Kategorien aus get_categories() zurück.
+    """
+    by_id = {category['id']: category for category in categories}
+    paths = {}
+    for category in categories:
+        names = []
+        current = category
+        while current is not None and len(names) <= len(by_id):
+            names.append(current['name'])
+            current = by_id.get(current['parent_id'])
+        paths.setdefault(PATH_SEPARATOR.join(reversed(names)), category['id'])
+    return paths
+
+
+def resolve_categories(activity_log, paths, create=True):
+    """
+    Löst die Kategoriepfade einmal in ids auf. Fehlende Kategorien werden mit allen
+    Zwischenstufen angelegt (create=False lässt sie aus).
+    """
+    ids = category_paths(activity_log.get_categories())
+    for path in sorted(paths):
+        if path in ids or not create:
+            continue
+        parent_id = None
+        names = path.split(PATH_SEPARATOR)
+        for level, name in enumerate(names, start=1):
+            prefix = PATH_SEPARATOR.join(names[:level])
+            if prefix not in ids:
+                ids[prefix] = activity_log.add_category(level, name, parent_id)
+                logging.info(f"Created category {prefix}")
+            parent_id = ids[prefix]
+    return ids
+
+
+def normalize_process(process_name):
+    name = process_name.lower()
+    return name[:-4] if name.endswith(".exe") else name
+
+
+def split_literal_prefix(pattern):
+    """
+    Teilt ein Muster in seinen wörtlichen Anfang und den Rest ("ticket-\\d+" -> "ticket-", "\\d+").
+    Muster mit einer Alternation auf oberster Ebene haben keinen Anfang.
+    """
+    depth = 0
+    in_class = False
+    index = 0
+    while index < len(pattern):
+        char = pattern[index]
+        if char == "\\":
+            index += 2
+            continue
+        if in_class:
+            in_class = char != "]"
+        elif char == "[":
+            in_class = True
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "|" and depth == 0:
+            return "", pattern
+        index += 1
+
+    literal = []
+    index = 0
+    while index < len(pattern):
+        char = pattern[index]
+        if char == "\\" and index + 1 < len(pattern) and not pattern[index + 1].isalnum():
+            step, char = 2, pattern[index + 1]
+        elif char in ".^$*+?{}[]|()\\":
+            break
+        else:
+            step = 1
+        if index + step < len(pattern) and pattern[index + step] in "*+?{":
+            # Das letzte Zeichen gehört zum Quantor
+            break
+        literal.append(char)
+        index += step
+    return "".join(literal), pattern[index:]
+
+
+class _PatternTier:
+    """
+    Alle contains- und regex-Regeln einer Priorität als ein Ausdruck. Die Regeln werden über
+    ihren wörtlichen Anfang zu einem Präfixbaum zusammengefasst, damit nicht jede Regel an jeder
+    Stelle des Titels einzeln versucht wird. Jede Regel endet in einer eigenen leeren Gruppe,
+    sodass match.lastindex die Regel ohne Schleife über die Gruppen liefert.
+    """
+
+    def __init__(self, priority):
+        self.priority = priority
+        self.entries = []
+        self.folded_entries = []
+        self.separate = []
+        self.regex = None
+        self.group_ids = {}
+
+    def add(self, prefix, suffix, groups, category_id, ignore_case):
+        (self.folded_entries if ignore_case else self.entries).append(
+            (prefix, suffix, groups, category_id))
+
+    def compile(self):
+        parts = []
+        counter = [0]
+
+        def terminal(suffix, groups, category_id):
+            counter[0] += groups + 1
+            self.group_ids[counter[0]] = category_id
+            # Geklammert, sonst bindet eine Alternation im Rest ("Slack|Teams") die Endgruppe nur an den letzten Zweig
+            return f"(?:{suffix})()" if suffix else "()"
+
+        if self.entries:
+            parts.append(_trie_pattern(self.entries, terminal))
+        if self.folded_entries:
+            parts.append("(?i:" + _trie_pattern(self.folded_entries, terminal) + ")")
+        if parts:
+            self.regex = re.compile("|".join(parts))
+
+    def match(self, title):
+        if self.regex is not None:
+            match = self.regex.search(title)
+            if match is not None:
+                return self.group_ids[match.lastindex]
+        for regex, category_id in self.separate:
+            if regex.search(title):
+                return category_id
+        return None
+
+
+def _trie_pattern(entries, terminal):
+    """
+    Baut aus [(Anfang, Rest, Gruppen im Rest, Kategorie-id)] einen Ausdruck mit gemeinsamen
+    Präfixen. terminal() gibt das Ende einer Regel aus und vergibt die Gruppennummern in der
+    Reihenfolge des Ausdrucks.
+    """
+    root = {}
+    for prefix, suffix, groups, category_id in entries:
+        node = root
+        for char in prefix:
+            node = node.setdefault(char, {})
+        node.setdefault(None, []).append((suffix, groups, category_id))
+
+    def build(node):
+        branches = []
+        for char, child in node.items():
+            if char is None:
+                continue
+            # Ketten ohne Verzweigung ohne Gruppe ausgeben, sonst wird der Ausdruck tief verschachtelt
+            chars = [char]
+            while len(child) == 1 and None not in child:
+                (char, child), = child.items()
+                chars.append(char)
+            branches.append(re.escape("".join(chars)) + build(child))
+        for suffix, groups, category_id in node.get(None, ()):
+            branches.append(terminal(suffix, groups, category_id))
+        if len(branches) == 1:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")"
+
+    return build(root)
+
+
+class RuleMatcher:
+    """
+    Ordnet Fenstertitel über die Regeln einer Kategorie-id zu. exact- und process-Regeln sind
+    Hash-Lookups; danach folgt je Prioritätsstufe ein einziger Suchlauf für contains und regex.
+    Die höchste Priorität gewinnt, bei gleicher Priorität exact vor process vor Mustern.
+    Innerhalb einer Stufe entscheidet die früheste Fundstelle im Titel.
+
+    regex-Regeln ohne wörtlichen Anfang (z.B. "(?:ticket|issue) #\\d+") werden an jeder Stelle
+    des Titels versucht und kosten pro Regel etwa so viel wie hundert Regeln mit Anfang.
+    """
+
+    def __init__(self, rules, category_ids):
+        self.exact = {}
+        self.folded_exact = {}
+        self.processes = {}
+        tiers = {}
+        self.skipped = 0
+        for rule in rules:
+            category_id = category_ids.get(rule.category)
+            if category_id is None:
+                logging.warning(f"Unknown category {rule.category!r} in rule {rule.pattern!r}")
+                self.skipped += 1
+                continue
+            entry = (rule.priority, category_id)
+            if rule.type == "exact":
+                table = self.folded_exact if rule.ignore_case else self.exact
+                key = rule.pattern.casefold() if rule.ignore_case else rule.pattern
+                if key not in table or table[key][0] < rule.priority:
+                    table[key] = entry
+            elif rule.type == "process":
+                key = normalize_process(rule.pattern)
+                if key not in self.processes or self.processes[key][0] < rule.priority:
+                    self.processes[key] = entry
+            else:
+                tier = tiers.get(rule.priority)
+                if tier is None:
+                    tier = tiers[rule.priority] = _PatternTier(rule.priority)
+                if rule.type == "contains":
+                    tier.add(rule.pattern, "", 0, category_id, rule.ignore_case)
+                    continue
+                try:
+                    regex = re.compile(rule.pattern, re.IGNORECASE if rule.ignore_case else 0)
+                except re.error as e:
+                    logging.error(f"Invalid category rule pattern {rule.pattern!r}: {e}")
+                    self.skipped += 1
+                    continue
+                if _SEPARATE_PATTERN.search(rule.pattern):
+                    tier.separate.append((regex, category_id))
+                else:
+                    prefix, suffix = split_literal_prefix(rule.pattern)
+                    tier.add(prefix, suffix, regex.groups, category_id, rule.ignore_case)
+        self.tiers = sorted(tiers.values(), key=lambda tier: tier.priority, reverse=True)
+        for tier in self.tiers:
+            tier.compile()
+
+    def match(self, title, process_name=None):
+        """
+        Gibt die Kategorie-id für title zurück oder None. process_name ist optional,
+        gespeicherte Logs kennen nur den Titel.
+        """
+        title = title or ""
+        best = self.exact.get(title)
+        if self.folded_exact:
+            folded = self.folded_exact.get(title.casefold())
+            if folded is not None and (best is None or folded[0] > best[0]):
+                best = folded
+        if process_name and self.processes:
+            process = self.processes.get(normalize_process(process_name))
+            if process is not None and (best is None or process[0] > best[0]):
+                best = process
+        for tier in self.tiers:
+            if best is not None and tier.priority <= best[0]:
+                break
+            category_id = tier.match(title)
+            if category_id is not None:
+                return category_id
+        return best[1] if best is not None else None
+
+
+def load_matcher(activity_log, path=RULES_FILE):
+    """
+    Lädt die Regeln, löst ihre Kategorien auf und kompiliert den RuleMatcher.
+    """
+    rules = load_rules(path)
+    category_ids = resolve_categories(activity_log, {rule.category for rule in rules})
+    return RuleMatcher(rules, category_ids)
@@ -3,6 +3,8 @@ import configparser
 import os
 import sys
 
+from video_matcher import DEFAULT_BROWSER_PATTERNS, DEFAULT_PLAYER_PATTERNS, DEFAULT_URL_PATTERNS
+
 CONFIG_FILE = "config.ini"
 
 
@@ -20,7 +22,23 @@ def create_config_file():
         }
         config["database"] = {
             "upload_interval": "60",
+            "flush_batch_size": "50",
+            "heartbeat_interval": "15",
+            "journal_sync_interval": "1",
             "database_path": "activity.db",
+            "storage_format": "text",
+            "partitioning": "none",
+            "retention_months": "0",
+            "retention_action": "archive",
+        }
+        config["tracking"] = {
+            "window_source": "auto",
+            "window_script": "",
+            "sample_interval_min": "1",
+            "sample_interval_max": "5",
+            "suspend_threshold": "30",
+            "normalize_titles": "true",
+            "title_rules_path": "",
         }
         config["startup"] = {
             "auto_start": "false",
@@ -28,6 +46,16 @@ def create_config_file():
         config["notifications"] = {
             "pause_notification": "false",
         }
+        config["video"] = {
+            "url_patterns": "\n" + "\n".join(DEFAULT_URL_PATTERNS),
+            "player_patterns": "\n" + "\n".join(DEFAULT_PLAYER_PATTERNS),
+            "browser_patterns": "\n" + "\n".join(DEFAULT_BROWSER_PATTERNS),
+        }
+        config["debug"] = {
+            "metrics": "false",
+            "metrics_path": "metrics.json",
+            "metrics_dump_interval": "60",
+        }
         with open(CONFIG_FILE, "w") as configfile:
             config.write(configfile)
 
@@ -74,12 +102,68 @@ def configure_database(args):
     config = load_config()
     if args.upload_interval:
         config["database"]["upload_interval"] = str(args.upload_interval)
+    if args.flush_batch_size:
+        config["database"]["flush_batch_size"] = str(args.flush_batch_size)
+    if args.heartbeat_interval:
+        config["database"]["heartbeat_interval"] = str(args.heartbeat_interval)
+    if args.journal_sync_interval is not None:
+        config["database"]["journal_sync_interval"] = str(args.journal_sync_interval)
     if args.database_path:
         config["database"]["database_path"] = args.database_path
+    if args.storage_format:
+        config["database"]["storage_format"] = args.storage_format
+    if args.partitioning:
+        config["database"]["partitioning"] = args.partitioning
+    if args.retention_months is not None:
+        config["database"]["retention_months"] = str(args.retention_months)
+    if args.retention_action:
+        config["database"]["retention_action"] = args.retention_action
     save_config(config)
     print("Datenbankeinstellungen aktualisiert.")
 
 
+def configure_tracking(args):
+    """
+        Konfiguriert die Fensterquelle.
+        """
+    config = load_config()
+    if not config.has_section("tracking"):
+        config.add_section("tracking")
+    if args.window_source:
+        config["tracking"]["window_source"] = args.window_source
+    if args.window_script is not None:
+        config["tracking"]["window_script"] = args.window_script
+    if args.sample_interval_min:
+        config["tracking"]["sample_interval_min"] = str(args.sample_interval_min)
+    if args.sample_interval_max:
+        config["tracking"]["sample_interval_max"] = str(args.sample_interval_max)
+    if args.suspend_threshold:
+        config["tracking"]["suspend_threshold"] = str(args.suspend_threshold)
+    if args.normalize_titles:
+        config["tracking"]["normalize_titles"] = "true" if args.normalize_titles == "on" else "false"
+    if args.title_rules_path is not None:
+        config["tracking"]["title_rules_path"] = args.title_rules_path
+    save_config(config)
+    print("Tracking-Einstellungen aktualisiert.")
+
+
+def configure_debug(args):
+    """
+        Konfiguriert die Latenzmessung der Tick-Phasen (Anzeige mit python metrics.py).
+        """
+    config = load_config()
+    if not config.has_section("debug"):
+        config.add_section("debug")
+    if args.metrics:
+        config["debug"]["metrics"] = "true" if args.metrics == "on" else "false"
+    if args.metrics_path:
+        config["debug"]["metrics_path"] = args.metrics_path
+    if args.metrics_dump_interval:
+        config["debug"]["metrics_dump_interval"] = str(args.metrics_dump_interval)
+    save_config(config)
+    print("Debug-Einstellungen aktualisiert.")
+
+
 def configure_startup(args):
     """
         Konfiguriert die Starteinstellungen.
@@ -136,11 +220,70 @@ def main():
     database_parser.add_argument(
         "--upload-interval", type=int, help="Wann soll der Upload in die Datenbank stattfinden (in Sekunden)."
     )
+    database_parser.add_argument(
+        "--flush-batch-size", type=int, help="Ab wie vielen abgeschlossenen Einträgen sofort in die Datenbank geschrieben wird."
+    )
+    database_parser.add_argument(
+        "--heartbeat-interval", type=int, help="Wie oft die Dauer des laufenden Eintrags gespeichert wird (in Sekunden)."
+    )
+    database_parser.add_argument(
+        "--journal-sync-interval", type=float, help="Wie oft das Absturz-Journal auf die Platte geschrieben wird (in Sekunden, 0 = bei jedem Eintrag)."
+    )
     database_parser.add_argument(
         "--database-path", type=str, help="Pfad zur Datenbankdatei."
     )
+    database_parser.add_argument(
+        "--storage-format",
+        type=str,
+        choices=["text", "compact"],
+        help="Speicherformat für neue Datenbanken (bestehende: database_cli.py convert).",
+    )
+    database_parser.add_argument(
+        "--partitioning",
+        type=str,
+        choices=["none", "monthly"],
+        help="Abgeschlossene Monate beim Start in eigene Dateien auslagern.",
+    )
+    database_parser.add_argument(
+        "--retention-months", type=int, help="Wie viele Monate Partitionen abfragbar bleiben (0 = unbegrenzt)."
+    )
+    database_parser.add_argument(
+        "--retention-action",
+        type=str,
+        choices=["archive", "drop"],
+        help="Ältere Partitionen komprimieren (archive) oder löschen (drop). Die Tagessummen bleiben erhalten.",
+    )
     database_parser.set_defaults(func=configure_database)
 
+    # Tracking Subcommand
+    tracking_parser = subparsers.add_parser(
+        "tracking", help="Einstellungen der Fensterquelle")
+    tracking_parser.add_argument(
+        "--window-source",
+        type=str,
+        choices=["auto", "poll", "win32_events", "scripted"],
+        help="Woher das aktive Fenster kommt (auto: Win32-Events unter Windows, sonst Abfrage).",
+    )
+    tracking_parser.add_argument(
+        "--window-script", type=str, help="Skriptdatei für die Quelle 'scripted' (Zeilen: '<Sekunden> <Titel>')."
+    )
+    tracking_parser.add_argument(
+        "--sample-interval-min", type=float, help="Abfrageintervall nach einer Eingabe (in Sekunden)."
+    )
+    tracking_parser.add_argument(
+        "--sample-interval-max", type=float, help="Längstes Abfrageintervall ohne Eingaben (in Sekunden)."
+    )
+    tracking_parser.add_argument(
+        "--suspend-threshold", type=float, help="Ab welcher Lücke zwischen zwei Ticks ein Standby angenommen wird (in Sekunden)."
+    )
+    tracking_parser.add_argument(
+        "--normalize-titles", type=str, choices=["on", "off"], help="Flüchtige Titelteile (Zähler, Zeiten, '*') ignorieren."
+    )
+    tracking_parser.add_argument(
+        "--title-rules-path", type=str, help="JSON-Datei mit zusätzlichen Regeln (Liste von name, pattern, replace)."
+    )
+    tracking_parser.set_defaults(func=configure_tracking)
+
     # Startup Subcommand
     startup_parser = subparsers.add_parser(
         "startup", help="Starteinstellungen")
@@ -158,6 +301,21 @@ def main():
     )
     notifications_parser.set_defaults(func=configure_notifications)
 
+    # Debug Subcommand
+    debug_parser = subparsers.add_parser(
+        "debug", help="Latenzmessung der Tick-Phasen"
+    )
+    debug_parser.add_argument(
+        "--metrics", type=str, choices=["on", "off"], help="Latenz-Histogramme sammeln und regelmäßig speichern."
+    )
+    debug_parser.add_argument(
+        "--metrics-path", type=str, help="Datei, in die die Histogramme geschrieben werden."
+    )
+    debug_parser.add_argument(
+        "--metrics-dump-interval", type=float, help="Abstand zwischen zwei Speicherungen (in Sekunden)."
+    )
+    debug_parser.set_defaults(func=configure_debug)
+
     args = parser.parse_args()
 
     if hasattr(args, "func"):
@@ -0,0 +1,187 @@
+import argparse
+import configparser
+import os
+import time
+
+from activity_log import ActivityLog
+from video_matcher import VideoMatcher, make_title_classifier
+
+CONFIG_FILE = "config.ini"
+
+
+def load_config():
+    """
+        Lädt die Konfiguration aus der Datei.
+        """
+    config = configparser.ConfigParser()
+    config.read(CONFIG_FILE)
+    return config
+
+
+def get_database_path(args):
+    """
+        Gibt den Datenbankpfad aus den Argumenten bzw. der Konfiguration zurück.
+        """
+    if args.database_path:
+        return args.database_path
+    config = load_config()
+    return config.get("database", "database_path", fallback="activity.db")
+
+
+def convert_database(args):
+    """
+        Wandelt eine bestehende Datenbank in das kompakte Speicherformat um.
+        """
+    db_path = get_database_path(args)
+    if not os.path.exists(db_path):
+        print(f"Datenbank {db_path} nicht gefunden.")
+        return
+    size_before = os.path.getsize(db_path)
+    activity_log = ActivityLog(db_path=db_path)
+    if activity_log.storage == "compact":
+        print(f"{db_path} ist bereits im kompakten Format.")
+        activity_log.close()
+        return
+    converted = activity_log.convert_to_compact()
+    activity_log.close()
+    size_after = os.path.getsize(db_path)
+    print(f"{converted} Einträge umgewandelt: {size_before / 1024:.0f} KiB -> {size_after / 1024:.0f} KiB.")
+
+
+def rebuild_rollups(args):
+    """
+        Baut die Tagessummen für die Berichte aus allen Logs neu auf.
+        """
+    db_path = get_database_path(args)
+    activity_log = ActivityLog(db_path=db_path)
+    rows = activity_log.rebuild_rollups()
+    activity_log.close()
+    print(f"Tagessummen neu aufgebaut: {rows} Einträge (Tag x Fenster).")
+
+
+def manage_partitions(args):
+    """
+        Listet, versiegelt, archiviert oder löscht Monatspartitionen.
+        """
+    db_path = get_database_path(args)
+    activity_log = ActivityLog(db_path=db_path)
+    if args.seal:
+        sealed = activity_log.seal_closed_months()
+        print(f"Versiegelte Monate: {', '.join(sealed) or 'keine'}")
+    if args.compress:
+        if not activity_log.compress_partition(args.compress):
+            print(f"Partition {args.compress} nicht gefunden oder in Benutzung.")
+    if args.restore:
+        if not activity_log.restore_partition(args.restore):
+            print(f"Kein Archiv für {args.restore} gefunden.")
+    if args.drop:
+        if not activity_log.drop_partition(args.drop):
+            print(f"Partition {args.drop} ist in Benutzung.")
+    if args.retention_months is not None:
+        affected = activity_log.apply_retention(args.retention_months, args.retention_action)
+        print(f"Aufbewahrung ({args.retention_action}): {', '.join(affected) or 'keine'}")
+    for partition in activity_log.get_partitions():
+        state = "archiviert" if partition['compressed'] else "aktiv"
+        print(f"{partition['month']}  {partition['rows']:>8} Einträge  "
+              f"ids {partition['min_id']}-{partition['max_id']}  {state}  {partition['path']}")
+    activity_log.close()
+
+
+def classify_video(args):
+    """
+        Setzt das video-Flag der gespeicherten Logs anhand der Video-Muster aus [video].
+        """
+    db_path = get_database_path(args)
+    activity_log = ActivityLog(db_path=db_path)
+    classify = make_title_classifier(VideoMatcher.from_config(load_config()), args.cache_size)
+    started = time.perf_counter()
+    reported = [0]
+
+    def progress(rows):
+        if rows - reported[0] >= args.report_every:
+            reported[0] = rows
+            elapsed = time.perf_counter() - started
+            print(f"  {rows} Einträge, {rows / elapsed:.0f} Einträge/s")
+
+    rows, updated = activity_log.classify_video(
+        classify, chunk_size=args.chunk_size, progress=progress, full=args.full)
+    elapsed = time.perf_counter() - started
+    activity_log.close()
+    info = classify.cache_info()
+    print(f"{rows} Einträge geprüft, {updated} als Video markiert in {elapsed:.1f} s "
+          f"({rows / elapsed if elapsed else 0:.0f} Einträge/s); "
+          f"{info.misses} Titel klassifiziert, {info.hits} aus dem Cache.")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Wartung der Activity-Tracker-Datenbank."
+    )
+    parser.add_argument(
+        "--database-path", type=str, help="Pfad zur Datenbankdatei (Standard: aus config.ini)."
+    )
+    subparsers = parser.add_subparsers(
+        title="Befehle", dest="command"
+    )
+
+    # Convert Subcommand
+    convert_parser = subparsers.add_parser(
+        "convert", help="In das kompakte Speicherformat umwandeln")
+    convert_parser.set_defaults(func=convert_database)
+
+    # Rollups Subcommand
+    rollups_parser = subparsers.add_parser(
+        "rebuild-rollups", help="Tagessummen für die Berichte neu aufbauen")
+    rollups_parser.set_defaults(func=rebuild_rollups)
+
+    # Partitions Subcommand
+    partitions_parser = subparsers.add_parser(
+        "partitions", help="Monatspartitionen anzeigen und verwalten")
+    partitions_parser.add_argument(
+        "--seal", action="store_true", help="Abgeschlossene Monate in eigene Dateien auslagern."
+    )
+    partitions_parser.add_argument(
+        "--compress", type=str, metavar="YYYY-MM", help="Partition als Archiv komprimieren."
+    )
+    partitions_parser.add_argument(
+        "--restore", type=str, metavar="YYYY-MM", help="Archivierte Partition wieder entpacken."
+    )
+    partitions_parser.add_argument(
+        "--drop", type=str, metavar="YYYY-MM", help="Partition löschen (Tagessummen bleiben)."
+    )
+    partitions_parser.add_argument(
+        "--retention-months", type=int, help="Partitionen älter als so viele Monate behandeln."
+    )
+    partitions_parser.add_argument(
+        "--retention-action", type=str, choices=["archive", "drop"], default="archive",
+        help="Was mit älteren Partitionen passiert."
+    )
+    partitions_parser.set_defaults(func=manage_partitions)
+
+    # Classify Video Subcommand
+    video_parser = subparsers.add_parser(
+        "classify-video", help="video-Flag gespeicherter Einträge nachträglich setzen")
+    video_parser.add_argument(
+        "--full", action="store_true", help="Alle Einträge prüfen, nicht nur die seit dem letzten Lauf."
+    )
+    video_parser.add_argument(
+        "--chunk-size", type=int, default=5000, help="Einträge pro Block und Transaktion."
+    )
+    video_parser.add_argument(
+        "--cache-size", type=int, default=65536, help="Anzahl der zwischengespeicherten Titel."
+    )
+    video_parser.add_argument(
+        "--report-every", type=int, default=100_000, help="Fortschritt alle so viele Einträge ausgeben."
+    )
+    video_parser.set_defaults(func=classify_video)
+
+    args = parser.parse_args()
+
+    if hasattr(args, "func"):
+        args.func(args)
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,48 @@
+import argparse
+import logging
+import signal
 import sys
-from PyQt5.QtWidgets import QApplication
-from activity_tracker import ActivityTracker
 
-if __name__ == '__main__':
+
+def run_headless():
+    """
+        Startet nur die TrackerEngine ohne Oberfläche (kein PyQt, kein pandas).
+        """
+    from tracker_engine import TrackerEngine, load_config
+
+    logging.basicConfig(filename='app.log', level=logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    logging.info("Application started (headless)")
+    engine = TrackerEngine(load_config())
+    signal.signal(signal.SIGTERM, lambda signum, frame: engine.request_stop())
+    engine.start()
+    try:
+        engine.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        engine.stop()
+        logging.info("Application closed.")
+
+
+def run_gui():
+    from PyQt5.QtWidgets import QApplication
+    from activity_tracker import ActivityTracker
+
     app = QApplication(sys.argv)
     tracker = ActivityTracker()
     tracker.show()
     sys.exit(app.exec_())
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Activity Tracker")
+    parser.add_argument(
+        "--headless", action="store_true", help="Nur im Hintergrund tracken, ohne Fenster."
+    )
+    args, qt_args = parser.parse_known_args()
+    sys.argv = sys.argv[:1] + qt_args
+    if args.headless:
+        run_headless()
+    else:
+        run_gui()
@@ -0,0 +1,202 @@
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+
+NS_PER_US = 1_000
+# Eimer nach Zweierpotenzen in Mikrosekunden: 1 µs bis ~ 67 s, der letzte nimmt alles Größere auf
+BUCKETS = 27
+
+
+class Histogram:
+    """
+    Latenz-Histogramm mit logarithmischen Eimern; Einfügen ist O(1) und unabhängig von der Anzahl.
+    """
+
+    def __init__(self):
+        self.counts = [0] * BUCKETS
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def record_ns(self, value_ns):
+        if value_ns < 0:
+            value_ns = 0
+        self.counts[min((value_ns // NS_PER_US).bit_length(), BUCKETS - 1)] += 1
+        self.count += 1
+        self.total_ns += value_ns
+        if value_ns > self.max_ns:
+            self.max_ns = value_ns
+
+    def to_dict(self):
+        return {'counts': list(self.counts), 'count': self.count,
+                'total_ns': self.total_ns, 'max_ns': self.max_ns}
+
+
+def bucket_upper_us(index):
+    """
+    Obergrenze eines Eimers in Mikrosekunden.
+    """
+    return 1 << index
+
+
+def percentile_us(counts, fraction):
+    """
+    Gibt die Obergrenze des Eimers zurück, in dem das Perzentil liegt (Auflösung Faktor 2).
+    """
+    total = sum(counts)
+    if not total:
+        return 0
+    threshold = total * fraction
+    seen = 0
+    for index, count in enumerate(counts):
+        seen += count
+        if seen >= threshold:
+            return bucket_upper_us(index)
+    return bucket_upper_us(len(counts) - 1)
+
+
+class _NullTimer:
+    """
+    Platzhalter bei abgeschalteter Messung: kein Zeitstempel, keine Zuweisung.
+    """
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ('metrics', 'name', 'started')
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.metrics.record_ns(self.name, time.perf_counter_ns() - self.started)
+        return False
+
+
+class Metrics:
+    """
+    Sammelt Latenzen der Tick-Phasen in Histogrammen und schreibt sie regelmäßig als JSON.
+    Abgeschaltet liefert measure() einen gemeinsamen Platzhalter, der nichts misst.
+    """
+
+    def __init__(self, enabled=False, path="metrics.json", dump_interval=60):
+        self.enabled = enabled
+        self.path = path
+        self.dump_interval = dump_interval
+        self.histograms = {}
+        self.started = time.time()
+        self.last_dump = time.monotonic()
+        self._lock = threading.Lock()
+
+    def measure(self, name):
+        """
+        Kontextmanager, der die Dauer des Blocks unter name erfasst.
+        """
+        if not self.enabled:
+            return NULL_TIMER
+        return _Timer(self, name)
+
+    def record_ns(self, name, value_ns):
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.record_ns(value_ns)
+
+    def snapshot(self):
+        with self._lock:
+            return {'started': self.started, 'written': time.time(),
+                    'histograms': {name: histogram.to_dict()
+                                   for name, histogram in self.histograms.items()}}
+
+    def maybe_dump(self):
+        if self.enabled and time.monotonic() - self.last_dump >= self.dump_interval:
+            self.dump()
+
+    def dump(self):
+        """
+        Schreibt den aktuellen Stand atomar in die Metrik-Datei.
+        """
+        if not self.enabled:
+            return
+        self.last_dump = time.monotonic()
+        try:
+            temp_path = self.path + ".tmp"
+            with open(temp_path, "w") as f:
+                json.dump(self.snapshot(), f)
+            os.replace(temp_path, self.path)
+        except Exception as e:
+            logging.error(f"Error writing metrics: {e}")
+
+
+def create_metrics(config):
+    """
+    Erstellt die Metriken aus [debug]; ohne Abschnitt bleibt die Messung aus.
+    """
+    if not config.has_section("debug"):
+        return Metrics()
+    debug = config["debug"]
+    return Metrics(
+        enabled=debug.getboolean("metrics", fallback=False),
+        path=debug.get("metrics_path", fallback="metrics.json"),
+        dump_interval=debug.getfloat("metrics_dump_interval", fallback=60))
+
+
+def format_metrics(data):
+    """
+    Gibt die Histogramme als Tabelle zurück (Zeiten in Millisekunden).
+    """
+    lines = [f"{'Phase':<24}{'Anzahl':>9}{'Mittel':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'Max':>10}"]
+    for name, histogram in sorted(data['histograms'].items()):
+        count = histogram['count']
+        mean_ms = histogram['total_ns'] / count / 1e6 if count else 0
+        max_ms = histogram['max_ns'] / 1e6
+        # Eimergrenzen können über dem gemessenen Maximum liegen
+        p50, p95, p99 = (min(percentile_us(histogram['counts'], fraction) / 1000, max_ms)
+                         for fraction in (0.50, 0.95, 0.99))
+        lines.append(
+            f"{name:<24}{count:>9}{mean_ms:>10.3f}{p50:>10.3f}{p95:>10.3f}{p99:>10.3f}{max_ms:>10.3f}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Zeigt die Latenz-Histogramme des Activity Trackers an ([debug] metrics = true)."
+    )
+    parser.add_argument(
+        "path", nargs="?", default="metrics.json", help="Pfad zur Metrik-Datei."
+    )
+    args = parser.parse_args()
+
+    try:
+        with open(args.path) as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        print(f"{args.path} not found. Enable it with: python config_cli.py debug --metrics on")
+        return
+    written = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(data['written']))
+    print(f"Stand: {written} (Perzentile auf Faktor 2 genau)")
+    print(format_metrics(data))
+
+
+if __name__ == "__main__":
+    main()
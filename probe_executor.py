@@ -0,0 +1,197 @@
+import logging
+import queue
+import threading
+import time
+from collections import namedtuple
+
+# Ein bekanntes Ergebnis: value ist None, wenn die Probe fehlschlug oder zu lange brauchte
+ProbeResult = namedtuple("ProbeResult", ["value", "checked", "error"])
+
+Probe = namedtuple("Probe", ["function", "timeout", "ttl"])
+
+
+class _Job:
+    """
+    Eine eingereihte Probe; value oder error sind gesetzt, sobald done wahr ist.
+    """
+    __slots__ = ('function', 'args', 'callback', 'done', 'value', 'error')
+
+    def __init__(self, function, args, callback):
+        self.function = function
+        self.args = args
+        self.callback = callback
+        self.done = False
+        self.value = None
+        self.error = None
+
+
+class _ProbePool:
+    """
+    Kleiner Pool aus Daemon-Threads. Anders als beim ThreadPoolExecutor hält eine hängende
+    Probe das Beenden des Prozesses nicht auf.
+    """
+
+    def __init__(self, max_workers, initializer=None):
+        self.initializer = initializer
+        self.queue = queue.SimpleQueue()
+        self.threads = [threading.Thread(target=self._work, name=f"probe_{i}", daemon=True)
+                        for i in range(max_workers)]
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, job):
+        self.queue.put(job)
+
+    def _work(self):
+        if self.initializer is not None:
+            try:
+                self.initializer()
+            except Exception as e:
+                logging.error(f"Probe worker initializer failed: {e}")
+        while True:
+            job = self.queue.get()
+            if job is None:
+                return
+            try:
+                job.value = job.function(*job.args)
+            except Exception as e:
+                job.error = e
+            job.done = True
+            job.callback(job)
+
+    def shutdown(self, wait=False):
+        # Wartende Proben verwerfen; laufende lassen sich nicht abbrechen
+        while True:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                break
+        for _ in self.threads:
+            self.queue.put(None)
+        if wait:
+            for thread in self.threads:
+                thread.join()
+
+
+class ProbeExecutor:
+    """
+    Führt langsame Anreicherungen (z.B. die UIAutomation-Abfrage nach einem Tab mit Ton)
+    in einem Pool aus Daemon-Threads aus. get() blockiert nie: es liefert das letzte bekannte Ergebnis
+    für (Probe, Fenster-Handle, Titel) und stößt bei Bedarf eine neue Abfrage an.
+
+    Hängt eine Probe länger als ihr Timeout, wird ihr Ergebnis verworfen und als Fehler
+    gespeichert. Sind alle Worker durch hängende Proben belegt, wird ein neuer Pool gestartet,
+    damit die übrigen Proben weiterlaufen.
+    """
+
+    def __init__(self, max_workers=2, timeout=2.0, ttl=10.0, max_entries=512, initializer=None,
+                 clock=time.monotonic):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.initializer = initializer
+        self.clock = clock
+        self.probes = {}
+        self.results = {}
+        self.pending = {}
+        # Abgelaufene, aber noch laufende Proben belegen weiter einen Worker
+        self.hung = set()
+        self.stats = {'submitted': 0, 'completed': 0, 'errors': 0, 'timeouts': 0,
+                      'hits': 0, 'misses': 0, 'pool_restarts': 0}
+        # Reentrant: ist eine Probe sofort fertig, läuft der Callback noch innerhalb von get()
+        self._lock = threading.RLock()
+        self._pool = None
+
+    def register(self, name, function, timeout=None, ttl=None):
+        """
+        Registriert function(*args) unter name. timeout und ttl in Sekunden, sonst die Standardwerte.
+        """
+        self.probes[name] = Probe(function,
+                                  self.timeout if timeout is None else timeout,
+                                  self.ttl if ttl is None else ttl)
+
+    def get(self, name, hwnd, title, *args):
+        """
+        Gibt den letzten bekannten Wert für (name, hwnd, title) zurück, None solange keiner
+        vorliegt. Ist er älter als die TTL, wird im Hintergrund neu geprüft.
+        """
+        key = (name, hwnd, title)
+        with self._lock:
+            now = self.clock()
+            self._expire_pending(now)
+            result = self.results.get(key)
+            probe = self.probes[name]
+            if result is not None and now - result.checked < probe.ttl:
+                self.stats['hits'] += 1
+                return result.value
+            self.stats['misses'] += 1
+            if key not in self.pending:
+                self._submit(key, probe, args, now)
+            return result.value if result is not None else None
+
+    def peek(self, name, hwnd, title):
+        """
+        Gibt das gespeicherte ProbeResult zurück, ohne eine Abfrage anzustoßen.
+        """
+        with self._lock:
+            return self.results.get((name, hwnd, title))
+
+    def _submit(self, key, probe, args, now):
+        if self._pool is None or len(self.hung) >= self.max_workers:
+            if self._pool is not None:
+                # Hängende Threads lassen sich nicht abbrechen; der alte Pool läuft leer aus
+                self._pool.shutdown(wait=False)
+                self.stats['pool_restarts'] += 1
+                logging.warning(f"All {self.max_workers} probe workers hung, starting a new pool")
+            self._pool = _ProbePool(self.max_workers, initializer=self.initializer)
+            self.hung.clear()
+        job = _Job(probe.function, args, lambda job: self._finished(key, job))
+        self.pending[key] = (job, now + probe.timeout)
+        self.stats['submitted'] += 1
+        self._pool.submit(job)
+
+    def _finished(self, key, job):
+        with self._lock:
+            entry = self.pending.get(key)
+            if entry is None or entry[0] is not job:
+                # Bereits als Timeout verbucht; der Worker ist wieder frei
+                self.hung.discard(job)
+                return
+            del self.pending[key]
+            if job.error is not None:
+                self.stats['errors'] += 1
+                logging.error(f"Probe {key[0]} failed: {job.error}")
+                self._store(key, ProbeResult(None, self.clock(), repr(job.error)))
+            else:
+                self.stats['completed'] += 1
+                self._store(key, ProbeResult(job.value, self.clock(), None))
+
+    def _expire_pending(self, now):
+        for key, (job, deadline) in list(self.pending.items()):
+            if now >= deadline and not job.done:
+                del self.pending[key]
+                self.hung.add(job)
+                self.stats['timeouts'] += 1
+                logging.warning(f"Probe {key[0]} timed out")
+                self._store(key, ProbeResult(None, now, "timeout"))
+
+    def _store(self, key, result):
+        if key not in self.results and len(self.results) >= self.max_entries:
+            # Zuerst die ältesten Ergebnisse verwerfen
+            for old_key in sorted(self.results, key=lambda k: self.results[k].checked)[:self.max_entries // 4]:
+                del self.results[old_key]
+        self.results[key] = result
+
+    def shutdown(self, wait=False):
+        """
+        Beendet die Worker. Mit wait=False kehrt der Aufruf sofort zurück; hängende Proben
+        laufen als Daemon-Threads weiter, ohne das Beenden des Prozesses aufzuhalten.
+        """
+        with self._lock:
+            pool, self._pool = self._pool, None
+            self.pending.clear()
+            self.hung.clear()
+        # Außerhalb der Sperre: ein laufender Worker braucht sie für seinen Callback
+        if pool is not None:
+            pool.shutdown(wait=wait)
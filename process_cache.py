@@ -0,0 +1,95 @@
+from collections import OrderedDict, namedtuple
+
+ProcessInfo = namedtuple("ProcessInfo", ["name", "exe"])
+
+
+def default_process_factory(pid):
+    # Erst hier importieren, damit die Klasse auch mit einer eigenen Prozesstabelle nutzbar ist
+    import psutil
+    return psutil.Process(pid)
+
+
+class ProcessCache:
+    """
+    LRU-Cache für Prozessname und Programmpfad. Der Schlüssel ist (pid, Startzeit):
+    wird eine pid von einem neuen Prozess wiederverwendet, ändert sich die Startzeit
+    und der alte Eintrag wird nicht mehr getroffen.
+    """
+
+    def __init__(self, max_size=256, process_factory=None):
+        self.max_size = max_size
+        self.process_factory = process_factory or default_process_factory
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, pid):
+        """
+        Gibt ProcessInfo für pid zurück. Fehler (Prozess beendet, kein Zugriff) werden
+        weitergereicht und nicht zwischengespeichert.
+        """
+        process = self.process_factory(pid)
+        key = (pid, process.create_time())
+        info = self.entries.get(key)
+        if info is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return info
+        self.misses += 1
+        info = ProcessInfo(process.name(), process.exe())
+        self.entries[key] = info
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+        return info
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses,
+                'evictions': self.evictions, 'size': len(self.entries)}
+
+
+class ForegroundSampler:
+    """
+    Liest das Vordergrundfenster. Sind Fenster-Handle und Titel seit der letzten Abfrage
+    unverändert, wird das vorige Ergebnis ohne Prozessabfrage zurückgegeben.
+    """
+
+    def __init__(self, get_foreground, get_title, get_pid, cache=None):
+        self.get_foreground = get_foreground
+        self.get_title = get_title
+        self.get_pid = get_pid
+        self.cache = cache or ProcessCache()
+        self.last_hwnd = None
+        self.last_title = None
+        self.last_info = None
+        self.unchanged = 0
+        self.resolved = 0
+
+    def sample(self):
+        """
+        Gibt {'title', 'process_name', 'executable_path', 'hwnd'} zurück oder None ohne Vordergrundfenster.
+        """
+        hwnd = self.get_foreground()
+        if not hwnd:
+            return None
+        title = self.get_title(hwnd)
+        if hwnd == self.last_hwnd and title == self.last_title and self.last_info is not None:
+            self.unchanged += 1
+            info = self.last_info
+        else:
+            self.resolved += 1
+            # Erst nach erfolgreicher Auflösung merken, damit Fehler beim nächsten Mal neu versucht werden
+            self.last_info = None
+            info = self.cache.get(self.get_pid(hwnd))
+            self.last_hwnd, self.last_title, self.last_info = hwnd, title, info
+        return {'title': title, 'process_name': info.name,
+                'executable_path': info.exe, 'hwnd': hwnd}
+
+    def stats(self):
+        stats = {'unchanged': self.unchanged, 'resolved': self.resolved}
+        stats.update({f"cache_{name}": value for name, value in self.cache.stats().items()})
+        return stats
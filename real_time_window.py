@@ -88,7 +88,8 @@ class RealTimeWindow(QMainWindow):
 
     def update_table(self):
         activity_log = self.main_window.current_logs
-        df = pd.DataFrame(activity_log)
+        df = pd.DataFrame([log.to_dict() for log in activity_log],
+                          columns=['id', 'window', 'start', 'end', 'duration', 'type', 'video'])
 
         # Die Daten werden nun so angezeigt, dass nur die aktuellste Aktivität angezeigt wird, und darunter alle Pausen
 
@@ -128,11 +129,11 @@ class RealTimeWindow(QMainWindow):
         filepath, _ = QFileDialog.getSaveFileName(
             self, "Save Log", "", "CSV Files (*.csv);;All Files (*)", options=options)
         if filepath:
-            df = pd.DataFrame(self.main_window.activity_log.get_logs())
+            df = self.main_window.activity_log.get_logs_frame()
 
-            # Aggregating time usage by application/website
-            summary = df.groupby('window')['duration'].sum().reset_index()
-            summary.sort_values(by='duration', ascending=False, inplace=True)
+            # Aggregating time usage by application/website (aus den Tagessummen)
+            summary = pd.DataFrame(
+                self.main_window.activity_log.get_window_totals(), columns=['window', 'duration'])
 
             # Save detailed log and summary to CSV
             with open(filepath, 'w') as file:
@@ -145,16 +146,14 @@ class RealTimeWindow(QMainWindow):
                 self, "Save Log", f"Log saved to {filepath}")
 
     def download_report(self):
-        if not self.main_window.activity_log.get_logs():
+        if not self.main_window.activity_log.has_logs():
             QMessageBox.warning(self, "Generate Report",
                                 "No activity to report.")
             return
 
-        df = pd.DataFrame(self.main_window.activity_log.get_logs())
-
-        # Aggregate time usage by application/website
-        summary = df.groupby('window')['duration'].sum().reset_index()
-        summary.sort_values(by='duration', ascending=False, inplace=True)
+        # Aggregate time usage by application/website (aus den Tagessummen)
+        summary = pd.DataFrame(
+            self.main_window.activity_log.get_window_totals(), columns=['window', 'duration'])
 
         # Plotting
         plt.figure(figsize=(10, 5))
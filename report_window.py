@@ -1,9 +1,35 @@
-from PyQt5.QtWidgets import QDialog, QVBoxLayout, QTableWidget, QTableWidgetItem, QHeaderView, QPushButton, QFileDialog, QMessageBox
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QTableWidget, QTableWidgetItem, QHeaderView, QPushButton, QFileDialog, QMessageBox, QComboBox
 from PyQt5.QtGui import QFont, QIcon, QPixmap
 from PyQt5.QtCore import Qt
+from datetime import date, datetime, time, timedelta
 import pandas as pd
 import matplotlib.pyplot as plt
 
+# Anzahl der Logs, die pro Seite in die Tabelle geladen werden
+PAGE_SIZE = 200
+
+REPORT_PERIODS = ["All Time", "Today", "This Week", "This Month", "This Year"]
+
+
+def period_range(period, today=None):
+    """
+        Gibt den Zeitraum [start, end) eines Berichtszeitraums zurück, jeweils Mitternacht
+        (None = offen). datetime statt date, weil das kompakte Format Epoch-Sekunden braucht.
+        """
+    today = today or date.today()
+    tomorrow = today + timedelta(days=1)
+    if period == "Today":
+        first = today
+    elif period == "This Week":
+        first = today - timedelta(days=today.weekday())
+    elif period == "This Month":
+        first = today.replace(day=1)
+    elif period == "This Year":
+        first = today.replace(month=1, day=1)
+    else:
+        return None, None
+    return datetime.combine(first, time.min), datetime.combine(tomorrow, time.min)
+
 
 class ReportWindow(QDialog):
     def __init__(self, activity_log):
@@ -12,6 +38,7 @@ class ReportWindow(QDialog):
         self.setGeometry(150, 150, 800, 600)
         self.setStyleSheet("background-color: #3b4252; color: #eceff4;")
         self.activity_log = activity_log
+        self.last_log_id = None
 
         self.initUI()
 
@@ -19,7 +46,7 @@ class ReportWindow(QDialog):
         layout = QVBoxLayout()
 
         self.table = QTableWidget(self)
-        self.table.setRowCount(len(self.activity_log))
+        self.table.setRowCount(0)
         self.table.setColumnCount(4)
         self.table.setHorizontalHeaderLabels(
             ["Application/Website", "Start", "End", "Duration (seconds)"])
@@ -36,14 +63,17 @@ class ReportWindow(QDialog):
             }
         """)
 
-        for row, log in enumerate(self.activity_log):
-            self.table.setItem(row, 0, QTableWidgetItem(log['window']))
-            self.table.setItem(row, 1, QTableWidgetItem(str(log['start'])))
-            self.table.setItem(row, 2, QTableWidgetItem(str(log['end'])))
-            self.table.setItem(row, 3, QTableWidgetItem(str(log['duration'])))
-
         layout.addWidget(self.table)
 
+        self.load_more_button = self.create_button(
+            "Load More", "icons/report_icon.png", self.load_more)
+        layout.addWidget(self.load_more_button)
+        self.load_more()
+
+        self.period_combo = QComboBox(self)
+        self.period_combo.addItems(REPORT_PERIODS)
+        layout.addWidget(self.period_combo)
+
         self.download_log_button = self.create_button(
             "Download Log", "icons/download_icon.png", self.download_log)
         layout.addWidget(self.download_log_button)
@@ -72,14 +102,34 @@ class ReportWindow(QDialog):
         button.clicked.connect(callback)
         return button
 
+    def load_more(self):
+        """
+            Lädt die nächste Seite an Logs per Keyset-Pagination in die Tabelle.
+            """
+        logs = list(self.activity_log.get_logs(
+            limit=PAGE_SIZE, after_id=self.last_log_id))
+        row = self.table.rowCount()
+        self.table.setRowCount(row + len(logs))
+        for log in logs:
+            self.table.setItem(row, 0, QTableWidgetItem(log['window']))
+            self.table.setItem(row, 1, QTableWidgetItem(str(log['start'])))
+            self.table.setItem(row, 2, QTableWidgetItem(str(log['end'])))
+            self.table.setItem(row, 3, QTableWidgetItem(str(log['duration'])))
+            row += 1
+        if logs:
+            self.last_log_id = logs[-1]['id']
+        self.load_more_button.setEnabled(len(logs) == PAGE_SIZE)
+
     def download_log(self):
         options = QFileDialog.Options()
         filepath, _ = QFileDialog.getSaveFileName(
             self, "Save Log", "", "CSV Files (*.csv);;All Files (*)", options=options)
         if filepath:
-            df = pd.DataFrame(self.activity_log)
-            summary = df.groupby('window')['duration'].sum().reset_index()
-            summary.sort_values(by='duration', ascending=False, inplace=True)
+            start, end = period_range(self.period_combo.currentText())
+            df = self.activity_log.get_logs_frame(start=start, end=end)
+            # Die Zusammenfassung kommt aus den Tagessummen statt aus den einzelnen Segmenten
+            summary = pd.DataFrame(self.activity_log.get_window_totals(
+                start, end), columns=['window', 'duration'])
             with open(filepath, 'w') as file:
                 file.write("Detailed Logs\n")
                 df.to_csv(file, index=False)
@@ -89,20 +139,20 @@ class ReportWindow(QDialog):
                 self, "Save Log", f"Log saved to {filepath}")
 
     def download_report(self):
-        if not self.activity_log:
+        if not self.activity_log.has_logs():
             QMessageBox.warning(self, "Generate Report",
                                 "No activity to report.")
             return
 
-        df = pd.DataFrame(self.activity_log)
-        summary = df.groupby('window')['duration'].sum().reset_index()
-        summary.sort_values(by='duration', ascending=False, inplace=True)
+        start, end = period_range(self.period_combo.currentText())
+        summary = pd.DataFrame(self.activity_log.get_window_totals(
+            start, end), columns=['window', 'duration'])
 
         plt.figure(figsize=(10, 5))
         plt.bar(summary['window'], summary['duration'])
         plt.xlabel('Applications/Websites')
         plt.ylabel('Time Spent (seconds)')
-        plt.title('Time Usage Report')
+        plt.title(f'Time Usage Report ({self.period_combo.currentText()})')
         plt.xticks(rotation=45, ha='right')
         plt.tight_layout()
 
@@ -0,0 +1,58 @@
+from datetime import timedelta
+
+NS_PER_SECOND = 1_000_000_000
+
+
+class Segment:
+    """
+    Ein Zeitabschnitt (Aktivität oder Pause). Mit __slots__ deutlich kleiner als ein Dictionary;
+    __getitem__ und get erlauben den Zugriff wie bisher (log['window'], log.get('id')).
+    Die Dauer wird monoton ab start_ns gemessen; end ergibt sich als start + Dauer.
+    """
+    __slots__ = ('id', 'window', 'start', 'end', 'duration', 'type', 'video', 'start_ns', 'title')
+
+    def __init__(self, window, start, type, id=None, end=None, duration=0, video=False, start_ns=None,
+                 title=None):
+        self.id = id
+        # window ist der normalisierte Schlüssel, title der zuletzt gesehene Originaltitel
+        self.window = window
+        self.title = title
+        self.start = start
+        self.end = end
+        self.duration = duration
+        self.type = type
+        self.video = video
+        self.start_ns = start_ns
+
+    @property
+    def is_open(self):
+        return self.end is None
+
+    def update(self, now_ns):
+        """
+        Aktualisiert die Dauer eines offenen Segments.
+        """
+        self.duration = (now_ns - self.start_ns) / NS_PER_SECOND
+
+    def close(self, end_ns):
+        """
+        Schließt das Segment zum monotonen Zeitpunkt end_ns ab.
+        """
+        self.update(end_ns)
+        self.end = self.start + timedelta(seconds=self.duration)
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__ if name not in ('start_ns', 'title')}
+
+    def __repr__(self):
+        return (f"Segment(id={self.id!r}, window={self.window!r}, start={self.start!r}, "
+                f"end={self.end!r}, duration={self.duration!r}, type={self.type!r})")
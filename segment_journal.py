@@ -0,0 +1,131 @@
+import json
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+
+EVENT_OPEN = "open"
+EVENT_CLOSE = "close"
+
+
+def _encode_time(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _decode_time(value):
+    return datetime.fromisoformat(value) if value else None
+
+
+class SegmentJournal:
+    """
+    Append-only Journal (JSON Lines) neben der Datenbank. Geöffnete und abgeschlossene
+    Segmente werden sofort angehängt, fsync erfolgt gebündelt alle sync_interval Sekunden.
+    Nach einem Absturz spielt replay() die noch nicht gespeicherten Segmente nach SQLite ein.
+    """
+
+    def __init__(self, path, sync_interval=1.0):
+        self.path = path
+        self.sync_interval = sync_interval
+        self.dirty = False
+        self.last_sync = time.monotonic()
+        self.file = open(self.path, "a", encoding="utf-8")
+
+    def append(self, event, log):
+        """
+        Hängt ein Ereignis (open/close) für einen Log an. Der Eintrag wird sofort an das
+        Betriebssystem übergeben und übersteht damit einen Absturz des Programms.
+        """
+        record = {
+            'event': event,
+            'id': log.get('id'),
+            'window': log['window'],
+            'start': _encode_time(log['start']),
+            'end': _encode_time(log.get('end')),
+            'duration': log.get('duration', 0),
+            'type': log['type'],
+            'video': bool(log.get('video', False)),
+        }
+        self.file.write(json.dumps(record) + "\n")
+        self.file.flush()
+        self.dirty = True
+        if self.sync_interval <= 0:
+            self.sync(force=True)
+
+    def sync(self, force=False):
+        """
+        Schreibt das Journal per fsync auf den Datenträger, höchstens alle sync_interval Sekunden.
+        """
+        now = time.monotonic()
+        if not self.dirty or (not force and now - self.last_sync < self.sync_interval):
+            return False
+        os.fsync(self.file.fileno())
+        self.dirty = False
+        self.last_sync = now
+        return True
+
+    def reset(self):
+        """
+        Leert das Journal, nachdem alle Einträge in der Datenbank gespeichert sind.
+        """
+        self.file.truncate(0)
+        self.file.seek(0)
+        os.fsync(self.file.fileno())
+        self.dirty = False
+
+    def close(self):
+        if not self.file.closed:
+            self.sync(force=True)
+            self.file.close()
+
+    def read(self):
+        """
+        Liest die Einträge des Journals. Eine abgeschnittene letzte Zeile wird ignoriert.
+        """
+        records = []
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    logging.warning(f"Skipping damaged journal line in {self.path}")
+                    continue
+                record['start'] = _decode_time(record['start'])
+                record['end'] = _decode_time(record['end'])
+                records.append(record)
+        return records
+
+    def replay(self, activity_log):
+        """
+        Spielt das Journal idempotent in die Datenbank ein und leert es danach.
+        Segmente mit rowid werden nur abgeschlossen, solange sie in der Datenbank noch offen sind;
+        Segmente ohne rowid nur eingefügt, wenn es noch keinen Eintrag mit gleichem Fenster und Beginn gibt.
+        """
+        records = self.read()
+        if not records:
+            return 0
+        closed = {}
+        opened = {}
+        for record in records:
+            key = record['id'] or (record['window'], record['start'])
+            if record['event'] == EVENT_CLOSE:
+                closed[key] = record
+                opened.pop(key, None)
+            elif record['event'] == EVENT_OPEN and key not in closed:
+                opened[key] = record
+
+        logs = [log for log in closed.values()
+                if log['id'] or not self._is_stored(activity_log, log)]
+        count = activity_log.close_logs(logs) if logs else 0
+        # Offene Segmente ohne rowid wieder anlegen, damit close_open_logs sie abschließt
+        for log in opened.values():
+            if not log['id'] and not self._is_stored(activity_log, log):
+                activity_log.open_log(log['window'], log['start'], log['type'], log['video'])
+        self.reset()
+        logging.info(f"Replayed {len(records)} journal entries, {count} logs recovered.")
+        return count
+
+    @staticmethod
+    def _is_stored(activity_log, log):
+        match = activity_log.get_logs(start=log['start'], end=log['start'] + timedelta(seconds=1),
+                                      window=log['window'], limit=1)
+        return next(match, None) is not None
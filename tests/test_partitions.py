@@ -0,0 +1,52 @@
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+from activity_log import ActivityLog
+
+START = datetime(2024, 1, 15, 9, 0, 0)
+
+
+@pytest.fixture
+def sealed(tmp_path):
+    """
+    Eine Datenbank mit einer versiegelten Partition für 2024-01.
+    """
+    db_path = str(tmp_path / "activity.db")
+    activity_log = ActivityLog(db_path=db_path)
+    for i in range(3):
+        start = START + timedelta(minutes=i)
+        activity_log.add_log("Editor", start, start + timedelta(seconds=30), 30.0, "activity")
+    assert activity_log.seal_closed_months(current_month="2024-03") == ["2024-01"]
+    yield activity_log, db_path
+    activity_log.close()
+
+
+def test_reader_releases_partitions(sealed):
+    activity_log, db_path = sealed
+    reader = ActivityLog(db_path=db_path)
+    assert len(list(reader.get_logs())) == 3
+    assert reader.has_logs()
+    # Nach der Abfrage hält der Leser keine Verbindung zur Partition mehr
+    assert not reader._partitions
+
+    assert activity_log.apply_retention(1, current_month="2024-03") == ["2024-01"]
+    assert activity_log.get_partitions()[0]['compressed']
+    reader.close()
+
+
+def test_retention_skips_partition_in_use(sealed):
+    activity_log, db_path = sealed
+    path = activity_log._partition_path("2024-01")
+    conn = sqlite3.connect(path, timeout=0.1)
+    conn.execute("PRAGMA journal_mode")
+    conn.execute("BEGIN")
+    conn.execute("SELECT COUNT(*) FROM activity_log").fetchone()
+
+    # Die offene Lesetransaktion blockiert den Wechsel aus dem WAL-Modus: überspringen statt abbrechen
+    assert activity_log.apply_retention(1, current_month="2024-03") == []
+    assert not activity_log.get_partitions()[0]['compressed']
+    conn.close()
+
+    assert activity_log.apply_retention(1, current_month="2024-03") == ["2024-01"]
@@ -0,0 +1,145 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from probe_executor import ProbeExecutor
+
+
+class ManualClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not reached")
+        time.sleep(0.001)
+
+
+@pytest.fixture
+def clock():
+    return ManualClock()
+
+
+@pytest.fixture
+def release():
+    # Gibt hängende Proben am Testende frei, damit keine Threads übrig bleiben
+    event = threading.Event()
+    yield event
+    event.set()
+
+
+def make_executor(clock, **kwargs):
+    kwargs.setdefault("timeout", 2.0)
+    kwargs.setdefault("ttl", 10.0)
+    return ProbeExecutor(clock=clock, **kwargs)
+
+
+def test_timeout_is_recorded(clock, release):
+    executor = make_executor(clock)
+    executor.register("hang", release.wait)
+    assert executor.get("hang", 1, "Title") is None
+    clock.now = 2.5
+    assert executor.get("hang", 1, "Title") is None
+    result = executor.peek("hang", 1, "Title")
+    assert result.value is None
+    assert result.error == "timeout"
+    assert executor.stats['timeouts'] == 1
+    executor.shutdown()
+
+
+def test_pool_restarts_when_all_workers_hang(clock, release):
+    executor = make_executor(clock, max_workers=1)
+    executor.register("hang", release.wait)
+    executor.register("fast", lambda: "ok")
+    executor.get("hang", 1, "Title")
+    clock.now = 2.5
+    executor.get("hang", 1, "Title")
+    assert len(executor.hung) == 1
+
+    # Der einzige Worker hängt: die nächste Probe startet einen neuen Pool und läuft dort
+    assert executor.get("fast", 2, "Other") is None
+    assert executor.stats['pool_restarts'] == 1
+    wait_for(lambda: executor.peek("fast", 2, "Other") is not None)
+    assert executor.peek("fast", 2, "Other").value == "ok"
+    executor.shutdown()
+
+
+def test_errors_are_cached_for_ttl(clock):
+    calls = []
+
+    def failing():
+        calls.append(1)
+        raise OSError("UIAutomation unavailable")
+
+    executor = make_executor(clock)
+    executor.register("fail", failing)
+    executor.get("fail", 1, "Title")
+    wait_for(lambda: executor.peek("fail", 1, "Title") is not None)
+    result = executor.peek("fail", 1, "Title")
+    assert result.value is None
+    assert "UIAutomation unavailable" in result.error
+    assert executor.stats['errors'] == 1
+
+    clock.now = 9.9
+    assert executor.get("fail", 1, "Title") is None
+    assert executor.stats['submitted'] == 1
+    assert len(calls) == 1
+    executor.shutdown()
+
+
+def test_refresh_after_ttl(clock):
+    values = iter([1, 2])
+    executor = make_executor(clock)
+    executor.register("count", lambda: next(values))
+    assert executor.get("count", 1, "Title") is None
+    wait_for(lambda: executor.peek("count", 1, "Title") is not None)
+    assert executor.get("count", 1, "Title") == 1
+
+    # Abgelaufen: der alte Wert kommt sofort zurück, die neue Abfrage läuft im Hintergrund
+    clock.now = 10.0
+    assert executor.get("count", 1, "Title") == 1
+    assert executor.stats['submitted'] == 2
+    wait_for(lambda: executor.peek("count", 1, "Title").value == 2)
+    assert executor.get("count", 1, "Title") == 2
+    executor.shutdown()
+
+
+def test_eviction_at_max_entries(clock):
+    executor = make_executor(clock, max_entries=4)
+    executor.register("probe", lambda hwnd: hwnd)
+    for hwnd in range(5):
+        clock.now = float(hwnd)
+        executor.get("probe", hwnd, "Title", hwnd)
+        wait_for(lambda: executor.peek("probe", hwnd, "Title") is not None)
+
+    assert len(executor.results) == 4
+    # Das älteste Ergebnis wurde verworfen
+    assert executor.peek("probe", 0, "Title") is None
+    assert [executor.peek("probe", hwnd, "Title").value for hwnd in range(1, 5)] == [1, 2, 3, 4]
+    executor.shutdown()
+
+
+def test_hung_probe_does_not_block_exit(tmp_path):
+    script = tmp_path / "hang.py"
+    script.write_text(
+        "import threading\n"
+        "from probe_executor import ProbeExecutor\n"
+        "executor = ProbeExecutor(timeout=0.1)\n"
+        "executor.register('hang', threading.Event().wait)\n"
+        "executor.get('hang', 1, 'Title')\n"
+        "executor.shutdown()\n")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    # Eine Probe, die nie zurückkehrt, darf das Beenden des Prozesses nicht aufhalten
+    completed = subprocess.run([sys.executable, str(script)], cwd=root, timeout=10,
+                               env={**os.environ, "PYTHONPATH": root})
+    assert completed.returncode == 0
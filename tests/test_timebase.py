@@ -0,0 +1,183 @@
+import configparser
+from datetime import datetime, timedelta
+
+import pytest
+
+from activity_log import ActivityLog
+from timebase import NS_PER_SECOND, FakeClock, Timebase
+from tracker_engine import TrackerEngine
+from window_source import ScriptedWindowSource
+
+START = datetime(2024, 1, 1, 9, 0, 0)
+
+
+class FakeActivityMonitor:
+    """
+    Ruhezeit auf der monotonen Uhr der FakeClock; touch() ist eine Eingabe.
+    """
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.last_input_ns = clock.monotonic_ns()
+        self.on_activity = None
+
+    def start(self):
+        return ()
+
+    def touch(self):
+        self.last_input_ns = self.clock.monotonic_ns()
+
+    def get_idle_seconds(self):
+        return (self.clock.monotonic_ns() - self.last_input_ns) / NS_PER_SECOND
+
+
+def make_engine(tmp_path, clock, inactivity_time=3600):
+    config = configparser.ConfigParser()
+    config.read_dict({
+        "pause": {"inactivity_time": str(inactivity_time)},
+        "database": {"upload_interval": "3600", "heartbeat_interval": "15",
+                     "database_path": str(tmp_path / "activity.db")},
+        "tracking": {"suspend_threshold": "30"},
+    })
+    monitor = FakeActivityMonitor(clock)
+    source = ScriptedWindowSource()
+    engine = TrackerEngine(config, window_source=source, activity_monitor=monitor,
+                           timebase=Timebase(clock, suspend_threshold=30))
+    engine.start()
+    source.set_window("Editor")
+    engine.tick()
+    return engine, monitor
+
+
+def work(engine, clock, monitor, seconds):
+    for _ in range(seconds):
+        clock.advance(1)
+        monitor.touch()
+        engine.tick()
+
+
+def segments(engine):
+    """
+    Alle Segmente (gespeichert und offen) als (Fenster, Typ, Beginn, Dauer).
+    """
+    engine.flush_write_buffer()
+    stored = [(log['window'], log['type'], log['start'], log['duration'])
+              for log in engine.activity_log.get_logs()
+              if log['end'] is not None]
+    open_segments = [(segment.window, segment.type, segment.start, segment.duration)
+                     for segment in engine.open_segments()]
+    return stored + open_segments
+
+
+@pytest.fixture
+def clock():
+    return FakeClock(START)
+
+
+def test_check_without_gap(clock):
+    timebase = Timebase(clock, suspend_threshold=30)
+    clock.advance(1)
+    assert timebase.check(1) is None
+    clock.jump_wall(1)
+    assert timebase.check(0) is None
+
+
+@pytest.mark.parametrize("seconds", [20, -3600])
+def test_check_wall_jump_reanchors(clock, seconds):
+    timebase = Timebase(clock, suspend_threshold=30)
+    clock.advance(5)
+    clock.jump_wall(seconds)
+    gap = timebase.check(5)
+    assert gap.kind == "clock_jump"
+    assert gap.seconds == pytest.approx(seconds)
+    assert timebase.wall_now() == START + timedelta(seconds=5 + seconds)
+
+
+@pytest.mark.parametrize("monotonic_includes_suspend", [True, False])
+def test_check_suspend(clock, monotonic_includes_suspend):
+    timebase = Timebase(clock, suspend_threshold=30)
+    clock.advance(10)
+    assert timebase.check(10) is None
+    clock.suspend(600, monotonic_includes_suspend)
+    gap = timebase.check(1)
+    assert gap.kind == "suspend"
+    assert gap.start_ns == 10 * NS_PER_SECOND
+    if monotonic_includes_suspend:
+        assert gap.end_ns == 610 * NS_PER_SECOND
+        assert gap.seconds == pytest.approx(599)
+    else:
+        assert gap.end_ns == gap.start_ns
+        assert gap.seconds == pytest.approx(600)
+    assert timebase.wall_now() == START + timedelta(seconds=610)
+
+
+@pytest.mark.parametrize("seconds", [20, -3600])
+def test_engine_wall_jump_does_not_split(tmp_path, clock, seconds):
+    engine, monitor = make_engine(tmp_path, clock)
+    work(engine, clock, monitor, 10)
+    clock.jump_wall(seconds)
+    engine.tick()
+    work(engine, clock, monitor, 5)
+
+    result = segments(engine)
+    engine.stop()
+    assert result == [("Editor", "activity", START, 15.0)]
+    assert engine.timebase.wall_now() == START + timedelta(seconds=15 + seconds)
+
+
+@pytest.mark.parametrize("monotonic_includes_suspend", [True, False])
+def test_engine_suspend_splits_segment(tmp_path, clock, monotonic_includes_suspend):
+    engine, monitor = make_engine(tmp_path, clock)
+    work(engine, clock, monitor, 10)
+    clock.suspend(600, monotonic_includes_suspend)
+    engine.tick()
+    work(engine, clock, monitor, 5)
+
+    result = segments(engine)
+    engine.stop()
+    # Der Standby gehört zu keinem Segment
+    assert result == [("Editor", "activity", START, 10.0),
+                      ("Editor", "activity", START + timedelta(seconds=610), 5.0)]
+
+
+def test_engine_suspend_past_pause_threshold(tmp_path, clock):
+    engine, monitor = make_engine(tmp_path, clock, inactivity_time=60)
+    work(engine, clock, monitor, 10)
+    # Windows zählt den Standby auf der monotonen Uhr mit, die Ruhezeit überschreitet die Pausengrenze
+    clock.suspend(600, monotonic_includes_suspend=True)
+    engine.tick()
+    assert engine.is_paused
+    clock.advance(2)
+    monitor.touch()
+    engine.tick()
+    work(engine, clock, monitor, 5)
+
+    result = segments(engine)
+    engine.stop()
+    resumed = START + timedelta(seconds=610)
+    assert result == [("Editor", "activity", START, 10.0),
+                      ("Pause", "pause", resumed, 2.0),
+                      ("Editor", "activity", resumed + timedelta(seconds=2), 5.0)]
+
+
+def test_engine_update_config_moves_open_segment(tmp_path, clock):
+    engine, monitor = make_engine(tmp_path, clock)
+    work(engine, clock, monitor, 10)
+    old_log = engine.activity_log
+    old_path = old_log.db_path
+
+    config = engine.config
+    config["database"]["database_path"] = str(tmp_path / "moved.db")
+    config["tracking"]["suspend_threshold"] = "120"
+    engine.update_config(config)
+    assert engine.timebase.suspend_threshold_ns == 120 * NS_PER_SECOND
+    work(engine, clock, monitor, 5)
+
+    result = segments(engine)
+    engine.stop()
+    # Das Segment wird in der alten Datenbank abgeschlossen und in der neuen fortgesetzt
+    assert result == [("Editor", "activity", START + timedelta(seconds=10), 5.0)]
+    old = ActivityLog(db_path=old_path)
+    assert [(log['window'], log['start'], log['duration']) for log in old.get_logs()] == [
+        ("Editor", START, 10.0)]
+    old.close()
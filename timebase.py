@@ -0,0 +1,133 @@
+import logging
+import time
+from collections import namedtuple
+from datetime import datetime
+
+NS_PER_SECOND = 1_000_000_000
+
+# Eine erkannte Lücke: kind ist "suspend" oder "clock_jump", start_ns/end_ns sind monotone Zeitpunkte
+Gap = namedtuple("Gap", ["kind", "start_ns", "end_ns", "seconds"])
+
+
+class SystemClock:
+    """
+    Die echten Uhren: monoton für Dauern, Wanduhr (Epoch) für die Zuordnung zu Uhrzeiten.
+    """
+
+    def monotonic_ns(self):
+        return time.monotonic_ns()
+
+    def time_ns(self):
+        return time.time_ns()
+
+
+class FakeClock:
+    """
+    Steuerbare Uhr zum Nachstellen von Uhrsprüngen und Standby ohne echte Wartezeit.
+    """
+
+    def __init__(self, wall=None):
+        self.mono = 0
+        wall = wall or datetime(2024, 1, 1, 9, 0, 0)
+        self.wall = int(wall.timestamp() * NS_PER_SECOND)
+
+    def monotonic_ns(self):
+        return self.mono
+
+    def time_ns(self):
+        return self.wall
+
+    def advance(self, seconds):
+        """
+        Normale Zeit vergeht: beide Uhren laufen gleich weiter.
+        """
+        step = int(seconds * NS_PER_SECOND)
+        self.mono += step
+        self.wall += step
+
+    def jump_wall(self, seconds):
+        """
+        Nur die Wanduhr springt (NTP-Korrektur, manuelles Stellen).
+        """
+        self.wall += int(seconds * NS_PER_SECOND)
+
+    def suspend(self, seconds, monotonic_includes_suspend=True):
+        """
+        Standby: die Wanduhr läuft weiter; die monotone Uhr je nach System
+        (Windows zählt den Standby mit, Linux CLOCK_MONOTONIC nicht).
+        """
+        step = int(seconds * NS_PER_SECOND)
+        self.wall += step
+        if monotonic_includes_suspend:
+            self.mono += step
+
+
+class Timebase:
+    """
+    Misst Dauern monoton und ordnet sie nur an Segmentgrenzen einer Uhrzeit zu.
+
+    Die Wanduhr wird über einen Anker (monoton, Epoch) abgebildet. check() vergleicht bei jedem
+    Tick beide Uhren: springt die Wanduhr, wird neu verankert; eine Lücke, die deutlich länger
+    als der geplante Tick-Abstand ist (oder nur auf der Wanduhr auftaucht), gilt als Standby.
+    Zeitumstellungen (DST) ändern die Epoch nicht und sind daher kein Sprung.
+    """
+
+    def __init__(self, clock=None, jump_tolerance=2.0, suspend_threshold=30.0):
+        self.clock = clock or SystemClock()
+        self.jump_tolerance_ns = int(jump_tolerance * NS_PER_SECOND)
+        self.suspend_threshold_ns = int(suspend_threshold * NS_PER_SECOND)
+        self.anchor()
+        self.last_check_ns = self.anchor_mono_ns
+        self.last_check_wall_ns = self.anchor_wall_ns
+
+    def anchor(self):
+        self.anchor_mono_ns = self.clock.monotonic_ns()
+        self.anchor_wall_ns = self.clock.time_ns()
+
+    def now(self):
+        """
+        Gibt die monotone Zeit in Nanosekunden zurück.
+        """
+        return self.clock.monotonic_ns()
+
+    def to_wall(self, mono_ns):
+        """
+        Bildet einen monotonen Zeitpunkt auf eine lokale Uhrzeit ab.
+        """
+        wall_ns = self.anchor_wall_ns + (mono_ns - self.anchor_mono_ns)
+        return datetime.fromtimestamp(wall_ns / NS_PER_SECOND)
+
+    def wall_now(self):
+        return self.to_wall(self.now())
+
+    def seconds_since(self, mono_ns, now_ns=None):
+        return ((now_ns if now_ns is not None else self.now()) - mono_ns) / NS_PER_SECOND
+
+    def check(self, expected_seconds=0):
+        """
+        Prüft seit dem letzten Aufruf auf Standby und Uhrsprünge. expected_seconds ist der
+        geplante Abstand zum vorigen Tick. Gibt eine Gap zurück oder None.
+        """
+        mono_ns = self.clock.monotonic_ns()
+        wall_ns = self.clock.time_ns()
+        mono_delta = mono_ns - self.last_check_ns
+        wall_delta = wall_ns - self.last_check_wall_ns
+        start_ns = self.last_check_ns
+        self.last_check_ns = mono_ns
+        self.last_check_wall_ns = wall_ns
+
+        gap = None
+        overdue = mono_delta - int(expected_seconds * NS_PER_SECOND)
+        drift = wall_delta - mono_delta
+        if overdue > self.suspend_threshold_ns:
+            # Die monotone Uhr lief weiter (Windows): der Prozess hat so lange nicht getickt
+            gap = Gap("suspend", start_ns, mono_ns, overdue / NS_PER_SECOND)
+        elif drift > self.suspend_threshold_ns:
+            # Nur die Wanduhr lief weiter (CLOCK_MONOTONIC ohne Standby)
+            gap = Gap("suspend", start_ns, mono_ns, drift / NS_PER_SECOND)
+        elif abs(drift) > self.jump_tolerance_ns:
+            gap = Gap("clock_jump", start_ns, mono_ns, drift / NS_PER_SECOND)
+        if gap is not None or abs(drift) > self.jump_tolerance_ns:
+            self.anchor()
+            logging.info(f"Timebase: {gap.kind if gap else 'clock drift'} of {drift / NS_PER_SECOND:.1f} s detected.")
+        return gap
@@ -0,0 +1,100 @@
+import json
+import logging
+import re
+from collections import namedtuple
+
+Rule = namedtuple("Rule", ["name", "pattern", "replace"])
+
+# Flüchtige Bestandteile von Fenstertiteln, die keinen neuen Abschnitt rechtfertigen
+DEFAULT_RULES = [
+    # "(3) Posteingang", "[12] Chat"
+    Rule("unread_counter", r"^[(\[]\d+\+?[)\]]\s*", ""),
+    # "● main.py - Visual Studio Code", "*notes.txt - Editor", "notes.txt* - Editor"
+    Rule("dirty_marker", r"^(?:[●•*]\s*)+|(?<=\S)\*(?=\s|$)", ""),
+    # Spinner und Fortschrittszeichen am Anfang
+    Rule("spinner", r"^[⠀-⣿◐◓◑◒◴◷◶◵|/\\-]\s+", ""),
+    # "01:23 / 04:56" in Mediaplayern
+    Rule("elapsed_time", r"\s*\d{1,2}:\d{2}(?::\d{2})?\s*/\s*\d{1,2}:\d{2}(?::\d{2})?", ""),
+    # "[45%]", "45 % -"
+    Rule("progress", r"\s*\[?\b\d{1,3}\s?%\]?(?:\s*-)?", ""),
+    # Übrig gebliebene Trenner am Rand: "VLC media player -"
+    Rule("dangling_separator", r"^\s*[-–|]\s+|\s+[-–|]\s*$", ""),
+    Rule("whitespace", r"\s{2,}", " "),
+]
+
+
+def load_rules(path=None, use_defaults=True):
+    """
+    Liefert die Standardregeln und ergänzt sie um Regeln aus einer JSON-Datei
+    (Liste von {"name", "pattern", "replace"}).
+    """
+    rules = list(DEFAULT_RULES) if use_defaults else []
+    if not path:
+        return rules
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for entry in json.load(f):
+                rules.append(Rule(entry.get("name", entry["pattern"]),
+                                  entry["pattern"], entry.get("replace", "")))
+    except FileNotFoundError:
+        logging.warning(f"{path} not found, using default title rules only")
+    except Exception as e:
+        logging.error(f"Error loading title rules from {path}: {e}")
+    return rules
+
+
+class TitleNormalizer:
+    """
+    Bildet Fenstertitel auf einen stabilen Schlüssel ab. Die Regeln werden einmal kompiliert;
+    bereits gesehene Titel kommen aus einem begrenzten Cache.
+    """
+
+    def __init__(self, rules=None, cache_size=1024):
+        self.rules = []
+        for rule in DEFAULT_RULES if rules is None else rules:
+            try:
+                self.rules.append((rule.name, re.compile(rule.pattern), rule.replace))
+            except re.error as e:
+                logging.error(f"Invalid title rule {rule.name}: {e}")
+        self.cache_size = cache_size
+        self.cache = {}
+        self.normalized = 0
+        self.merged = 0
+        self.rule_hits = {name: 0 for name, _, _ in self.rules}
+
+    def normalize(self, title):
+        """
+        Gibt den kanonischen Schlüssel für title zurück.
+        """
+        key = self.cache.get(title)
+        if key is not None:
+            return key
+        key = title
+        for name, pattern, replace in self.rules:
+            key, count = pattern.subn(replace, key)
+            if count:
+                self.rule_hits[name] += 1
+        key = key.strip() or title
+        if key != title:
+            self.normalized += 1
+        if len(self.cache) >= self.cache_size:
+            self.cache.clear()
+        self.cache[title] = key
+        return key
+
+    def stats(self):
+        """
+        normalized: Titel, die umgeschrieben wurden; merged: Titelwechsel ohne neuen Abschnitt.
+        """
+        return {'normalized': self.normalized, 'merged': self.merged,
+                'rule_hits': dict(self.rule_hits)}
+
+
+def create_title_normalizer(config):
+    """
+    Erstellt den Normalisierer aus [tracking]; mit normalize_titles = false bleibt der Titel unverändert.
+    """
+    tracking = config["tracking"] if config.has_section("tracking") else {}
+    if str(tracking.get("normalize_titles", "true")).lower() not in ("true", "1", "yes", "on"):
+        return TitleNormalizer(rules=[])
+    return TitleNormalizer(load_rules(tracking.get("title_rules_path", "") or None))
@@ -0,0 +1,580 @@
+import configparser
+import logging
+import threading
+import time
+
+from activity_log import ActivityLog, LogWriteBuffer
+from metrics import create_metrics
+from segment import Segment
+from segment_journal import SegmentJournal
+from timebase import NS_PER_SECOND, Timebase
+from title_normalizer import create_title_normalizer
+from window_source import NO_WINDOW, create_window_source
+
+CONFIG_FILE = "config.ini"
+# Kürzester Abstand zweier Ticks, damit fällige Fristen nicht in einer Schleife enden
+MIN_TICK_DELAY = 0.05
+
+
+def load_config(path=CONFIG_FILE):
+    """
+        Lädt die Konfiguration aus der Datei.
+        """
+    config = configparser.ConfigParser()
+    config.read(path)
+    return config
+
+
+class TrackerEngine:
+    """
+    Tracking-Kern ohne Qt: liest das aktive Fenster, führt die Segmente (Aktivität/Pause)
+    und speichert sie. Oberflächen melden sich über subscribe() für Ereignisse an.
+
+    Es gibt genau eine Taktquelle: tick() gibt die Wartezeit bis zum nächsten Tick zurück,
+    und der Aufrufer (ein Single-Shot-QTimer der Oberfläche oder run_forever()) plant nur
+    diesen einen Tick neu ein. Die Wartezeit ergibt sich aus der nächsten Frist: Pausenbeginn
+    (letzte Eingabe + inactivity_time), Heartbeat, Flush, Journal-Sync und, bei Quellen ohne
+    Push, dem Abfrageintervall. Dieses verdoppelt sich ohne Eingaben bis sample_interval_max
+    und springt nach einer Eingabe oder einem Fensterwechsel zurück auf sample_interval_min.
+    Während einer Pause weckt erst die nächste Eingabe die Engine über wake().
+
+    Fensterwechsel push-fähiger Quellen und Eingaben kommen aus deren Threads; der Zustand
+    ist daher durch ein Lock geschützt.
+
+    Dauern werden über die Timebase monoton gemessen. Erkennt sie einen Standby, werden die
+    offenen Segmente an der Lücke geteilt, statt die Standby-Zeit mitzuzählen.
+    """
+
+    def __init__(self, config, window_source=None, activity_monitor=None, timebase=None):
+        self.config = config
+        self._lock = threading.RLock()
+        self._listeners = []
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+
+        self.active_window = None
+        self.start_time = None
+        self.last_active_window = None
+        self.last_active_time = None
+        # Direkte Handles auf die offenen Segmente; abgeschlossene liegen im Write-Buffer
+        self.current_segment = None
+        self.pause_segment = None
+        self.is_paused = False
+        self.pause_start_time = None
+        self.load_settings()
+        self.timebase = timebase or Timebase(suspend_threshold=self.suspend_threshold)
+        self.last_delay = 0
+        self.next_tick_ns = None
+        self.metrics = create_metrics(config)
+        self.normalizer = create_title_normalizer(config)
+
+        self.activity_log = self.open_activity_log()
+        self.journal = self.open_journal()
+        self.write_buffer = self.create_write_buffer()
+        self.last_heartbeat = time.monotonic()
+        self.last_database_update = time.monotonic()
+        self.activity_log.close_open_logs()  # Reste eines Absturzes abschließen
+        self.maintain_partitions()
+
+        self.activity_monitor = activity_monitor
+        self.input_listeners = ()
+        self.window_source = window_source or self.create_window_source()
+
+    @property
+    def current_logs(self):
+        """
+            Noch nicht gespeicherte abgeschlossene Segmente, gefolgt von den offenen.
+            """
+        logs = list(self.write_buffer.pending)
+        logs.extend(self.open_segments())
+        return logs
+
+    def open_segments(self):
+        return [segment for segment in (self.current_segment, self.pause_segment)
+                if segment is not None]
+
+    def load_settings(self):
+        """
+            Übernimmt die Intervalle und Grenzwerte aus der Konfiguration.
+            """
+        self.pause_duration = int(self.config["pause"]["inactivity_time"])
+        self.database_upload_interval = int(
+            self.config["database"]["upload_interval"])
+        self.heartbeat_interval = self.config["database"].getint(
+            "heartbeat_interval", fallback=15)
+        tracking = self.config["tracking"] if self.config.has_section("tracking") else {}
+        self.sample_interval_min = float(tracking.get("sample_interval_min", 1))
+        self.sample_interval_max = max(
+            self.sample_interval_min, float(tracking.get("sample_interval_max", 5)))
+        self.sample_interval = self.sample_interval_min
+        self.suspend_threshold = float(tracking.get("suspend_threshold", 30))
+
+    def open_activity_log(self):
+        return ActivityLog(
+            db_path=self.config["database"]["database_path"],
+            storage=self.config["database"].get("storage_format", fallback=None))
+
+    def create_write_buffer(self):
+        """
+            Erstellt den Write-Behind-Puffer für abgeschlossene Logs.
+            """
+        return LogWriteBuffer(
+            self.activity_log,
+            max_size=self.config["database"].getint("flush_batch_size", fallback=50),
+            max_age=self.database_upload_interval,
+            journal=self.journal)
+
+    def create_window_source(self):
+        """
+            Erstellt die Fensterquelle aus [tracking] window_source.
+            """
+        if not self.config.has_section("tracking"):
+            return create_window_source()
+        return create_window_source(
+            self.config["tracking"].get("window_source", fallback="auto"),
+            script_path=self.config["tracking"].get("window_script", fallback=None))
+
+    def open_journal(self):
+        """
+            Öffnet das Segment-Journal neben der Datenbank und spielt Reste eines Absturzes ein.
+            """
+        journal = SegmentJournal(
+            self.activity_log.db_path + ".journal",
+            sync_interval=self.config["database"].getfloat("journal_sync_interval", fallback=1.0))
+        try:
+            journal.replay(self.activity_log)
+        except Exception as e:
+            logging.error(f"Error replaying segment journal: {e}")
+        return journal
+
+    def maintain_partitions(self):
+        """
+            Lagert abgeschlossene Monate aus und wendet die Aufbewahrung an (partitioning = monthly).
+            """
+        database_config = self.config["database"]
+        if database_config.get("partitioning", fallback="none") != "monthly":
+            return
+        try:
+            sealed, affected = self.activity_log.maintain_partitions(
+                retention_months=database_config.getint("retention_months", fallback=0),
+                retention_action=database_config.get("retention_action", fallback="archive"))
+            if sealed or affected:
+                logging.info(f"Partitions sealed: {sealed}, retention applied: {affected}")
+        except Exception as e:
+            logging.error(f"Error maintaining partitions: {e}")
+
+    def subscribe(self, callback):
+        """
+            Registriert callback(event, data) für Ereignisse: window_changed, pause_started,
+            pause_ended, flushed, tick. Der Aufruf kann aus einem Hintergrund-Thread kommen.
+            """
+        self._listeners.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _emit(self, event, data=None):
+        for callback in list(self._listeners):
+            try:
+                callback(event, data)
+            except Exception as e:
+                logging.error(f"Error in tracker subscriber for {event}: {e}")
+
+    def start(self):
+        """
+            Startet Eingabeüberwachung und Fensterquelle und öffnet das erste Segment.
+            """
+        if self.activity_monitor is None:
+            from activity_monitor import ActivityMonitor
+            self.activity_monitor = ActivityMonitor()
+        self.activity_monitor.on_activity = self.on_input
+        self.input_listeners = self.activity_monitor.start()
+        self.window_source.subscribe(self.on_window_changed)
+        self.window_source.start()
+        self.track_time()
+
+    def run_forever(self):
+        """
+            Führt die Ticks aus, bis stop() aufgerufen wird (Betrieb ohne Oberfläche).
+            Zwischen zwei Ticks wird bis zur nächsten Frist oder bis wake() geschlafen.
+            """
+        while not self._stop_event.is_set():
+            self._wake_event.clear()
+            delay = self.tick()
+            self._wake_event.wait(delay)
+
+    def request_stop(self):
+        """
+            Beendet run_forever() nach dem laufenden Tick (auch aus Signal-Handlern).
+            """
+        self._stop_event.set()
+        self._wake_event.set()
+
+    def wake(self):
+        """
+            Zieht den nächsten Tick vor. Die Oberfläche bekommt dazu das Ereignis 'wake'.
+            """
+        self._wake_event.set()
+        self._emit("wake")
+
+    def on_input(self):
+        """
+            Wird vom ActivityMonitor bei der ersten Eingabe nach einer ruhigen Phase aufgerufen.
+            """
+        self.sample_interval = self.sample_interval_min
+        # Im aktiven Zustand verschiebt eine Eingabe nur die Pausenfrist, das prüft der geplante Tick
+        if self.is_paused or not self.window_source.push_capable:
+            self.wake()
+
+    def stop(self):
+        """
+            Schließt das laufende Segment ab, speichert alles und gibt die Ressourcen frei.
+            """
+        self.request_stop()
+        for listener in self.input_listeners:
+            listener.stop()
+        self.window_source.stop()
+        with self._lock:
+            # Laufende Activity bzw. Pause abschließen, damit sie mit gespeichert wird
+            if self.is_paused:
+                self.end_pause()
+            else:
+                self.end_activity(reason="application_closed")
+            self.update_database()
+            self.journal.close()
+            self.activity_log.close()
+            self.metrics.dump()
+            logging.info(f"Title normalization: {self.normalizer.stats()}")
+
+    def update_config(self, config):
+        """
+            Übernimmt eine geänderte Konfiguration und öffnet bei Bedarf die neue Datenbank.
+            """
+        with self._lock:
+            self.config = config
+            self.load_settings()
+            # Neu aufsetzen, damit ein geänderter suspend_threshold gilt; die Uhr bleibt dieselbe
+            self.timebase = Timebase(
+                self.timebase.clock, jump_tolerance=self.timebase.jump_tolerance_ns / NS_PER_SECOND,
+                suspend_threshold=self.suspend_threshold)
+            self.metrics.dump()
+            self.metrics = create_metrics(config)
+            self.next_tick_ns = None
+            self.normalizer = create_title_normalizer(config)
+
+            # Die rowids der offenen Segmente gelten nur in der alten Datenbank: dort abschließen
+            # und nach dem Wechsel in der neuen neu ansetzen
+            moved = []
+            if config["database"]["database_path"] != self.activity_log.db_path:
+                now_ns = self.timebase.now()
+                for segment in self.open_segments():
+                    segment.close(now_ns)
+                    self.write_buffer.add(segment)
+                    moved.append(segment)
+                self.current_segment = None
+                self.pause_segment = None
+
+            self.heartbeat(force=True)
+            self.flush_write_buffer()
+            self.journal.close()
+            self.activity_log.close()
+            self.activity_log = self.open_activity_log()
+            self.journal = self.open_journal()
+            self.write_buffer = self.create_write_buffer()
+
+            for segment in moved:
+                reopened = self.open_log(segment.window, now_ns, segment.type)
+                reopened.title = segment.title
+                reopened.video = segment.video
+                if segment.type == "pause":
+                    self.pause_segment = reopened
+                else:
+                    self.current_segment = reopened
+                    self.start_time = reopened.start
+
+    def delete_database(self):
+        """
+            Löscht die Datenbank samt Journal und verwirft die Segmente im Speicher.
+            """
+        with self._lock:
+            self.activity_log.delete_database()
+            self.journal.reset()
+            self.current_segment = None
+            self.pause_segment = None
+            self.write_buffer = self.create_write_buffer()
+
+    def track_time(self):
+        """
+            Beginnt ein Segment für das aktuelle Fenster (beim Start und nach einer Pause).
+            """
+        with self._lock:
+            title = self.window_source.current_window()
+            self.active_window = self.normalizer.normalize(title)
+            self.start_time = None
+            if self.active_window != NO_WINDOW:
+                self.current_segment = self.open_log(
+                    self.active_window, self.timebase.now(), "activity")
+                self.current_segment.title = title
+                self.start_time = self.current_segment.start
+            logging.info(f"Started tracking window: {self.active_window}")
+
+    def tick(self):
+        """
+            Ein Arbeitsschritt: Pausen erkennen, Fenster abfragen (ohne Push), Dauer aktualisieren,
+            Heartbeat, Flush und Journal-Sync. Gibt die Wartezeit bis zum nächsten Tick zurück.
+            """
+        delay = self.sample_interval_min
+        metrics = self.metrics
+        if metrics.enabled:
+            # Verspätung gegenüber der geplanten Frist; vorgezogene Ticks (wake) zählen nicht
+            now_ns = time.monotonic_ns()
+            if self.next_tick_ns is not None and now_ns >= self.next_tick_ns:
+                metrics.record_ns("tick.lag", now_ns - self.next_tick_ns)
+        try:
+            with metrics.measure("tick"), self._lock:
+                gap = self.timebase.check(self.last_delay)
+                if gap is not None and gap.kind == "suspend":
+                    self.split_at_gap(gap)
+                if self.is_paused:
+                    if self.check_for_activity():
+                        self.end_pause()
+                        self.track_time()
+                        self.sample_interval = self.sample_interval_min
+                else:
+                    if self.check_for_pause():
+                        self.start_pause()
+                    else:
+                        # Push-fähige Quellen melden Wechsel selbst (on_window_changed)
+                        if not self.window_source.push_capable:
+                            with metrics.measure("tick.sample_window"):
+                                self.sample_window()
+                        self.update_active_duration()
+                        self.update_video()
+                with metrics.measure("tick.heartbeat"):
+                    self.heartbeat()
+                if self.write_buffer.is_due():
+                    with metrics.measure("tick.flush"):
+                        self.flush_write_buffer()
+                if time.monotonic() - self.last_database_update >= self.database_upload_interval:
+                    with metrics.measure("tick.update_database"):
+                        self.update_database()
+                with metrics.measure("tick.journal_sync"):
+                    self.journal.sync()
+                delay = self.next_delay()
+        except Exception as e:
+            logging.error(f"Error during tick: {e}")
+        self.last_delay = delay
+        with metrics.measure("tick.subscribers"):
+            self._emit("tick")
+        if metrics.enabled:
+            self.next_tick_ns = time.monotonic_ns() + int(delay * 1e9)
+            metrics.maybe_dump()
+        return delay
+
+    def split_at_gap(self, gap):
+        """
+            Schließt die offenen Segmente am Beginn eines Standby und setzt sie danach neu an.
+            Ist die Ruhezeit inzwischen lang genug für eine Pause, übernimmt das der Tick.
+            """
+        logging.info(f"Suspend of {gap.seconds:.0f} s detected, splitting open segments.")
+        if self.pause_segment is not None:
+            self.pause_segment.close(gap.start_ns)
+            self.write_buffer.add(self.pause_segment)
+            self.pause_segment = self.open_log('Pause', gap.end_ns, "pause")
+        if self.current_segment is not None:
+            window, title = self.current_segment.window, self.current_segment.title
+            self.current_segment.close(gap.start_ns)
+            self.write_buffer.add(self.current_segment)
+            self.current_segment = None
+            if not self.check_for_pause():
+                self.current_segment = self.open_log(window, gap.end_ns, "activity")
+                self.current_segment.title = title
+                self.start_time = self.current_segment.start
+        self._emit("suspend", gap)
+
+    def sample_window(self):
+        """
+            Fragt das aktive Fenster ab und passt das Abfrageintervall an: zurück auf das Minimum
+            nach einem Wechsel oder einer Eingabe, sonst verdoppeln bis zum Maximum.
+            """
+        changed = self.switch_window(self.window_source.current_window())
+        if changed or self.idle_seconds() < self.sample_interval:
+            self.sample_interval = self.sample_interval_min
+        else:
+            self.sample_interval = min(self.sample_interval * 2, self.sample_interval_max)
+
+    def idle_seconds(self):
+        return self.activity_monitor.get_idle_seconds()
+
+    def next_delay(self):
+        """
+            Gibt die Zeit bis zur nächsten Frist in Sekunden zurück.
+            """
+        now = time.monotonic()
+        deadlines = [self.database_upload_interval - (now - self.last_database_update)]
+        if self.is_paused:
+            # Das Pausenende meldet die Eingabe per wake(); hier nur ein Sicherheitsnetz
+            deadlines.append(self.sample_interval_max)
+        else:
+            deadlines.append(self.pause_duration - self.idle_seconds())
+            if not self.window_source.push_capable:
+                deadlines.append(self.sample_interval)
+        if self.open_segments():
+            deadlines.append(self.heartbeat_interval - (now - self.last_heartbeat))
+        if self.write_buffer.pending:
+            deadlines.append(self.write_buffer.max_age - (now - self.write_buffer.oldest))
+        if self.journal.dirty:
+            deadlines.append(self.journal.sync_interval - (now - self.journal.last_sync))
+        return max(MIN_TICK_DELAY, min(deadlines))
+
+    def update_active_duration(self):
+        if self.current_segment is not None:
+            self.current_segment.update(self.timebase.now())
+
+    def update_video(self):
+        """
+            Übernimmt das letzte bekannte Video-Urteil der Fensterquelle; ein Segment bleibt Video,
+            sobald einmal eines erkannt wurde. Die langsamen Proben laufen im Hintergrund.
+            """
+        current_segment = self.current_segment
+        if current_segment is not None and not current_segment.video:
+            current_segment.video = bool(self.window_source.is_video())
+
+    def switch_window(self, title):
+        """
+            Schließt das laufende Segment und öffnet eines für das neue Fenster, falls sich der
+            normalisierte Titel geändert hat. Gibt zurück, ob ein Wechsel stattfand.
+            """
+        new_window = self.normalizer.normalize(title)
+        if new_window == self.active_window:
+            current_segment = self.current_segment
+            if current_segment is not None and current_segment.title != title:
+                # Nur der flüchtige Teil des Titels hat sich geändert: kein neuer Abschnitt
+                current_segment.title = title
+                self.normalizer.merged += 1
+            return False
+        # Beende die aktuelle Activity aufgrund eines Fensterwechsels
+        now_ns = self.timebase.now()
+        self.end_activity(reason="window_change", end_ns=now_ns)
+        self.active_window = new_window
+
+        # Startet nur ein task, wenn auch ein fenster aktiv ist
+        if self.active_window != NO_WINDOW:
+            self.current_segment = self.open_log(
+                self.active_window, now_ns, "activity")
+            self.current_segment.title = title
+            self.start_time = self.current_segment.start
+        logging.info(
+            f"Window changed to: {self.active_window}")
+        self._emit("window_changed", self.active_window)
+        return True
+
+    def on_window_changed(self, window):
+        """
+            Verarbeitet einen gemeldeten Fensterwechsel sofort.
+            Während einer Pause wird er ignoriert; nach der Pause wird das aktuelle Fenster neu gelesen.
+            """
+        try:
+            with self.metrics.measure("window_changed"), self._lock:
+                if not self.is_paused:
+                    self.switch_window(window)
+        except Exception as e:
+            logging.error(f"Error handling window change: {e}")
+
+    def check_for_pause(self):
+        return self.idle_seconds() >= self.pause_duration
+
+    def check_for_activity(self):
+        return self.idle_seconds() < self.pause_duration
+
+    def start_pause(self):
+        now_ns = self.timebase.now()
+        self.end_activity(reason="pause_start", end_ns=now_ns)
+        self.is_paused = True
+        logging.info("Pause started.")
+        self.pause_segment = self.open_log('Pause', now_ns, "pause")
+        self.pause_start_time = self.pause_segment.start
+        self._emit("pause_started", self.pause_start_time)
+
+    def end_pause(self):
+        self.is_paused = False
+        pause_end_time = None
+        if self.pause_segment is not None:
+            self.pause_segment.close(self.timebase.now())
+            self.write_buffer.add(self.pause_segment)
+            pause_end_time = self.pause_segment.end
+            self.pause_segment = None
+        logging.info("Pause ended.")
+        self._emit("pause_ended", pause_end_time)
+
+    def open_log(self, window, start_ns, type):
+        """
+            Legt ein offenes Segment ab dem monotonen Zeitpunkt start_ns an und speichert es sofort,
+            damit es über seine rowid aktualisiert und später an Ort und Stelle abgeschlossen werden kann.
+            """
+        start = self.timebase.to_wall(start_ns)
+        segment = Segment(window, start, type, start_ns=start_ns)
+        try:
+            segment.id = self.activity_log.open_log(window, start, type)
+        except Exception as e:
+            logging.error(f"Error opening log in database: {e}")
+        self.journal.append("open", segment)
+        self.last_heartbeat = time.monotonic()
+        return segment
+
+    def end_activity(self, reason="", end_ns=None):
+        try:
+            current_segment = self.current_segment
+            if current_segment is not None:
+                current_segment.close(self.timebase.now() if end_ns is None else end_ns)
+                self.write_buffer.add(current_segment)
+                self.current_segment = None
+
+            if reason == "window_change" and current_segment is not None:
+                self.last_active_window = current_segment.window
+                self.last_active_time = current_segment.end
+            self.active_window = None
+            self.start_time = None
+            logging.info(f"Activity ended. Reason: {reason}")
+
+        except Exception as e:
+            logging.error(f"Error during end_activity: {e}")
+
+    def heartbeat(self, force=False):
+        """
+            Schreibt die Dauer der offenen Segmente alle heartbeat_interval Sekunden per rowid zurück.
+            """
+        now = time.monotonic()
+        if not force and now - self.last_heartbeat < self.heartbeat_interval:
+            return
+        self.last_heartbeat = now
+        try:
+            now_ns = self.timebase.now()
+            open_segments = self.open_segments()
+            for segment in open_segments:
+                segment.update(now_ns)
+            self.activity_log.checkpoint_logs(open_segments)
+        except Exception as e:
+            logging.error(f"Error during heartbeat: {e}")
+
+    def update_database(self):
+        self.last_database_update = time.monotonic()
+        try:
+            self.heartbeat(force=True)
+            self.flush_write_buffer()
+            logging.info("Database updated.")
+        except Exception as e:
+            logging.error(f"Error during database update: {e}")
+
+    def flush_write_buffer(self):
+        """
+            Schreibt alle abgeschlossenen Logs in einem Commit (leert den Write-Buffer).
+            """
+        try:
+            count = self.write_buffer.flush()
+            if count:
+                logging.info(f"Flushed {count} closed logs to the database.")
+                self._emit("flushed", count)
+        except Exception as e:
+            logging.error(f"Error flushing closed logs: {e}")
@@ -1,14 +1,29 @@
 import psutil
 import win32gui
 import win32process
-import re
 from datetime import datetime
 import time
 import ctypes
+import threading
 from ctypes import wintypes
 import comtypes
 from comtypes import client
 from comtypes.GUID import GUID
+from probe_executor import ProbeExecutor
+from process_cache import ForegroundSampler
+from video_matcher import ReloadingVideoMatcher
+
+# Merkt sich das letzte Vordergrundfenster und cacht Prozessname/-pfad je (pid, Startzeit)
+foreground_sampler = ForegroundSampler(
+    win32gui.GetForegroundWindow,
+    win32gui.GetWindowText,
+    lambda hwnd: win32process.GetWindowThreadProcessId(hwnd)[1])
+
+# Video-Muster aus [video] der config.ini, neu geladen sobald sich die Datei ändert
+video_matcher = ReloadingVideoMatcher()
+
+# Langsame Proben (UIAutomation) laufen in eigenen Threads, jeweils mit COM-Initialisierung
+probe_executor = ProbeExecutor(max_workers=2, timeout=2.0, ttl=10.0, initializer=comtypes.CoInitialize)
 
 
 def get_active_window_info():
@@ -17,14 +32,7 @@ def get_active_window_info():
     """
     try:
         if psutil.WINDOWS:
-            hwnd = win32gui.GetForegroundWindow()
-            if hwnd:
-                title = win32gui.GetWindowText(hwnd)
-                threadid, pid = win32process.GetWindowThreadProcessId(hwnd)
-                process = psutil.Process(pid)
-                process_name = process.name()
-                executable_path = process.exe()
-                return {'title': title, 'process_name': process_name, 'executable_path': executable_path, 'hwnd': hwnd}
+            return foreground_sampler.sample()
         elif psutil.MACOS:
             import subprocess
             script = 'tell application "System Events" to get the name of the first process whose frontmost is true'
@@ -62,53 +70,48 @@ def is_video_url(url):
     """
         Prüft, ob eine URL auf eine Video-Seite verweist.
     """
-    if url is None:
-        return False
-    video_patterns = [
-        r"youtube\.com/watch",
-        r"vimeo\.com/",
-        r"netflix\.com/",
-        r"twitch\.tv/",
-        r"dailymotion\.com/",
-        r"wistia\.com/",
-        r"youtube\.com/embed/",
-        r"player\.vimeo\.com/video/"
-    ]
-    for pattern in video_patterns:
-        if re.search(pattern, url, re.IGNORECASE):
-            return True
-    return False
+    return video_matcher.get().is_video_url(url)
 
 
 def is_video_process(process_name, hwnd, title):
     """
     Prüft, ob der Prozessname auf eine Videoanwendung hindeutet.
     """
-    video_process_patterns = [
-        r"vlc",
-        r"mpv",
-        r"wmplayer",
-        r"potplayer"
-    ]
-    for pattern in video_process_patterns:
-        if re.search(pattern, process_name, re.IGNORECASE):
-            return True
-
-    # Browser spezifische Erkennung (nicht perfekt)
-    browser_process_patterns = [
-        r"chrome",
-        r"firefox",
-        r"edge",
-        r"brave"
-    ]
-
-    for pattern in browser_process_patterns:
-        if re.search(pattern, process_name, re.IGNORECASE) and is_video_url(title):
-            return True
-    return False
+    return video_matcher.get().is_video_process(process_name, title)
+
+
+_uia_module = None
+_automation = threading.local()
+
+
+def get_uia_module():
+    """
+    Lädt die UIAutomation-Typbibliothek einmal pro Prozess.
+    """
+    global _uia_module
+    if _uia_module is None:
+        # IAccessible interface from UIAutomation
+        _uia_module = client.GetModule(
+            ("UIAutomationCore",
+             GUID("{ff48dba1-60ef-41d7-a0b8-0a7787d22f50}"),
+             0, 1, "IUIAutomation")
+        )
+    return _uia_module
+
+
+def get_automation():
+    """
+    Gibt das IUIAutomation-Objekt des aktuellen Threads zurück (COM-Objekte sind threadgebunden).
+    """
+    automation = getattr(_automation, "instance", None)
+    if automation is None:
+        automation = client.CreateObject(get_uia_module().IUIAutomation)
+        _automation.instance = automation
+    return automation
 
 
 def is_tab_playing_audio(element, automation):
+        IUIAutomation = get_uia_module()
         try:
             # Get the tabs
             tabs = element.FindAll(
@@ -143,13 +146,8 @@ def is_chrome_tab_playing_audio(hwnd, process_name):
         if not "chrome" in process_name.lower():
             return False
 
-         # IAccessible interface from UIAutomation
-        IUIAutomation = client.GetModule(
-            ("UIAutomationCore",
-             GUID("{ff48dba1-60ef-41d7-a0b8-0a7787d22f50}"),
-             0, 1, "IUIAutomation")
-        )
-        automation = client.CreateObject(IUIAutomation.IUIAutomation)
+        IUIAutomation = get_uia_module()
+        automation = get_automation()
 
         # Get window object
         element = automation.ElementFromHandle(wintypes.HWND(hwnd))
@@ -180,6 +178,9 @@ def is_chrome_tab_playing_audio(hwnd, process_name):
     return False
 
 
+probe_executor.register("chrome_audio", is_chrome_tab_playing_audio)
+
+
 def is_video_active_url(title, process_name, hwnd):
     """
     Gibt zurück, ob ein video gerade aktiv ist
@@ -187,15 +188,23 @@ def is_video_active_url(title, process_name, hwnd):
     if not title or not process_name or not hwnd:
         return False
 
-    if is_video_process(process_name, hwnd, title):
-        return True
-
-    if is_video_url(title):
+    if video_matcher.get().is_video(process_name, title):
         return True
 
     if "chrome" in process_name.lower():
-        tab_name = is_chrome_tab_playing_audio(hwnd, process_name)
+        # Die UIAutomation-Abfrage läuft im Hintergrund; hier nur das letzte bekannte Ergebnis
+        tab_name = probe_executor.get("chrome_audio", hwnd, title, hwnd, process_name)
         if tab_name:
            return tab_name
 
     return False
+
+
+def get_video_verdict():
+    """
+    Gibt zurück, ob im zuletzt abgefragten Vordergrundfenster ein Video läuft (blockiert nicht).
+    """
+    sampler = foreground_sampler
+    if sampler.last_info is None:
+        return False
+    return bool(is_video_active_url(sampler.last_title, sampler.last_info.name, sampler.last_hwnd))
@@ -0,0 +1,160 @@
+import configparser
+import functools
+import logging
+import os
+import re
+import time
+
+CONFIG_FILE = "config.ini"
+
+DEFAULT_URL_PATTERNS = [
+    r"youtube\.com/watch",
+    r"vimeo\.com/",
+    r"netflix\.com/",
+    r"twitch\.tv/",
+    r"dailymotion\.com/",
+    r"wistia\.com/",
+    r"youtube\.com/embed/",
+    r"player\.vimeo\.com/video/",
+]
+DEFAULT_PLAYER_PATTERNS = [r"vlc", r"mpv", r"wmplayer", r"potplayer"]
+DEFAULT_BROWSER_PATTERNS = [r"chrome", r"firefox", r"edge", r"brave"]
+
+
+class PatternSet:
+    """
+    Eine Musterliste als eine Alternation, Groß-/Kleinschreibung egal. Muster ohne Großbuchstaben
+    (also auch ohne \\D, \\S, \\W) laufen ohne IGNORECASE über den kleingeschriebenen Text,
+    das ist in CPython um ein Vielfaches schneller; die übrigen behalten IGNORECASE.
+    Ungültige Muster werden übersprungen.
+    """
+
+    def __init__(self, patterns):
+        lower, other = [], []
+        for pattern in patterns:
+            try:
+                re.compile(pattern)
+            except re.error as e:
+                logging.error(f"Invalid video pattern {pattern!r}: {e}")
+                continue
+            (lower if pattern == pattern.lower() else other).append(f"(?:{pattern})")
+        self.lower_regex = re.compile("|".join(lower)) if lower else None
+        self.other_regex = re.compile("|".join(other), re.IGNORECASE) if other else None
+
+    def search(self, text):
+        if self.lower_regex is not None and self.lower_regex.search(text.lower()) is not None:
+            return True
+        return self.other_regex is not None and self.other_regex.search(text) is not None
+
+
+def split_patterns(value):
+    """
+    Liest eine Musterliste aus der Konfiguration (eine Zeile pro Muster).
+    """
+    return [line.strip() for line in value.splitlines() if line.strip()]
+
+
+class VideoMatcher:
+    """
+    Erkennt Video-URLs und Videoprozesse mit je einem vorkompilierten Ausdruck pro Liste,
+    also in einem Durchlauf statt einer Schleife über re.search.
+    """
+
+    def __init__(self, url_patterns=None, player_patterns=None, browser_patterns=None):
+        self.urls = PatternSet(DEFAULT_URL_PATTERNS if url_patterns is None else url_patterns)
+        self.players = PatternSet(DEFAULT_PLAYER_PATTERNS if player_patterns is None else player_patterns)
+        self.browsers = PatternSet(DEFAULT_BROWSER_PATTERNS if browser_patterns is None else browser_patterns)
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Erstellt den Matcher aus [video]; fehlende Einträge nutzen die Standardmuster.
+        """
+        if not config.has_section("video"):
+            return cls()
+        video = config["video"]
+
+        def patterns(key):
+            return split_patterns(video[key]) if key in video else None
+
+        return cls(patterns("url_patterns"), patterns("player_patterns"), patterns("browser_patterns"))
+
+    def is_video_url(self, url):
+        if url is None:
+            return False
+        return self.urls.search(url)
+
+    def is_video_process(self, process_name, title):
+        """
+        Videoplayer direkt am Prozessnamen, Browser nur mit einer Video-URL im Titel.
+        """
+        if not process_name:
+            return False
+        if self.players.search(process_name):
+            return True
+        return self.browsers.search(process_name) and self.is_video_url(title)
+
+    def is_video(self, process_name, title):
+        """
+        Gesamturteil wie is_video_process() oder is_video_url() zusammen: ein Videoplayer
+        oder eine Video-URL im Titel (die Browserprüfung ist darin enthalten).
+        """
+        if process_name and self.players.search(process_name):
+            return True
+        return self.is_video_url(title)
+
+    def is_video_title(self, title):
+        """
+        Urteil allein aus einem gespeicherten Fenstertitel: Videoplayer tragen ihren Namen
+        meist im Titel, Browser die URL.
+        """
+        if not title:
+            return False
+        return self.players.search(title) or self.is_video_url(title)
+
+
+def make_title_classifier(matcher, cache_size=65536):
+    """
+    Gibt matcher.is_video_title mit einem begrenzten Cache zurück: jeder Titel wird höchstens
+    einmal geprüft, solange er im Cache liegt.
+    """
+    return functools.lru_cache(maxsize=cache_size)(matcher.is_video_title)
+
+
+class ReloadingVideoMatcher:
+    """
+    Hält einen VideoMatcher aktuell: ändert sich die Konfigurationsdatei (mtime), wird neu
+    kompiliert. Die Datei wird höchstens alle check_interval Sekunden geprüft.
+    """
+
+    def __init__(self, path=CONFIG_FILE, check_interval=1.0):
+        self.path = path
+        self.check_interval = check_interval
+        self.mtime = None
+        self.last_check = None
+        self.matcher = VideoMatcher()
+        self.reloads = 0
+
+    def get(self):
+        now = time.monotonic()
+        if self.last_check is not None and now - self.last_check < self.check_interval:
+            return self.matcher
+        self.last_check = now
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            mtime = None
+        if mtime != self.mtime:
+            self.mtime = mtime
+            self.reload()
+        return self.matcher
+
+    def reload(self):
+        config = configparser.ConfigParser(interpolation=None)
+        try:
+            config.read(self.path)
+            self.matcher = VideoMatcher.from_config(config)
+            self.reloads += 1
+            logging.info(f"Video patterns loaded from {self.path}")
+        except Exception as e:
+            logging.error(f"Error loading video patterns: {e}")
@@ -0,0 +1,249 @@
+import logging
+import sys
+import threading
+
+NO_WINDOW = "Kein aktives Fenster"
+
+
+class WindowSource:
+    """
+    Liefert das aktive Fenster. Backends werden entweder abgefragt (current_window)
+    oder melden Fensterwechsel selbst an die registrierten Listener (push_capable).
+    """
+    push_capable = False
+
+    def __init__(self):
+        self._listeners = []
+
+    def current_window(self):
+        """
+        Gibt den Namen des aktiven Fensters zurück.
+        """
+        raise NotImplementedError
+
+    def is_video(self):
+        """
+        Gibt das letzte bekannte Video-Urteil für das aktive Fenster zurück; darf nicht blockieren.
+        """
+        return False
+
+    def subscribe(self, callback):
+        """
+        Registriert einen Listener, der bei jedem Fensterwechsel mit dem neuen Namen aufgerufen wird.
+        Der Aufruf kann aus einem Hintergrund-Thread kommen.
+        """
+        self._listeners.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _notify(self, window):
+        for callback in list(self._listeners):
+            try:
+                callback(window)
+            except Exception as e:
+                logging.error(f"Error notifying window change: {e}")
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+
+class PollingWindowSource(WindowSource):
+    """
+    Fragt das aktive Fenster über eine Funktion ab (Standard: video_detection).
+    """
+
+    def __init__(self, function=None):
+        super().__init__()
+        self.function = function
+        self.video_function = None
+        self.probe_executor = None
+
+    def current_window(self):
+        if self.function is None:
+            # Erst hier importieren: video_detection benötigt win32gui
+            from video_detection import get_active_window_name, get_video_verdict, probe_executor
+            self.function = get_active_window_name
+            self.video_function = get_video_verdict
+            self.probe_executor = probe_executor
+        return self.function()
+
+    def stop(self):
+        if self.probe_executor is not None:
+            self.probe_executor.shutdown()
+
+    def is_video(self):
+        if self.video_function is None:
+            return False
+        try:
+            return self.video_function()
+        except Exception as e:
+            logging.error(f"Error reading video verdict: {e}")
+            return False
+
+
+class Win32EventWindowSource(PollingWindowSource):
+    """
+    Meldet Fensterwechsel über SetWinEventHook (Vordergrundwechsel und Titeländerungen
+    des Vordergrundfensters). Zwischen zwei Wechseln fällt keine Arbeit an.
+    """
+    push_capable = True
+
+    EVENT_SYSTEM_FOREGROUND = 0x0003
+    EVENT_OBJECT_NAMECHANGE = 0x800C
+    WINEVENT_OUTOFCONTEXT = 0x0000
+    WINEVENT_SKIPOWNPROCESS = 0x0002
+    OBJID_WINDOW = 0
+    WM_QUIT = 0x0012
+
+    def __init__(self):
+        super().__init__()
+        self._window = None
+        self._thread = None
+        self._thread_id = None
+        self._ready = threading.Event()
+
+    def start(self):
+        self._window = self.current_window()
+        self._thread = threading.Thread(
+            target=self._run, name="WinEventHook", daemon=True)
+        self._thread.start()
+        self._ready.wait(timeout=5)
+
+    def stop(self):
+        if self._thread_id:
+            import ctypes
+            ctypes.windll.user32.PostThreadMessageW(self._thread_id, self.WM_QUIT, 0, 0)
+            self._thread.join(timeout=2)
+            self._thread_id = None
+        super().stop()
+
+    def _run(self):
+        import ctypes
+        from ctypes import wintypes
+
+        user32 = ctypes.windll.user32
+        user32.SetWinEventHook.restype = wintypes.HANDLE
+        user32.UnhookWinEvent.argtypes = [wintypes.HANDLE]
+        WinEventProc = ctypes.WINFUNCTYPE(
+            None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND,
+            wintypes.LONG, wintypes.LONG, wintypes.DWORD, wintypes.DWORD)
+
+        def callback(hook, event, hwnd, id_object, id_child, thread_id, event_time):
+            if id_object != self.OBJID_WINDOW:
+                return
+            if event == self.EVENT_OBJECT_NAMECHANGE and hwnd != user32.GetForegroundWindow():
+                return
+            self._check()
+
+        # Referenz halten, sonst räumt der GC den Callback weg
+        self._proc = WinEventProc(callback)
+        self._thread_id = ctypes.windll.kernel32.GetCurrentThreadId()
+        hooks = [user32.SetWinEventHook(event, event, 0, self._proc, 0, 0,
+                                        self.WINEVENT_OUTOFCONTEXT | self.WINEVENT_SKIPOWNPROCESS)
+                 for event in (self.EVENT_SYSTEM_FOREGROUND, self.EVENT_OBJECT_NAMECHANGE)]
+        self._ready.set()
+        msg = wintypes.MSG()
+        while user32.GetMessageW(ctypes.byref(msg), 0, 0, 0) > 0:
+            user32.TranslateMessage(ctypes.byref(msg))
+            user32.DispatchMessageW(ctypes.byref(msg))
+        for hook in hooks:
+            if hook:
+                user32.UnhookWinEvent(hook)
+
+    def _check(self):
+        try:
+            window = self.current_window()
+        except Exception as e:
+            logging.error(f"Error reading foreground window: {e}")
+            return
+        if window != self._window:
+            self._window = window
+            self._notify(window)
+
+
+class ScriptedWindowSource(WindowSource):
+    """
+    Spielt eine feste Abfolge von Fenstern ab, z.B. für Tests und den Betrieb ohne Windows.
+    script ist eine Liste von (Sekunden, Titel): nach der Wartezeit wird der Titel aktiv.
+    """
+    push_capable = True
+
+    def __init__(self, script=None, loop=False):
+        super().__init__()
+        self.script = list(script or [])
+        self.loop = loop
+        self._window = NO_WINDOW
+        self._stop = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def from_file(cls, path, loop=False):
+        """
+        Liest ein Skript mit Zeilen der Form '<Sekunden> <Fenstertitel>'.
+        """
+        script = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                delay, _, title = line.partition(" ")
+                script.append((float(delay), title))
+        return cls(script, loop=loop)
+
+    def current_window(self):
+        return self._window
+
+    def set_window(self, window):
+        """
+        Macht ein Fenster aktiv und benachrichtigt die Listener bei einem Wechsel.
+        """
+        if window != self._window:
+            self._window = window
+            self._notify(window)
+
+    def start(self):
+        if not self.script:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="ScriptedWindowSource", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def _run(self):
+        while True:
+            for delay, window in self.script:
+                if self._stop.wait(delay):
+                    return
+                self.set_window(window)
+            if not self.loop:
+                return
+
+
+def create_window_source(name="auto", script_path=None):
+    """
+    Erzeugt das Backend für den Namen aus der Konfiguration ([tracking] window_source).
+    auto: Win32-Events unter Windows, sonst Abfrage über video_detection.
+    """
+    if name == "auto":
+        name = "win32_events" if sys.platform == "win32" else "poll"
+    if name == "win32_events":
+        return Win32EventWindowSource()
+    if name == "scripted":
+        if script_path:
+            return ScriptedWindowSource.from_file(script_path, loop=True)
+        return ScriptedWindowSource()
+    if name != "poll":
+        logging.warning(f"Unknown window source '{name}', falling back to polling.")
+    return PollingWindowSource()